@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+end-to-end benchmark: run list, progress, comment and create as jira-cli processes against the local fake jira and
+report wall time, soap calls and peak memory for several result set sizes.
+
+every command runs in a fresh interpreter so its peak memory is its own; the fake jira runs in this process. the
+wsdl, token and metadata are cached before timing, like for a user running jira-cli every day.
+
+usage: python benchmarks/bench_commands.py [--sizes 10,1000,50000] [--latency SECONDS] [--payload BYTES]
+                                           [--workers N] [--commands list,progress,...]
+'''
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import fakejira  # NOQA
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# the jira-cli process reports its peak resident memory (kB on linux) on stderr
+RUNNER = '''
+import sys, resource
+from jiracli import cli
+sys.argv = %r
+try:
+    cli.main()
+finally:
+    sys.stderr.write('\\nmaxrss %%d\\n' %% resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def jira_cli(argv, stdin=None):
+    ''' run jira-cli with the arguments `argv`, returns (seconds, peak memory in kB) '''
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        process = subprocess.Popen([sys.executable, '-c', RUNNER % (['jira-cli'] + argv)], env=env, stdout=devnull,
+                                   stderr=subprocess.PIPE, stdin=subprocess.PIPE if stdin is not None else None)
+        _, err = process.communicate(stdin)
+    elapsed = time.time() - start
+    if process.returncode:
+        raise SystemExit('jira-cli %s failed:\n%s' % (' '.join(argv), err))
+    # daemon threads may still complain on stderr about the interpreter shutting down
+    return elapsed, int(re.findall(r'^maxrss (\d+)$', err, re.M)[-1])
+
+
+def scenarios(size, workdir):
+    ''' (name, argv, stdin) of the commands run for a result set of `size` issues '''
+
+    rows = os.path.join(workdir, 'issues.csv')
+    with open(rows, 'w') as fh:
+        fh.write('project,summary,description\n')
+        for number in range(size):
+            fh.write('NEW,created issue %d,created by the benchmark\n' % number)
+    comments = ''.join('comment BP-%d -c benchmark comment\n' % n for n in range(1, size + 1))
+    return [
+        ('list', ['-o', 'list', '-j', 'project = BP'], None),
+        ('list -c', ['-c', 'list', '-j', 'project = BP'], None),
+        ('list jsonl', ['list', '-j', 'project = BP', '--output', 'jsonl'], None),
+        ('progress', ['progress', '--jql', 'project = BP', '--transist', 'Start Progress'], None),
+        ('comment', ['batch'], comments),
+        ('create', ['create', '--from-file', rows], None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', default='10,1000,50000', help='comma separated numbers of issues to run with')
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated server latency per request')
+    parser.add_argument('--payload', type=int, default=500, help='bytes of description padding per issue')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent soap calls')
+    parser.add_argument('--commands', help='comma separated scenarios to run (default: all)')
+    args = parser.parse_args()
+
+    print 'server latency %.0fms, %d bytes padding, %d workers' % (args.latency * 1000, args.payload, args.workers)
+    print '%8s %-12s %10s %10s %10s  %s' % ('issues', 'command', 'wall ms', 'ms/issue', 'peak MB', 'soap calls')
+    for size in [int(s) for s in args.sizes.split(',')]:
+        server, base = fakejira.serve(fakejira.FakeJira(payload=args.payload))
+        for issue in server.jira.add_issues('BP', size):
+            server.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+        home = fakejira.setup_home(base)
+        workdir = tempfile.mkdtemp(prefix='jira-cli-bench-')
+        try:
+            jira_cli(['cache', 'refresh'])
+            server.jira.latency = args.latency
+            for name, argv, stdin in scenarios(size, workdir):
+                if args.commands and name not in args.commands.split(','):
+                    continue
+                server.jira.reset_counts()
+                elapsed, maxrss = jira_cli(['--workers', str(args.workers)] + argv, stdin)
+                calls = ', '.join('%s %d' % item for item in sorted(server.jira.calls.items()))
+                print '%8d %-12s %10.1f %10.3f %10.1f  %s' % (size, name, elapsed * 1000, elapsed * 1000 / size,
+                                                               maxrss / 1024.0, calls)
+                sys.stdout.flush()
+        finally:
+            server.shutdown()
+            shutil.rmtree(home)
+            shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
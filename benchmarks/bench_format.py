@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+formatting benchmark: render synthetic issues with a custom --format, comparing the compiled templates with the
+previous token-by-token str.replace implementation.
+
+usage: python benchmarks/bench_format.py [--issues N] [--format FORMAT]
+'''
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from suds.sudsobject import Factory  # NOQA
+import fakejira  # NOQA
+from jiracli import cli  # NOQA
+
+
+def load_metadata():
+    ''' fill the metadata indexes from the fake jira tables, without a server '''
+
+    for kind, table in [('statuses', fakejira.STATUSES), ('priorities', fakejira.PRIORITIES),
+                        ('types', fakejira.ISSUE_TYPES)]:
+        items = [{'id': i, 'name': n, 'description': ''} for (i, n) in table]
+        cli.METADATA[kind] = {
+            'items': items,
+            'by_id': dict((item['id'], item) for item in items),
+            'by_name': dict((item['name'].lower(), item) for item in items),
+        }
+
+
+def synthetic_issues(count):
+    for number in xrange(1, count + 1):
+        fields = fakejira.make_issue('TP', number, status=str(1 + number % 6), priority=str(1 + number % 5))
+        yield Factory.object('RemoteIssue', fields)
+
+
+def legacy_format(issue, formatter):
+    ''' the --format implementation before templates were compiled '''
+
+    special_fields = {'status': 'statuses', 'priority': 'priorities', 'type': 'types'}
+    groups = re.compile(r'(\$([\w]+))').findall(formatter)
+    ret_str = formatter
+    for key, value in groups:
+        if value.lower() in special_fields.keys():
+            issue_id = issue[value.lower()]
+            data = ''
+            for item in cli.get_metadata(special_fields[value.lower()])['items']:
+                if item['id'] == issue_id:
+                    data = item['name']
+            ret_str = ret_str.replace(key, data)
+        else:
+            ret_str = ret_str.replace(key, str(getattr(issue, value)))
+    return ret_str
+
+
+def bench(name, func, issues):
+    start = time.time()
+    for issue in issues:
+        func(issue)
+    elapsed = time.time() - start
+    print '%-8s: %7.2fs, %9.0f issues/s' % (name, elapsed, len(issues) / elapsed)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--issues', type=int, default=100000, help='number of synthetic issues')
+    parser.add_argument('--format', default='$key [$status] $priority $type: $summary, reported by $reporter',
+                        help='format to render')
+    args = parser.parse_args()
+
+    load_metadata()
+    issues = list(synthetic_issues(args.issues))
+    print 'formatting %d issues with %r' % (len(issues), args.format)
+    legacy = bench('legacy', lambda issue: legacy_format(issue, args.format), issues)
+    compiled = bench('compiled', lambda issue: cli.format_issue(issue, 0, args.format), issues)
+    print 'speedup : %.1fx' % (legacy / compiled)
+
+
+if __name__ == '__main__':
+    main()
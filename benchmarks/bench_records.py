@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+memory benchmark of the issues of a search: bytes per issue held as suds objects (as answered by the soap client)
+and as the records soap_call turns them into, measured as the size of the python objects, the growth of the process
+and the size of an issue in the on-disk issue cache.
+
+every way of holding them is measured in a process of its own, the issues are fetched page by page like a search
+does.
+
+usage: python benchmarks/bench_records.py [--issues 20000] [--payload BYTES] [--components N]
+'''
+
+import os
+import gc
+import sys
+import pickle
+import shutil
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import fakejira  # NOQA
+from jiracli import cli  # NOQA
+from jiracli.mirror import Record  # NOQA
+
+
+def rss():
+    ''' resident memory of this process in bytes '''
+
+    with open('/proc/self/statm') as fh:
+        return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def deep_size(value, seen=None):
+    ''' bytes of `value` and everything it refers to, objects shared with others (classes, interned ids) included
+    only once '''
+
+    seen = seen if seen is not None else set()
+    if id(value) in seen or isinstance(value, type):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for (k, v) in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        size += deep_size(value.__dict__, seen)
+    for cls in type(value).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(value, name):
+                size += deep_size(getattr(value, name), seen)
+    return size
+
+
+def dict_record(value):
+    ''' `value` with suds objects turned into dict Records, as the issue cache used to pickle them '''
+
+    if hasattr(value, '__keylist__'):
+        return Record((name, dict_record(item)) for (name, item) in value)
+    if isinstance(value, list):
+        return [dict_record(item) for item in value]
+    if isinstance(value, unicode):
+        return unicode(value)
+    return value
+
+
+def raw_search(jql, page_size=cli.PAGE_SIZE):
+    ''' the issues of `jql` as the suds objects the soap client answers, page by page like search_issues_jql '''
+
+    from jiracli import transport
+    issues = []
+    while True:
+        query = '(%s) AND id > %s ORDER BY id ASC' % (jql, issues[-1].id) if issues else jql + ' ORDER BY id ASC'
+        page = transport.call(cli.get_service().getIssuesFromJqlSearch, cli.TOKEN, query, page_size)
+        issues.extend(page)
+        if len(page) < page_size:
+            return issues
+
+
+HELD = {
+    # suds objects can not be pickled, the issue cache pickled them as dicts
+    'suds objects': (lambda: raw_search('project = BP'), dict_record),
+    'records': (lambda: list(cli.search_issues_jql('project = BP')), lambda issue: issue),
+}
+
+
+def measure(name, count):
+    ''' print the bytes per issue of the `count` issues held as `name` '''
+
+    fetch, picklable = HELD[name]
+    cli.check_auth()
+    gc.collect()
+    before = rss()
+    issues = fetch()
+    gc.collect()
+    grown = rss() - before
+    size = deep_size(issues)
+    pickled = len(pickle.dumps(picklable(issues[0]), 2))
+    print '%-14s %10d %14.0f %14.0f %12d' % (name, len(issues), float(size) / count, float(grown) / count, pickled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--issues', type=int, default=20000, help='number of issues searched')
+    parser.add_argument('--payload', type=int, default=200, help='bytes of description padding per issue')
+    parser.add_argument('--components', type=int, default=2, help='components per issue')
+    parser.add_argument('--held', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.held:
+        # a measuring process, using the fake jira and the home of its parent
+        measure(args.held, args.issues)
+        return
+
+    server, base = fakejira.serve(fakejira.FakeJira(payload=args.payload))
+    components = [{'id': str(n), 'name': 'component %d' % n} for n in range(args.components)]
+    server.jira.add_issues('BP', args.issues, components=components)
+    home = fakejira.setup_home(base)
+    try:
+        print '%-14s %10s %14s %14s %12s' % ('held as', 'issues', 'object B/issue', 'rss B/issue', 'pickled B')
+        sys.stdout.flush()
+        for name in ['suds objects', 'records']:
+            subprocess.check_call([sys.executable, os.path.abspath(__file__), '--held', name, '--issues',
+                                   str(args.issues)], env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    finally:
+        server.shutdown()
+        shutil.rmtree(home)
+
+
+if __name__ == '__main__':
+    main()
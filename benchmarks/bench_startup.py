@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+startup benchmark: time `check_auth` with a cold and a warm wsdl cache against the local fake jira, and the import time
+and time to first output of jira-cli processes for --help, a local listing and a listing from jira.
+
+usage: python benchmarks/bench_startup.py [--latency SECONDS] [--runs N]
+'''
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import fakejira  # NOQA
+from jiracli import cli  # NOQA
+from jiracli import transport  # NOQA
+
+
+def timed_check_auth(server):
+    server.jira.reset_counts()
+    cli.CONFIG.clear()
+    cli.CONFIG['color'] = False
+    start = time.time()
+    cli.check_auth()
+    return time.time() - start, server.jira.wsdl_fetches, server.jira.total_calls
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def timed_process(code):
+    ''' run the python snippet `code` in a fresh interpreter, returns (seconds to the first output, total seconds) '''
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.time()
+    process = subprocess.Popen([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    process.stdout.read(1)
+    first = time.time() - start
+    process.communicate()
+    return first, time.time() - start
+
+
+def main_code(*argv):
+    return 'import sys; from jiracli import cli; sys.argv = %r; cli.main()' % (['jira-cli'] + list(argv))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated server latency per request')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs per scenario')
+    args = parser.parse_args()
+
+    server, base = fakejira.serve(fakejira.FakeJira(latency=args.latency))
+    home = fakejira.setup_home(base)
+    try:
+        results = {'cold': [], 'warm': []}
+        for _ in range(args.runs):
+            shutil.rmtree(os.path.expanduser('~/.jira-cli/wsdl'), ignore_errors=True)
+            results['cold'].append(timed_check_auth(server))
+            results['warm'].append(timed_check_auth(server))
+        print 'check_auth, server latency %.0fms, %d runs' % (args.latency * 1000, args.runs)
+        for name in ['cold', 'warm']:
+            runs = results[name]
+            print '%-5s: %8.1fms (min %.1fms), wsdl fetches %d, soap calls %d' % (name,
+                    1000 * sum(r[0] for r in runs) / len(runs), 1000 * min(r[0] for r in runs), runs[-1][1],
+                    runs[-1][2])
+
+        server.jira.add_issues('TP', 20)
+        fakejira.run(['sync', 'TP'])
+        processes = [
+            ('import jiracli.cli', 'import jiracli.cli; print'),
+            ('--help', main_code('--help')),
+            ('list --local', main_code('-o', 'list', '--local', '-j', 'project = TP')),
+            ('list -j', main_code('-o', 'list', '-j', 'project = TP')),
+        ]
+        print
+        print 'jira-cli processes, %d runs, time to first output / total' % args.runs
+        for name, code in processes:
+            runs = [timed_process(code) for _ in range(args.runs)]
+            print '%-18s: %8.1fms / %8.1fms (min %.1fms / %.1fms)' % (name, 1000 * sum(r[0] for r in runs) / len(runs),
+                    1000 * sum(r[1] for r in runs) / len(runs), 1000 * min(r[0] for r in runs),
+                    1000 * min(r[1] for r in runs))
+    finally:
+        transport.POOL.clear()
+        server.shutdown()
+        shutil.rmtree(home)
+
+
+if __name__ == '__main__':
+    main()
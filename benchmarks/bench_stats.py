@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmark of 'jira-cli stats': the aggregation alone over a large synthetic result set, and the whole command
+against the local fake jira compared to 'list -o' of the same issues.
+
+the aggregation is fed generated issues one by one, like the paged search does, so the peak memory reported after
+each size should not grow with the number of issues.
+
+usage: python benchmarks/bench_stats.py [--issues 1000000] [--by status,assignee] [--sizes 1000,20000]
+'''
+
+import os
+import sys
+import time
+import random
+import itertools
+import shutil
+import argparse
+import datetime
+import resource
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import fakejira  # NOQA
+from bench_commands import jira_cli  # NOQA
+from jiracli import cli  # NOQA
+from jiracli import stats  # NOQA
+from jiracli.mirror import Record  # NOQA
+
+
+def synthetic_issues(count, now):
+    ''' yield `count` issues with random status, priority, type, assignee, components and dates '''
+
+    rand = random.Random(42)
+    assignees = ['user%d' % n for n in range(50)] + [None]
+    components = [Record(id=str(n), name='component %d' % n) for n in range(20)]
+    for number in xrange(1, count + 1):
+        updated = now - datetime.timedelta(seconds=rand.randint(0, 365 * 86400))
+        yield Record(key='BP-%d' % number, project='BP', status=rand.choice('1346'), priority=rand.choice('12345'),
+                     type=rand.choice('1234'), assignee=rand.choice(assignees), reporter='reporter',
+                     components=rand.sample(components, rand.randint(0, 2)), updated=updated,
+                     created=updated - datetime.timedelta(seconds=rand.randint(0, 365 * 86400)))
+
+
+def bench_aggregation(count, by):
+    now = datetime.datetime.now()
+    fields = [cli.GROUP_FIELDS[field] for field in by]
+    aggregate = stats.Aggregate(lambda issue: itertools.product(*[f(issue) for f in fields]), now)
+    issues = synthetic_issues(count, now)
+    start = time.time()
+    for issue in issues:
+        aggregate.add(issue)
+    elapsed = time.time() - start
+    print '%10d %-24s %10.2f %12.0f %8d %10.1f' % (count, ','.join(by), elapsed, count / elapsed,
+                                                  len(aggregate.groups),
+                                                  resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--issues', type=int, default=1000000, help='synthetic issues to aggregate')
+    parser.add_argument('--by', default='status,assignee', help='fields to group by')
+    parser.add_argument('--sizes', default='1000,20000', help='issues in the fake jira for the whole command')
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated server latency per request')
+    args = parser.parse_args()
+
+    server, base = fakejira.serve()
+    home = fakejira.setup_home(base)
+    try:
+        # the metadata the group names are resolved with
+        cli.check_auth()
+        for kind in cli.METADATA_METHODS:
+            cli.get_metadata(kind)
+        print 'aggregation of synthetic issues (generating them is included in the time):'
+        print '%10s %-24s %10s %12s %8s %10s' % ('issues', 'by', 'seconds', 'issues/s', 'groups', 'peak MB')
+        for count in sorted(set([args.issues / 100, args.issues / 10, args.issues])):
+            bench_aggregation(count, args.by.split(','))
+            bench_aggregation(count, ['component'])
+    finally:
+        server.shutdown()
+        shutil.rmtree(home)
+
+    print
+    print 'whole command against the fake jira (latency %.0fms):' % (args.latency * 1000)
+    print '%8s %-12s %10s %10s' % ('issues', 'command', 'wall ms', 'peak MB')
+    for size in [int(s) for s in args.sizes.split(',')]:
+        server, base = fakejira.serve(fakejira.FakeJira(payload=500))
+        server.jira.add_issues('BP', size)
+        home = fakejira.setup_home(base)
+        try:
+            jira_cli(['cache', 'refresh'])
+            server.jira.latency = args.latency
+            for name, argv in [('list -o', ['-o', 'list', '-j', 'project = BP']),
+                               ('stats', ['stats', '-j', 'project = BP', '--by', args.by])]:
+                elapsed, maxrss = jira_cli(argv)
+                print '%8d %-12s %10.1f %10.1f' % (size, name, elapsed * 1000, maxrss / 1024.0)
+                sys.stdout.flush()
+        finally:
+            server.shutdown()
+            shutil.rmtree(home)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+transport benchmark: list issues with their comments through the plain suds http transport and through the pooled
+gzip transport, reporting wall time, tcp connections opened and bytes on the wire.
+
+usage: python benchmarks/bench_transport.py [--issues N] [--payload BYTES] [--latency SECONDS]
+                                           [--connect-latency SECONDS] [--workers N]
+'''
+
+import os
+import sys
+import time
+import shutil
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import fakejira  # NOQA
+from jiracli import cli  # NOQA
+from jiracli import transport  # NOQA
+from suds.transport.http import HttpAuthenticated  # NOQA
+
+
+class Urllib2Transport(transport.Transport):
+    ''' the plain suds transport, still releasing the suds lock while waiting for the server '''
+
+    def open(self, request):
+        return HttpAuthenticated.open(self, request)
+
+    def send(self, request):
+        return self._unlocked(HttpAuthenticated.send, self, request)
+
+
+def timed_list(server, base, args):
+    fakejira.setup_home(base)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+    transport.POOL.clear()
+    server.jira.reset_counts()
+    server.stats.update(connections=0, bytes_sent=0, bytes_received=0)
+    start = time.time()
+    fakejira.run(['--workers', str(args.workers), '-c', 'list', '-j', 'project = TP'])
+    return time.time() - start, server.jira.total_calls, dict(server.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--issues', type=int, default=200, help='number of issues to list')
+    parser.add_argument('--payload', type=int, default=4000, help='bytes of description padding per issue')
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated server latency per request')
+    parser.add_argument('--connect-latency', type=float, default=0.02, help='simulated handshake time per connection')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent soap calls')
+    args = parser.parse_args()
+
+    server, base = fakejira.serve(fakejira.FakeJira(latency=args.latency, payload=args.payload,
+                                                      connect_latency=args.connect_latency))
+    for issue in server.jira.add_issues('TP', args.issues):
+        server.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    homes = []
+    pooled = transport.Transport
+    try:
+        print 'list -c of %d issues (%d bytes padding), server latency %.0fms, connect %.0fms, %d workers' % (
+              args.issues, args.payload, args.latency * 1000, args.connect_latency * 1000, args.workers)
+        for name, transport_class in [('urllib2', Urllib2Transport), ('pooled', pooled)]:
+            transport.Transport = transport_class
+            elapsed, calls, stats = timed_list(server, base, args)
+            homes.append(os.environ['HOME'])
+            print '%-8s: %8.1fms, soap calls %d, connections %d, sent %d bytes, received %d bytes' % (name,
+                  elapsed * 1000, calls, stats['connections'], stats['bytes_received'], stats['bytes_sent'])
+    finally:
+        transport.Transport = pooled
+        transport.POOL.clear()
+        server.shutdown()
+        for home in homes:
+            shutil.rmtree(home)
+
+
+if __name__ == '__main__':
+    main()
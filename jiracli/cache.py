@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+on-disk cache of issues and their comments, evicting the least recently used entries beyond a size limit
+
+comments are only valid for the 'updated' timestamp of the issue they were cached with, see cli.get_issue and
+cli.get_comments for how entries are validated against jira.
+'''
+
+import time
+import pickle
+import threading
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, updated TEXT, issue BLOB, comments BLOB, size INTEGER,
+                                    used REAL);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+CREATE TABLE IF NOT EXISTS total (id INTEGER PRIMARY KEY, size INTEGER);
+CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries
+    BEGIN UPDATE total SET size = size + new.size WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS entries_dropped AFTER DELETE ON entries
+    BEGIN UPDATE total SET size = size - old.size WHERE id = 1; END;
+INSERT OR IGNORE INTO total SELECT 1, coalesce(sum(size), 0) FROM entries;
+'''
+
+
+def _updated(issue):
+    return str(getattr(issue, 'updated', None))
+
+
+class IssueCache(object):
+    ''' issues and comments in the sqlite database `path`, at most about `max_bytes` of them; safe to use from several
+    threads and processes '''
+
+    def __init__(self, path, max_bytes):
+        import sqlite3
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # the size of all entries is kept in `total` by triggers, replacing an entry has to fire the delete one too
+        self.db.execute('PRAGMA recursive_triggers = ON')
+        self.db.executescript(SCHEMA)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def _load(self, key):
+        row = self.db.execute('SELECT issue, comments FROM entries WHERE key = ?', (key, )).fetchone()
+        if row is None:
+            return None, None
+        self.db.execute('UPDATE entries SET used = ? WHERE key = ?', (time.time(), key))
+        return pickle.loads(str(row[0])), (pickle.loads(str(row[1])) if row[1] is not None else None)
+
+    def get(self, key):
+        ''' the cached issue `key`, or None '''
+
+        with self.lock:
+            return self._load(key)[0]
+
+    def get_comments(self, key, updated):
+        ''' the cached comments of issue `key`, if they were cached for the same `updated` timestamp; else None '''
+
+        with self.lock:
+            row = self.db.execute('SELECT comments FROM entries WHERE key = ? AND updated = ?',
+                                  (key, str(updated))).fetchone()
+            if row is None or row[0] is None:
+                return None
+            self.db.execute('UPDATE entries SET used = ? WHERE key = ?', (time.time(), key))
+            return pickle.loads(str(row[0]))
+
+    def put(self, issue, comments=None):
+        ''' cache the records (see records) of `issue` and, if given, its `comments`; comments cached before are kept
+        unless the issue changed '''
+
+        import sqlite3
+        data = pickle.dumps(issue, 2)
+        blob = pickle.dumps(comments, 2) if comments is not None else None
+        with self.lock:
+            if blob is None:
+                row = self.db.execute('SELECT comments FROM entries WHERE key = ? AND updated = ?',
+                                      (issue.key, _updated(issue))).fetchone()
+                blob = row and row[0] and str(row[0])
+            self.db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)', (issue.key, _updated(issue),
+                            sqlite3.Binary(data), blob and sqlite3.Binary(blob), len(data) + len(blob or ''),
+                            time.time()))
+            self._evict()
+
+    def _evict(self):
+        total = self.db.execute('SELECT size FROM total WHERE id = 1').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # drop the least recently used entries, down to 90% of the limit so not every put has to evict
+        dropped = 0
+        keys = []
+        for key, size in self.db.execute('SELECT key, size FROM entries ORDER BY used'):
+            if total - dropped <= self.max_bytes * 0.9:
+                break
+            keys.append(key)
+            dropped += size
+        self.db.executemany('DELETE FROM entries WHERE key = ?', [(key, ) for key in keys])
+
+    def discard(self, key):
+        with self.lock:
+            self.db.execute('DELETE FROM entries WHERE key = ?', (key, ))
+
+    def clear(self):
+        with self.lock:
+            self.db.execute('DELETE FROM entries')
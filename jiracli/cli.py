@@ -9,19 +9,149 @@ import tempfile
 import socket
 import json
 import sys
-import urllib2
+import time
+import datetime
+import shutil
+import hashlib
 import logging
-import ConfigParser
-from suds.client import Client
-from suds import WebFault
-from termcolor import colored as colorfunc
-
+import random
+import threading
+import shlex
+import csv
+import itertools
+from StringIO import StringIO
+from jiracli import daemon
+from jiracli.cache import IssueCache
+from jiracli import completion
+from jiracli import mirror
+from jiracli import records
+from jiracli import settings
+from jiracli import stats
+from jiracli import trace
+from jiracli import watch
+from jiracli.workers import parallel_map, paginate, Backoff, InFlight, Memo, RateLimiter, RecentCache, Throttle, \
+    DEFAULT_WORKERS
+
+# settings of the active profile read so far, or set for this process only
 CONFIG = {'color': True}
+# the parsed ~/.jira-cli/config, see get_config_file
+CONFIG_FILE = None
+# the active profile (None: the default one), see use_profile
+PROFILE = None
+# settings of a jira instance, the others are taken from [general] if a profile does not set them
+INSTANCE_SETTINGS = ['jirabase', 'user', 'password']
+CONFIG_DEFAULTS = {'wsdl_cache_days': '7', 'metadata_cache_days': '1', 'daemon_cache_seconds': '60',
+                   'issue_cache_mb': '50', 'retries': '4', 'request_timeout': '60', 'search_timeout': '300',
+                   'max_requests': '16'}
 JIRAOBJ = None
 TOKEN = None
+METADATA = {}
+METADATA_METHODS = {'types': 'getIssueTypes', 'statuses': 'getStatuses', 'priorities': 'getPriorities'}
+STATS = {'requests': 0, 'seconds': 0.0}
+# caps the requests on the wire at 'max_requests' and holds them back while jira throttles, set up by check_auth
+THROTTLE = None
+IN_FLIGHT = InFlight()
+# soap methods changing issues: only sent again if jira refused them (429, 503), never after a timeout
+WRITE_METHODS = frozenset(['createIssue', 'addComment', 'progressWorkflowAction'])
+# soap methods given 'search_timeout' instead of 'request_timeout'
+SEARCH_METHODS = frozenset(['getIssuesFromJqlSearch', 'getIssuesFromTextSearchWithLimit', 'getIssuesFromFilter'])
+# first and longest backoff between attempts (seconds); a longer Retry-After than RETRY_AFTER_LIMIT is not waited for
+RETRY_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+RETRY_AFTER_LIMIT = 300.0
+# attempts to enter a jira url or credentials before giving up
+AUTH_ATTEMPTS = 3
+LOCK = threading.Lock()
+THREAD_LOCAL = threading.local()
+# per-thread output settings of daemon requests, see use_color
+OUTPUT = threading.local()
+MAIN_THREAD = threading.current_thread()
+PAGE_SIZE = 100
+UNPAGED_LIMIT = 1000
+FORMATTERS = {}
+COMPONENTS = Memo()
+WORKFLOW_ACTIONS = Memo()
+FILTERS = Memo()
+# issues and comments fetched recently, only kept by 'jira-cli daemon'
+RECENT = None
+# on-disk cache of issues and comments, see get_issue_cache
+ISSUE_CACHE = None
+# how far back get_fresh_issue asks for updates, jira and this machine may be in time zones up to 26 hours apart
+PROBE_MARGIN = datetime.timedelta(hours=26)
+OUTPUT_FIELDS = ['key', 'status', 'priority', 'type', 'assignee', 'reporter', 'summary', 'updated']
+ISSUE_FIELDS = mirror.ISSUE_FIELDS + ['components', 'affectsVersions', 'fixVersions', 'link']
+# soap methods answering issues or comments, their answers are turned into compact records (see records)
+RECORDS = {
+    'getIssue': records.issue,
+    'createIssue': records.issue,
+    'progressWorkflowAction': records.issue,
+    'getIssuesFromJqlSearch': records.issues,
+    'getIssuesFromTextSearchWithLimit': records.issues,
+    'getIssuesFromFilter': records.issues,
+    'getComments': records.comments,
+}
+# soap methods answering names offered by shell completion, added to its index (see completion)
+COMPLETION_NAMES = {
+    'getIssue': lambda args, issue: completion.SEEN.add_issues([issue]),
+    'createIssue': lambda args, issue: completion.SEEN.add_issues([issue]),
+    'progressWorkflowAction': lambda args, issue: completion.SEEN.add_issues([issue]),
+    'getIssuesFromJqlSearch': lambda args, issues: completion.SEEN.add_issues(issues),
+    'getIssuesFromTextSearchWithLimit': lambda args, issues: completion.SEEN.add_issues(issues),
+    'getIssuesFromFilter': lambda args, issues: completion.SEEN.add_issues(issues),
+    'getComponents': lambda args, components: completion.SEEN.add('component', [c.name for c in components], args[0]),
+    'getFavouriteFilters': lambda args, filters: completion.SEEN.add('filter', [f.name for f in filters]),
+    'getAvailableActions': lambda args, actions: completion.SEEN.add('action', [a.name for a in actions]),
+}
+# what 'stats --by' groups issues by: the names an issue is counted under
+GROUP_FIELDS = {
+    'project': lambda issue: [issue.project],
+    'status': lambda issue: [get_metadata_name('statuses', issue.status)],
+    'priority': lambda issue: [get_metadata_name('priorities', issue.priority)],
+    'type': lambda issue: [get_metadata_name('types', issue.type)],
+    'assignee': lambda issue: [issue.assignee or 'unassigned'],
+    'reporter': lambda issue: [issue.reporter],
+    'component': lambda issue: [c.name for c in (issue.components or [])] or ['none'],
+}
+FORMAT_TOKEN = re.compile(r'\$\$|\$\{(?P<name>\w+)(?::(?P<align>[<>])?(?P<width>\d+))?\}|\$(?P<bare>\w+)')
+
+
+class _NotImported(Exception):
+    ''' stands in for the suds exceptions until suds is imported, nothing raises it before '''
+
+
+# suds takes longer to import than the rest of jira-cli together, it is imported by get_client() when a command first
+# talks to jira. --help, argument errors and local commands never load it.
+WebFault = TransportError = _NotImported
+transport = None
+
+
+def import_suds():
+    ''' import suds and jiracli.transport (which depends on it), binding the names used by this module '''
+
+    global WebFault, TransportError, transport
+
+    from suds import WebFault
+    from suds.transport import TransportError
+    from jiracli import transport
+
+
+def use_color():
+    ''' whether output is coloured: if stdout is a terminal, or for a daemon request if the client's is (see
+    run_in_daemon) '''
+
+    return getattr(OUTPUT, 'color', CONFIG['color'])
+
+
+def colorfunc(text, *args, **kwargs):
+    ''' termcolor.colored, imported on first use; `text` as it is if output is not coloured '''
+
+    if not use_color():
+        return str(text)
+    from termcolor import colored
+    return colored(text, *args, **kwargs)
+
 
 if not sys.stdout.isatty():
-    colorfunc = lambda *a, **k: str(a[0])  # NOQA  # silence pyflakes
     CONFIG['color'] = False
 DEFAULT_EDITOR_TEXT = '''-- enter the text for the %s
 -- all lines starting with '--' will be removed'''
@@ -40,170 +170,393 @@ def get_text_from_editor(def_text):
     return '\n'.join([k for k in open(tmp).read().split('\n') if not k.startswith('--')])
 
 
-def get_issue_type(issuetype):
-    ''' get either all available issue types if no `issuetype` given, or issue type id found by name'''
+@trace.traced('get_metadata')
+def get_metadata(kind, refresh=False):
+    ''' get the index of issue `kind` ('types', 'statuses' or 'priorities'), loaded once per process
 
-    issue_types_file = os.path.expanduser('~/.jira-cli/types.json')
+    the index holds the list of 'items' and dicts 'by_id' and 'by_name' (lowercase name). it is kept in
+    <kind>.json of the profile and fetched from the server again once older than 'metadata_cache_days'.'''
 
-    if os.path.isfile(issue_types_file):
-        with open(issue_types_file, 'rb') as fh:
-            issue_types = json.load(fh)
+    if kind in METADATA and not refresh:
+        return METADATA[kind]
+
+    metadata_file = settings.path('%s.json' % kind, PROFILE)
+    max_age = float(config('metadata_cache_days')) * 24 * 60 * 60
+
+    if not refresh and os.path.isfile(metadata_file) and time.time() - os.path.getmtime(metadata_file) < max_age:
+        with open(metadata_file, 'rb') as fh:
+            items = json.load(fh)
     else:
-        issue_types = JIRAOBJ.service.getIssueTypes(TOKEN)
-        issue_types = map(lambda x: dict(x), issue_types)
-        with open(issue_types_file, 'wb') as fh:
-            json.dump(issue_types, fh)
+        items = map(lambda x: dict(x), soap_call(METADATA_METHODS[kind]))
+        with open(metadata_file, 'wb') as fh:
+            json.dump(items, fh)
+
+    METADATA[kind] = {
+        'items': items,
+        'by_id': dict((item['id'], item) for item in items),
+        'by_name': dict((item['name'].lower(), item) for item in items),
+    }
+    return METADATA[kind]
+
+
+def get_metadata_name(kind, item_id):
+    ''' get the name of the type, status or priority with id `item_id`, or an empty string if unknown '''
+
+    return get_metadata(kind)['by_id'].get(item_id, {}).get('name', '')
+
+
+def get_issue_type(issuetype):
+    ''' get either all available issue types if no `issuetype` given, or issue type id found by name'''
 
+    issue_types = get_metadata('types')
     if not issuetype:
-        return issue_types
-    else:
-        issuetype = issuetype.lower()
-        for it in issue_types:
-            if it['name'].lower() == issuetype:
-                return it['id']
+        return issue_types['items']
+    return issue_types['by_name'].get(issuetype.lower(), {}).get('id')
 
 
 def get_issue_status(status):
     ''' get either all available statuses if no `stat` given, or status name found by id'''
 
-    issue_statuses_file = os.path.expanduser('~/.jira-cli/statuses.json')
-
-    if os.path.isfile(issue_statuses_file):
-        with open(issue_statuses_file, 'rb') as fh:
-            issue_statuses = json.load(fh)
-    else:
-        issue_statuses = JIRAOBJ.service.getStatuses(TOKEN)
-        issue_statuses = map(lambda x: dict(x), issue_statuses)
-        with open(issue_statuses_file, 'wb') as fh:
-            json.dump(issue_statuses, fh)
-
+    issue_statuses = get_metadata('statuses')
     if not status:
-        return issue_statuses
-    else:
-        status = status.lower()
-        for st in issue_statuses:
-            if st['id'].lower() == status:
-                return st['name']
+        return issue_statuses['items']
+    return issue_statuses['by_id'].get(status.lower(), {}).get('name')
 
 
 def get_issue_priority(priority):
     ''' get either all available priorities if no `priority` given, or priority id found by name'''
 
-    issue_priorities_file = os.path.expanduser('~/.jira-cli/priorities.json')
+    issue_priorities = get_metadata('priorities')
+    if not priority:
+        return issue_priorities['items']
+    return issue_priorities['by_name'].get(priority.lower(), {}).get('id')
 
-    if os.path.isfile(issue_priorities_file) and os.stat(issue_priorities_file)[6] < 0:
-        with open(issue_priorities_file, 'rb') as fh:
-            issue_priorities = json.load(fh)
-    else:
-        issue_priorities = JIRAOBJ.service.getPriorities(TOKEN)
-        issue_priorities = map(lambda x: dict(x), issue_priorities)
-        with open(issue_priorities_file, 'wb') as fh:
-            json.dump(issue_priorities, fh)
 
-    if not priority:
-        return issue_priorities
-    else:
-        priority = priority.lower()
-        for ip in issue_priorities:
-            if ip['name'].lower() == priority:
-                return ip['id']
+@trace.traced('get_client')
+def get_client(jirabase):
+    ''' create the soap client for `jirabase`, reusing the parsed wsdl cached in ~/.jira-cli/wsdl '''
 
+    # the whole service description is pickled (cachingpolicy=1), so a warm start neither downloads nor parses the
+    # wsdl and its schemas. entries expire after 'wsdl_cache_days', one cache directory per jira instance.
+    import_suds()
+    from suds.client import Client
+    from suds.cache import ObjectCache
 
-def check_auth():
-    ''' check credentials against jira instance and authenticate '''
+    location = os.path.join(os.path.expanduser('~/.jira-cli/wsdl'), hashlib.md5(jirabase).hexdigest())
+    cache = ObjectCache(location=location, days=int(config('wsdl_cache_days')))
+    return with_retries('wsdl', lambda: Client('%s/rpc/soap/jirasoapservice-v2?wsdl' % jirabase, cache=cache,
+                        cachingpolicy=1, transport=transport.Transport()))
 
-    global JIRAOBJ, TOKEN
 
-    def _validate_login(token=None):
-        if token:
-            try:
-                JIRAOBJ.service.getPriorities(token)
-                return token
-            except WebFault:
-                return _validate_login()
+@trace.traced('login')
+def login():
+    ''' log in with the configured credentials, store and return the new token; asks for other credentials if jira
+    rejects them, up to AUTH_ATTEMPTS times '''
 
+    for _ in range(AUTH_ATTEMPTS):
         try:
-            token = JIRAOBJ.service.login(config('user'), config('password'))
-            open(os.path.expanduser('~/.jira-cli/token'), 'w').write(token)
+            token = send('login', config('user'), config('password'))
+            open(settings.path('token', PROFILE), 'w').write(token)
             return token
         except WebFault:
             print colorfunc('username or password incorrect, try again.', 'red')
             config('user', unset=True)
             config('password', unset=True)
-            return _validate_login()
+    sys.exit('failed to log in to jira, check the user and password and try again')
 
-    def _validate_jira_url():
-        jirabase = config('jirabase')
 
+def is_auth_fault(ex):
+    ''' whether the WebFault `ex` was raised because the token is invalid or expired '''
+
+    return 'RemoteAuthenticationException' in str(ex)
+
+
+def get_service():
+    ''' get the soap service proxy for the current thread
+
+    suds clients are not thread-safe, so every worker thread gets its own clone of JIRAOBJ sharing the parsed wsdl;
+    soap_call serialises the work on that shared wsdl, see jiracli.transport.'''
+
+    if threading.current_thread() is MAIN_THREAD:
+        return JIRAOBJ.service
+    if getattr(THREAD_LOCAL, 'origin', None) is not JIRAOBJ:
+        THREAD_LOCAL.client = JIRAOBJ.clone()
+        THREAD_LOCAL.origin = JIRAOBJ
+    return THREAD_LOCAL.client.service
+
+
+def convert_answer(method, args, result):
+    ''' the answer `result` of the soap `method` called with `args`, issues and comments turned into records '''
+
+    result = RECORDS.get(method, lambda result: result)(result)
+    if method in COMPLETION_NAMES:
+        COMPLETION_NAMES[method](args, result)
+    return result
+
+
+def retry_delay(method, ex, attempt):
+    ''' seconds to wait before sending the soap `method` again after attempt number `attempt` (from 0) failed with
+    `ex`, None if it is not worth another try
+
+    requests jira did not answer because it is overloaded or throttling (see transport.RETRY_STATUSES) are tried
+    again after the Retry-After jira sent or a jittered exponential backoff, read-only ones also after timeouts and
+    lost connections. changes are only sent again if jira refused them, so they are never made twice.'''
+
+    if attempt >= int(config('retries')):
+        return None
+    if isinstance(ex, transport.NETWORK_ERRORS):
+        if method in WRITE_METHODS or not transport.lost_connection(ex):
+            return None
+    else:
+        status, headers = transport.last_failure()
+        if status not in ((429, 503) if method in WRITE_METHODS else transport.RETRY_STATUSES):
+            return None
+        wait = transport.retry_after(headers)
+        if wait is not None:
+            return wait if wait <= RETRY_AFTER_LIMIT else None
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** attempt))
+
+
+def with_retries(method, func, call=None):
+    ''' func(), sending the soap `method`, called again as long as retry_delay allows; retries are counted in the
+    trace span `call` '''
+
+    attempt = 0
+    while True:
         try:
-            urllib2.urlopen('%s/rpc/soap/jirasoapservice-v2?wsdl' % jirabase)
-            return Client('%s/rpc/soap/jirasoapservice-v2?wsdl' % jirabase)
-        except (socket.gaierror, IOError):
-            print colorfunc('invalid url %s. Please provide the correct url for your jira instance' % jirabase, 'red')
-            config('jirabase', unset=True)
-            return _validate_jira_url()
+            return func()
+        except WebFault:
+            raise
         except Exception, ex:
-            raise ex
+            delay = retry_delay(method, ex, attempt)
+            if delay is None:
+                raise
+        attempt += 1
+        if call is not None:
+            call.args['retries'] = call.args.get('retries', 0) + 1
+        if transport.last_failure()[0] in (429, 503) and THROTTLE is not None:
+            # jira is throttling or overloaded: every thread waits, not only this one
+            THROTTLE.pause(delay)
+        logging.warning('%s failed (%s), trying again in %.1fs' % (method, str(ex).replace('\n', ' ') or
+                        ex.__class__.__name__, delay))
+        time.sleep(delay)
+
+
+def send(method, *args, **options):
+    ''' send the soap `method` with `args` (the token included), within THROTTLE and the timeout of the method,
+    retrying transient failures (see retry_delay) '''
+
+    timeout = float(config('search_timeout' if method in SEARCH_METHODS else 'request_timeout'))
+
+    def _send():
+        with THROTTLE:
+            return transport.call(getattr(get_service(), method), *args, timeout=timeout,
+                                  resend=method not in WRITE_METHODS)
+
+    return with_retries(method, _send, options.get('call'))
+
+
+def soap_call(method, *args):
+    ''' call the soap `method` with the current token, logging in again once if the token was rejected
+
+    concurrent calls of a read-only method with the same arguments, e.g. the comments of one issue asked for by two
+    threads, send one request and share its answer.'''
+
+    if JIRAOBJ is None:
+        # commands declared without a session (see needs_session) log in on their first call
+        with LOCK:
+            if JIRAOBJ is None:
+                check_auth()
+    if method in WRITE_METHODS:
+        return _soap_call(method, args)
+    try:
+        key = (method, ) + args
+        hash(key)
+    except TypeError:
+        return _soap_call(method, args)
+    return IN_FLIGHT.run(key, _soap_call, method, args)
+
 
+def _soap_call(method, args):
+    global TOKEN
+
+    token = TOKEN
+    start = time.time()
+    sent, received = transport.thread_bytes()
+    with trace.span(method, 'soap') as call:
+        try:
+            return convert_answer(method, args, send(method, token, *args, call=call))
+        except WebFault, ex:
+            if not is_auth_fault(ex):
+                raise
+            logging.debug('token rejected by %s, logging in again' % method)
+            call.args['retries'] = call.args.get('retries', 0) + 1
+            with LOCK:
+                # another thread may have logged in already
+                if TOKEN == token:
+                    TOKEN = login()
+            return convert_answer(method, args, send(method, TOKEN, *args, call=call))
+        finally:
+            with LOCK:
+                STATS['requests'] += 1
+                STATS['seconds'] += time.time() - start
+            call.args['sent'] = transport.thread_bytes()[0] - sent
+            call.args['received'] = transport.thread_bytes()[1] - received
+
+
+@trace.traced('check_auth')
+def check_auth():
+    ''' set up the jira client and token; a cached token is used as is and only replaced once a call rejects it '''
+
+    global JIRAOBJ, TOKEN, THROTTLE
+
+    def _validate_jira_url():
+        for _ in range(AUTH_ATTEMPTS):
+            jirabase = config('jirabase')
+            try:
+                return get_client(jirabase)
+            except (socket.gaierror, IOError, TransportError):
+                # transient failures were retried by get_client already
+                print colorfunc('invalid url %s. Please provide the correct url for your jira instance' % jirabase,
+                                'red')
+                config('jirabase', unset=True)
+        sys.exit('could not reach jira, check the url and try again')
+
+    THROTTLE = THROTTLE or Throttle(int(config('max_requests')))
     JIRAOBJ = _validate_jira_url()
     logging.debug(JIRAOBJ)
 
-    if os.path.isfile(os.path.expanduser('~/.jira-cli/token')):
-        TOKEN = open(os.path.expanduser('~/.jira-cli/token')).read().strip()
-    TOKEN = _validate_login(TOKEN)
+    token_file = settings.path('token', PROFILE)
+    if os.path.isfile(token_file):
+        TOKEN = open(token_file).read().strip()
+    if not TOKEN:
+        TOKEN = login()
     logging.debug(TOKEN)
 
 
+def get_config_file():
+    ''' the parsed ~/.jira-cli/config, read once per process (and again only if $HOME changed) '''
+
+    global CONFIG_FILE
+
+    path = os.path.join(os.path.expanduser(settings.HOME), 'config')
+    if CONFIG_FILE is None or CONFIG_FILE.path != path:
+        CONFIG_FILE = settings.ConfigFile(path)
+        if not CONFIG_FILE.exists:
+            print 'no config file found, generating it'
+    return CONFIG_FILE
+
+
+def use_profile(profile):
+    ''' make `profile` (None: the default one) the active profile, whose settings, token and caches are used '''
+
+    global PROFILE
+
+    if profile != PROFILE:
+        PROFILE = profile
+        for key in [k for k in CONFIG if k != 'color']:
+            del CONFIG[key]
+
+
 def config(key, unset=False):
-    '''reading / generating config file or updating it, and returning val if key is given'''
+    '''reading / generating config file or updating it, and returning val if key is given
 
-    config_file = os.path.expanduser('~/.jira-cli/config')
-    parser = ConfigParser.ConfigParser()
+    values come from the section of the active profile in ~/.jira-cli/config (a profile falls back to [general] for
+    anything but INSTANCE_SETTINGS) or CONFIG_DEFAULTS, missing connection details are asked for and saved. the file is
+    read once and written only when a value changes.'''
 
-    if os.path.isfile(config_file):
-        parser.read(config_file)
-    else:
-        print 'no config file found, generating it'
-        if not os.path.isdir(os.path.expanduser('~/.jira-cli')):
-            os.makedirs(os.path.expanduser('~/.jira-cli'))
+    if key in CONFIG and not unset:
+        return CONFIG[key]
 
-    parser.has_section('general') or parser.add_section('general')
+    config_file = get_config_file()
+    section = settings.section(PROFILE)
 
     if unset:
-        del CONFIG[key]
-        parser.remove_option('general', key)
+        CONFIG.pop(key, None)
+        config_file.remove(section, key)
 
-    if CONFIG.has_key(key):
-        logging.debug('retrieving key "%s" from config' % key)
-        return CONFIG.get(key)
-    elif parser.has_option('general', key):
+    value = config_file.get(section, key)
+    if value is None and PROFILE and key not in INSTANCE_SETTINGS:
+        value = config_file.get(settings.section(), key)
+    if value is not None:
         logging.debug('retrieving key "%s" from file' % key)
-        CONFIG[key] = parser.get('general', key)
-        return parser.get('general', key)
+        CONFIG[key] = value
+        return value
+    elif key in CONFIG_DEFAULTS:
+        CONFIG[key] = CONFIG_DEFAULTS[key]
+        return CONFIG[key]
     elif key == 'jirabase':
-        jirabase = raw_input('base url for your jira instance (e.g http://issues.apache.org/jira):')
-        CONFIG['jirabase'] = jirabase
-        parser.set('general', 'jirabase', jirabase)
+        value = raw_input('base url for your jira instance%s (e.g http://issues.apache.org/jira):' % (
+                          ' of profile %s' % PROFILE if PROFILE else ''))
     elif key == 'user':
-        user = raw_input('enter username:')
-        CONFIG['user'] = user
-        parser.set('general', 'user', user)
+        value = raw_input('enter username:')
     elif key == 'password':
-        password = getpass.getpass('enter password:')
-        CONFIG['password'] = password
-        parser.set('general', 'password', password)
+        value = getpass.getpass('enter password:')
+    else:
+        raise KeyError(key)
+
+    CONFIG[key] = value
+    config_file.set(section, key, value)
+    return value
+
+
+def compile_format(formatter):
+    ''' compile the custom output format `formatter` into a function rendering an issue
+
+    tokens are $field or ${field}, ${field:20} / ${field:>20} pad the value left / right aligned to 20 characters and
+    $$ is a literal $. the compiled function is cached, so a format is parsed only once per run.'''
+
+    if isinstance(formatter, unicode):
+        formatter = formatter.encode('utf-8')
+    if formatter in FORMATTERS:
+        return FORMATTERS[formatter]
+
+    special_fields = {'status': 'statuses', 'priority': 'priorities', 'type': 'types'}
+
+    def _text(value):
+        return value.encode('utf-8') if isinstance(value, unicode) else str(value)
+
+    def _field(name):
+        if name.lower() in special_fields:
+            by_id = get_metadata(special_fields[name.lower()])['by_id']
+            names = dict((k, _text(v['name'])) for (k, v) in by_id.items())
+            name = name.lower()
+            return lambda issue: names.get(getattr(issue, name), '')
+        return lambda issue: _text(getattr(issue, name))
+
+    # the format becomes a %-template, padding included, filled by one getter per token
+    template = []
+    getters = []
+    pos = 0
+    for match in FORMAT_TOKEN.finditer(formatter):
+        template.append(formatter[pos:match.start()].replace('%', '%%'))
+        pos = match.end()
+        if match.group(0) == '$$':
+            template.append('$')
+        else:
+            width = match.group('width') or ''
+            template.append('%' + ('-' if width and match.group('align') != '>' else '') + width + 's')
+            getters.append(_field(match.group('name') or match.group('bare')))
+    template.append(formatter[pos:].replace('%', '%%'))
+    template = ''.join(template)
+
+    def render(issue):
+        return template % tuple([get(issue) for get in getters])
 
-    with open(config_file, 'wb') as fh:
-        parser.write(fh)
-    return CONFIG[key]
+    FORMATTERS[formatter] = render
+    return render
 
 
-def format_issue(issue, mode=0, formatter=None, comments_only=False):
-    ''' formatting output for a issue according the different modes '''
+@trace.traced('format_issue')
+def format_issue(issue, mode=0, formatter=None, comments_only=False, comments=None):
+    ''' formatting output for a issue according the different modes, `comments` may be passed in if prefetched '''
 
     # @TODO rework 'mode' to use args too
     # @TODO better formatting for "multiline" fields
 
+    if formatter:
+        return compile_format(formatter)(issue)
+
     fields = {}
     status_string = get_issue_status(issue.status).lower()
     status_color = 'blue'
@@ -212,26 +565,6 @@ def format_issue(issue, mode=0, formatter=None, comments_only=False):
     elif status_string in ['open', 'unassigned', 'reopened']:
         status_color = 'red'
 
-    special_fields = {'status': get_issue_status, 'priority': get_issue_priority, 'type': get_issue_type}
-
-    if formatter:
-        groups = re.compile('(\$([\w]+))').findall(formatter)
-        ret_str = formatter
-        for key, value in groups:
-
-            if value.lower() in special_fields.keys():
-                issue_id = issue[value.lower()]
-                meth = special_fields[value.lower()]
-                mappings = meth(None)
-                data = ''
-                for item in mappings:
-                    if item['id'] == issue_id:
-                        data = item['name']
-                ret_str = ret_str.replace(key, data)
-            else:
-                ret_str = ret_str.replace(key, str(getattr(issue, value)))
-        return ret_str
-
     if mode >= 0:
         fields['issue'] = issue['key']
         fields['status'] = colorfunc(get_issue_status(issue['status']), status_color)
@@ -241,10 +574,11 @@ def format_issue(issue, mode=0, formatter=None, comments_only=False):
         fields['link'] = colorfunc('%s/browse/%s' % (config('jirabase'), issue['key']), 'white', attrs=['underline'])
     if mode >= 1 or comments_only:
         fields['description'] = issue.description.strip()
-        fields['priority'] = get_issue_priority(issue.priority)
-        fields['type'] = get_issue_type(issue.type)
+        fields['priority'] = get_metadata_name('priorities', issue.priority)
+        fields['type'] = get_metadata_name('types', issue.type)
         fields['components'] = ', '.join([component.name for component in issue.components])
-        comments = get_comments(issue['key'])
+        if comments is None:
+            comments = get_comments(issue['key'])
         fields['comments'] = ''
         for comment in comments:
             comment_body = comment['body'].strip()
@@ -254,7 +588,7 @@ def format_issue(issue, mode=0, formatter=None, comments_only=False):
         return fields['comments'].strip()
     elif mode < 0:
         url_str = colorfunc('%s/browse/%s' % (config('jirabase'), issue['key']), 'white', attrs=['underline'])
-        if CONFIG['color']:
+        if use_color():
             ret_str = colorfunc(issue['key'], status_color)
         else:
             ret_str = issue['key'] + ' [%s] ' % get_issue_status(issue['status'])
@@ -266,9 +600,69 @@ def format_issue(issue, mode=0, formatter=None, comments_only=False):
     return '\n'.join(': '.join((k.ljust(20), v.encode('utf-8'))) for (k, v) in fields.items()) + '\n'
 
 
+def compile_record(fields, flat=False):
+    ''' compile a function returning the values of `fields` of an issue, for the machine readable output modes
+
+    status, priority and type are resolved to their names, dates become 'YYYY-MM-DD HH:MM:SS' and components or
+    versions lists of names, joined by ', ' if `flat` is set. unicode values are left alone unless `flat` is set, then
+    they are utf-8 encoded.'''
+
+    unknown = [f for f in fields if f not in ISSUE_FIELDS]
+    if unknown:
+        raise ValueError('unknown issue field(s) %s, choose from %s' % (', '.join(unknown), ', '.join(ISSUE_FIELDS)))
+
+    special_fields = {'status': 'statuses', 'priority': 'priorities', 'type': 'types'}
+    encode = (lambda value: value.encode('utf-8')) if flat else (lambda value: value)
+
+    def _field(name):
+        if name in special_fields:
+            names = dict((k, encode(v['name'])) for (k, v) in get_metadata(special_fields[name])['by_id'].items())
+            return lambda issue: names.get(getattr(issue, name, None))
+        if name == 'link':
+            link = encode(config('jirabase') + '/browse/')
+            return lambda issue: link + issue['key']
+        if name in ('components', 'affectsVersions', 'fixVersions'):
+            if flat:
+                return lambda issue: ', '.join([encode(i.name) for i in getattr(issue, name, None) or []])
+            return lambda issue: [i.name for i in getattr(issue, name, None) or []]
+
+        def _value(issue):
+            value = getattr(issue, name, None)
+            if isinstance(value, unicode):
+                return encode(value)
+            if isinstance(value, datetime.datetime):
+                return value.strftime('%Y-%m-%d %H:%M:%S')
+            return value
+
+        return _value
+
+    getters = [_field(name) for name in fields]
+    return lambda issue: [get(issue) for get in getters]
+
+
+@trace.traced('write_issues')
+def write_issues(issues, output, fields, stream=None):
+    ''' write `issues` to `stream` (default: stdout) as one JSON object or CSV / TSV row (after a header) per issue '''
+
+    stream = stream or sys.stdout
+    record = compile_record(fields, flat=output != 'jsonl')
+    if output == 'jsonl':
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        for issue in issues:
+            stream.write(dumps(dict(zip(fields, record(issue)))) + '\n')
+        return
+    writer = csv.writer(stream, dialect='excel-tab' if output == 'tsv' else 'excel', lineterminator='\n')
+    writer.writerow(fields)
+    for issue in issues:
+        writer.writerow([('' if value is None else value) for value in record(issue)])
+
+
 def add_comment(jira_id, comment):
     try:
-        JIRAOBJ.service.addComment(TOKEN, jira_id, {'body': comment})
+        soap_call('addComment', jira_id, {'body': comment})
+        forget_issue(jira_id)
+        if RECENT is not None:
+            RECENT.discard(('comments', jira_id.upper()))
         return 'comment "%s" added to %s' % (comment, jira_id)
     except WebFault, ex:
         error_msg = str(ex).replace('\n', ' ')
@@ -280,7 +674,7 @@ def create_issue(project, issue_type=0, summary='', description='', priority='Ma
 
     remote_components = []
     if components and isinstance(components, list):
-        for remote_component in get_components(project):
+        for remote_component in get_project_components(project):
             for component in components:
                 if component in [remote_component.id, remote_component.name]:
                     remote_components.append(remote_component)
@@ -292,66 +686,293 @@ def create_issue(project, issue_type=0, summary='', description='', priority='Ma
         'priority': get_issue_priority(priority),
         'components': remote_components,
     }
-    return JIRAOBJ.service.createIssue(TOKEN, issue)
+    issue = soap_call('createIssue', issue)
+    forget_issue(issue.key)
+    return issue
 
 
 def progress(issue_id, action):
     '''perform transition action on issue '''
 
-    return JIRAOBJ.service.progressWorkflowAction(TOKEN, issue_id, action.id)
+    issue = soap_call('progressWorkflowAction', issue_id, action.id)
+    forget_issue(issue.key)
+    if RECENT is not None:
+        RECENT.put(('issue', issue.key), issue)
+    return issue
 
 
 # --- simple "getter" functions ---
 
-def search_issues(criteria, limit=100):
-    return JIRAOBJ.service.getIssuesFromTextSearchWithLimit(TOKEN, criteria, 0, limit)
+def search_issues(criteria, limit=None, page_size=PAGE_SIZE):
+    ''' yield the issues found by a text search, page by page '''
 
+    @trace.traced('search page')
+    def _fetch_page(offset):
+        issues = soap_call('getIssuesFromTextSearchWithLimit', criteria, offset or 0, page_size)
+        return issues, ((offset or 0) + len(issues) if len(issues) == page_size else None)
+
+    return paginate(_fetch_page, limit=limit)
+
+
+def search_issues_jql(query, limit=None, page_size=PAGE_SIZE):
+    ''' yield the issues found by a JQL query, page by page
+
+    the SOAP api has no offset for JQL searches, so pages are fetched by issue id: "(query) AND id > last ORDER BY id".
+    queries with an ORDER BY clause of their own are fetched in a single request of at most `limit` issues.'''
+
+    def _search(jql, count):
+        try:
+            return soap_call('getIssuesFromJqlSearch', jql, count)
+        except WebFault, ex:
+            error_msg = str(ex).replace('\n', ' ')
+            sys.exit('failed to get issues by %s: %s' % (query, error_msg))
+
+    if re.search(r'\border\s+by\b', query, re.I):
+        count = limit or UNPAGED_LIMIT
+        issues = _search(query, count)
+        if len(issues) == count:
+            logging.warning('only the first %d issues are listed, use --limit for more or drop ORDER BY to page '
+                            'through all of them' % count)
+        return iter(issues)
+
+    @trace.traced('search page')
+    def _fetch_page(last_id):
+        jql = '(%s) AND id > %s ORDER BY id ASC' % (query, last_id) if last_id else '(%s) ORDER BY id ASC' % query
+        issues = _search(jql, page_size)
+        return issues, (issues[-1].id if len(issues) == page_size else None)
+
+    return paginate(_fetch_page, limit=limit)
+
+
+def get_issue_cache():
+    ''' the on-disk cache of issues and comments, opened on first use; None if 'issue_cache_mb' is 0 (--no-cache) '''
+
+    global ISSUE_CACHE
+
+    with LOCK:
+        if ISSUE_CACHE is None:
+            max_bytes = int(float(config('issue_cache_mb')) * 1024 * 1024)
+            ISSUE_CACHE = max_bytes and IssueCache(settings.path('issues.db', PROFILE), max_bytes)
+    return ISSUE_CACHE or None
+
+
+def forget_issue(jira_id):
+    ''' drop the cached issue `jira_id` and its comments, after changing it '''
+
+    cache = get_issue_cache()
+    if cache:
+        cache.discard(jira_id.upper())
+    if RECENT is not None:
+        RECENT.discard(('issue', jira_id.upper()))
 
-def search_issues_jql(query, limit=100):
-    try:
-        return JIRAOBJ.service.getIssuesFromJqlSearch(TOKEN, query, limit)
-    except WebFault, ex:
-        error_msg = str(ex).replace('\n', ' ')
-        sys.exit('failed to get issues by %s: %s' % (query, error_msg))
+
+def get_fresh_issue(cached):
+    ''' the `cached` issue if it was not updated since, else the issue as it is now
+
+    the probe "key = X AND updated > T" is answered by an empty list if nothing changed. suds gives 'updated' in local
+    time while jira reads T in the time zone of the user, so T is moved back by PROBE_MARGIN, more than any two zones
+    are apart: the probe may then return the unchanged issue, its 'updated' tells it is unchanged.'''
+
+    if not cached.updated:
+        return soap_call('getIssue', cached.key)
+    found = soap_call('getIssuesFromJqlSearch', 'key = %s AND updated > "%s"' % (cached.key,
+                      (cached.updated - PROBE_MARGIN).strftime('%Y/%m/%d %H:%M')), 1)
+    return found[0] if found and found[0].updated != cached.updated else cached
 
 
 def get_issue(jira_id):
+    if RECENT is not None:
+        issue = RECENT.get(('issue', jira_id.upper()))
+        if issue is not None:
+            return issue
+    cache = get_issue_cache()
     try:
-        return JIRAOBJ.service.getIssue(TOKEN, jira_id)
+        cached = cache.get(jira_id.upper()) if cache else None
+        if cached is not None:
+            issue = get_fresh_issue(cached)
+            if issue is not cached:
+                cache.put(issue)
+        else:
+            issue = soap_call('getIssue', jira_id)
+            if cache:
+                cache.put(issue)
+        if RECENT is not None:
+            RECENT.put(('issue', jira_id.upper()), issue)
+        return issue
     except WebFault, ex:
         error_msg = str(ex).replace('\n', ' ')
         sys.exit('failed to get issue %s: %s' % (jira_id, error_msg))
 
 
 def get_filter_by_name(name):
-    return next((x for x in get_filters() if x.name.lower() == name.lower()), None)
+    ''' the favourite filter called `name` (ignoring case) or with the id `name`, None if there is none '''
+
+    index = FILTERS.get('index', _index_filters)
+    return index.get(name.lower(), index.get(name))
+
+
+def _index_filters():
+    index = {}
+    for filt in get_filters():
+        index[filt.id] = filt
+        index.setdefault(filt.name.lower(), filt)
+    return index
 
 
 def get_issues_by_filter(filter):
-    return JIRAOBJ.service.getIssuesFromFilter(TOKEN, filter.id)
+    return soap_call('getIssuesFromFilter', filter.id)
 
 
 def get_filters():
-    return JIRAOBJ.service.getFavouriteFilters(TOKEN)
+    return FILTERS.get('favourites', soap_call, 'getFavouriteFilters')
+
+
+def get_issues_by_filters(filters, combine=None, workers=DEFAULT_WORKERS, page_size=PAGE_SIZE):
+    ''' yield the issues of all `filters`, each issue once
+
+    by default the filters run concurrently and their issues are yielded filter by filter. combine 'union' or
+    'intersect' runs a single JQL search "filter = A OR (AND) filter = B" instead, paged by issue id.'''
+
+    if combine:
+        joiner = ' OR ' if combine == 'union' else ' AND '
+        for issue in search_issues_jql(joiner.join('filter = %s' % filt.id for filt in filters), page_size=page_size):
+            yield issue
+        return
+    seen = set()
+    for issues in parallel_map(get_issues_by_filter, filters, workers):
+        for issue in issues:
+            if issue.key not in seen:
+                seen.add(issue.key)
+                yield issue
 
 
 def get_components(project):
-    return JIRAOBJ.service.getComponents(TOKEN, project.upper())
+    return soap_call('getComponents', project.upper())
+
 
+def get_project_components(project):
+    ''' get the components of `project`, fetched once per process '''
 
-def get_comments(jira_id):
-    return JIRAOBJ.service.getComments(TOKEN, jira_id)
+    return COMPONENTS.get(project.upper(), get_components, project)
+
+
+def get_comments(jira_id, issue=None):
+    ''' get the comments of `jira_id`; given its `issue`, they are taken from the on-disk cache if they were cached
+    for the same 'updated' timestamp, or cached with the issue '''
+
+    if RECENT is not None:
+        comments = RECENT.get(('comments', jira_id.upper()))
+        if comments is not None:
+            return comments
+    cache = get_issue_cache() if issue is not None else None
+    comments = cache.get_comments(jira_id.upper(), issue.updated) if cache else None
+    if comments is None:
+        comments = soap_call('getComments', jira_id)
+        if cache:
+            cache.put(issue, comments)
+    if RECENT is not None:
+        RECENT.put(('comments', jira_id.upper()), comments)
+    return comments
 
 
 def get_actions(jira_id):
-    return JIRAOBJ.service.getAvailableActions(TOKEN, jira_id)
+    return soap_call('getAvailableActions', jira_id)
 
 
 # --- command functions ---
 
+def print_issues(issues, args, comments_of=None):
+    ''' print `issues` formatted according to `args`, prefetching comments concurrently where they are shown
+
+    `comments_of(key)` replaces fetching the comments from jira, it is called in order from this thread.'''
+
+    if args.output != 'text':
+        write_issues(issues, args.output, args.fields)
+        return
+
+    mode = (0 if not args.verbose else 1)
+    mode = (-1 if args.oneline else mode)
+
+    if args.format or (mode < 1 and not args.commentsonly):
+        for issue in issues:
+            print format_issue(issue, mode, args.format, args.commentsonly)
+        return
+
+    def _with_comments(issue):
+        if comments_of:
+            return issue, comments_of(issue['key'])
+        return issue, get_comments(issue['key'], issue)
+
+    if comments_of:
+        issues_with_comments = itertools.imap(_with_comments, issues)
+    else:
+        issues_with_comments = parallel_map(_with_comments, issues, args.workers)
+    for issue, comments in issues_with_comments:
+        print format_issue(issue, mode, args.format, args.commentsonly, comments)
+
+
+def unique_issue_keys(keys):
+    ''' yield every issue key of `keys` once, in order; a '-' reads keys (one per line) from stdin '''
+
+    seen = set()
+    for key in keys:
+        for k in (iter(sys.stdin.readline, '') if key == '-' else [key]):
+            k = k.strip().upper()
+            if k and k not in seen:
+                seen.add(k)
+                yield k
+
+
+def open_mirror():
+    return mirror.connect(settings.path('mirror.db', PROFILE))
+
+
+def list_local(args):
+    ''' list issues from the local mirror, see command_sync '''
+
+    def _resolve(field, value):
+        if value.lower() == 'currentuser()':
+            return config('user')
+        kind = {'status': 'statuses', 'priority': 'priorities', 'type': 'types', 'issuetype': 'types'}.get(field)
+        if kind:
+            return get_metadata(kind)['by_name'].get(value.lower(), {}).get('id', value)
+        return value
+
+    def _found(keys):
+        for key, issue in itertools.izip(keys, mirror.get_issues(db, keys)):
+            if issue is None:
+                print >> sys.stderr, colorfunc('%s is not in the local mirror, see \'jira-cli sync\'' % key, 'red')
+            else:
+                yield issue
+
+    db = open_mirror()
+
+    def comments_of(key):
+        return mirror.get_comments(db, key)
+
+    try:
+        if args.issue:
+            print_issues(_found(list(unique_issue_keys(args.issue))), args, comments_of)
+        if args.search:
+            print_issues(itertools.islice(mirror.search(db, args.search), args.limit), args, comments_of)
+        if args.jqlsearch:
+            print_issues(itertools.islice(mirror.query(db, args.jqlsearch, _resolve), args.limit), args, comments_of)
+    except ValueError, ex:
+        sys.exit(str(ex))
+
+
 def command_list(args):
     ''' entry point for 'list' subcommand '''
 
+    if args.output != 'text':
+        try:
+            compile_record(args.fields)
+        except ValueError, ex:
+            sys.exit(str(ex))
+
+    if args.local:
+        return list_local(args)
+
     if not any([
         args.filters,
         args.prios,
@@ -364,11 +985,7 @@ def command_list(args):
     ]):
         if not args.issue:
             raise Exception('issue id must be provided')
-        for issue in args.issue:
-            issue_id = get_issue(issue)
-            mode = (0 if not args.verbose else 1)
-            mode = (-1 if args.oneline else mode)
-            print format_issue(issue_id, mode, args.format, args.commentsonly)
+        print_issues(parallel_map(get_issue, unique_issue_keys(args.issue), args.workers), args)
 
     if args.filters:
         for idx, filt in enumerate(get_filters(), start=1):
@@ -392,31 +1009,95 @@ def command_list(args):
             print '%d. %s: %s' % (idx, colorfunc(comp['id'], 'green'), comp['name'])
 
     if args.search:
-        issues = search_issues(args.search)
-        for issue in issues:
-            mode = (0 if not args.verbose else 1)
-            mode = (-1 if args.oneline else mode)
-            print format_issue(issue, mode, args.format)
+        print_issues(search_issues(args.search, args.limit, args.page_size), args)
 
     if args.jqlsearch:
-        issues = search_issues_jql(args.jqlsearch)
-        mode = (0 if not args.verbose else 1)
-        mode = (-1 if args.oneline else mode)
-        for issue in issues:
-            print format_issue(issue, mode, args.format)
+        print_issues(search_issues_jql(args.jqlsearch, args.limit, args.page_size), args)
 
     if args.filter:
-        for filt in args.filter:
-            issues = get_issues_by_filter(get_filter_by_name(filt))
-            for issue in issues:
-                mode = (0 if not args.verbose else 1)
-                mode = (-1 if args.oneline else mode)
-                print format_issue(issue, mode, args.format, args.commentsonly)
+        filters = []
+        for name in args.filter:
+            filt = get_filter_by_name(name)
+            if filt is None:
+                sys.exit('no favourite filter named "%s"' % name)
+            filters.append(filt)
+        print_issues(get_issues_by_filters(filters, args.combine, args.workers, args.page_size), args)
+
+
+def read_issue_rows(path):
+    ''' yield (row number, fields) for every issue described in the CSV (with a header line) or JSONL file `path` '''
+
+    with open(path, 'rb') as fh:
+        if path.endswith('.jsonl') or path.endswith('.json'):
+            for number, line in enumerate(fh, start=1):
+                if line.strip():
+                    yield number, json.loads(line)
+        else:
+            for number, row in enumerate(csv.DictReader(fh), start=1):
+                yield number, dict((k.strip().lower(), v.decode('utf-8')) for (k, v) in row.items() if k and v)
+
+
+def create_issues_from_file(args):
+    ''' create the issues listed in `args.from_file` concurrently, printing their keys in input order
+
+    every created issue is recorded in a journal file, rows found there are not created again when the file is
+    processed another time, e.g. after a partial failure.'''
+
+    journal_file = args.journal or args.from_file + '.journal'
+    journal = {}
+    if os.path.isfile(journal_file):
+        with open(journal_file, 'rb') as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    journal[entry['row']] = entry
+    limiter = RateLimiter(args.rate)
+
+    def _create(entry):
+        number, row = entry
+        if number in journal:
+            if journal[number]['summary'] != row.get('summary'):
+                return number, None, 'does not match the journal entry for %s, is %s the journal of another file?' % (
+                    journal[number]['key'], journal_file)
+            return number, journal[number]['key'], None
+        project = row.get('project') or args.project
+        if not project or not row.get('summary'):
+            return number, None, 'project and summary must be provided'
+        components = row.get('components') or []
+        if isinstance(components, basestring):
+            components = [c.strip() for c in components.split(',') if c.strip()]
+        limiter.wait()
+        try:
+            issue = create_issue(project, row.get('type') or args.type, row['summary'], row.get('description') or '',
+                                 row.get('priority') or args.priority, components)
+        except WebFault, ex:
+            return number, None, str(ex).replace('\n', ' ')
+        with LOCK:
+            journal_fh.write(json.dumps({'row': number, 'key': issue.key, 'summary': row['summary']}) + '\n')
+            journal_fh.flush()
+            os.fsync(journal_fh.fileno())
+        return number, issue.key, None
+
+    failed = 0
+    with open(journal_file, 'ab') as journal_fh:
+        for number, key, error in parallel_map(_create, read_issue_rows(args.from_file), args.workers):
+            if error:
+                failed += 1
+                print >> sys.stderr, colorfunc('row %d: failed to create issue: %s' % (number, error), 'red')
+            else:
+                print key
+    if failed:
+        sys.exit('%d issue(s) could not be created, run the same command again to retry them' % failed)
 
 
 def command_create(args):
     '''entry point for 'create' subcommand '''
 
+    if args.from_file:
+        return create_issues_from_file(args)
+    if not args.project:
+        sys.exit('project must be provided')
+
     if args.summary:
         summary = ' '.join(args.summary)
     else:
@@ -449,12 +1130,59 @@ def command_comment(args):
     print add_comment(args.issue, comment)
 
 
+def progress_issues(args):
+    ''' perform a transition on every issue found by the JQL query `args.jql`
+
+    the available actions depend on the workflow (project and type) and the status of an issue, so they are fetched
+    once per (project, type, status) and issues without the wanted transition are skipped without another request.'''
+
+    if args.transist:
+        names = [args.transist.lower()]
+    elif args.start:
+        names = ['start progress', 'in progress >>']
+    elif args.stop:
+        names = ['stop progress']
+    elif args.close:
+        names = ['close issue']
+    else:
+        sys.exit('--jql needs one of --transist, --start, --stop or --close')
+
+    def _progress(issue):
+        actions = WORKFLOW_ACTIONS.get((issue.project, issue.type, issue.status), get_actions, issue.key)
+        action = next((a for name in names for a in actions if a.name.lower() == name), None)
+        status = get_metadata_name('statuses', issue.status)
+        if action is None:
+            return 'skipped', '%s: no transition "%s" from status "%s"' % (issue.key, '" or "'.join(names), status)
+        if args.dry_run:
+            return 'planned', '%s: "%s" from status "%s"' % (issue.key, action.name, status)
+        try:
+            return 'done', format_issue(progress(issue.key, action), -1, args.format)
+        except WebFault, ex:
+            return 'failed', '%s: %s' % (issue.key, str(ex).replace('\n', ' '))
+
+    counts = {'done': 0, 'planned': 0, 'skipped': 0, 'failed': 0}
+    for outcome, message in parallel_map(_progress, search_issues_jql(args.jql), args.workers):
+        counts[outcome] += 1
+        if outcome == 'done':
+            print message
+        elif outcome == 'planned':
+            print 'would progress %s' % message
+        else:
+            print >> sys.stderr, colorfunc('%s %s' % (outcome, message), 'red' if outcome == 'failed' else 'blue')
+    print >> sys.stderr, ', '.join('%d %s' % (counts[k], k) for k in ['done', 'planned', 'skipped', 'failed']
+                                   if counts[k])
+    if counts['failed']:
+        sys.exit(1)
+
+
 def command_progress(args):
     '''entry point for 'progress' subcommand '''
 
     def find_by_attr(list, attr, value):
         return next((x for x in list if x[attr].lower() == value), None)
 
+    if args.jql:
+        return progress_issues(args)
     if not args.issue:
         raise Exception('issue id must be provided')
 
@@ -517,8 +1245,372 @@ def command_progress(args):
             sys.exit('unable to close "%s", available actions are: "%s"' % (args.issue, available_actions_names))
 
 
+def command_sync(args):
+    '''entry point for 'sync' subcommand '''
+
+    db = open_mirror()
+
+    for project in args.projects:
+        project = project.upper()
+        if args.full:
+            mirror.clear_project(db, project)
+        last_sync = mirror.get_last_sync(db, project)
+        query = 'project = %s' % project
+        if last_sync:
+            # last_sync is in local time, jira reads it in the time zone of the user (see PROBE_MARGIN). the issues
+            # fetched again that did not change since are skipped below
+            since = datetime.datetime.strptime(last_sync, '%Y/%m/%d %H:%M') - PROBE_MARGIN
+            query += ' AND updated >= "%s"' % since.strftime('%Y/%m/%d %H:%M')
+
+        def _with_comments(issue):
+            return issue, get_comments(issue.key)
+
+        changed = (issue for issue in search_issues_jql(query, page_size=args.page_size)
+                   if not mirror.is_current(db, issue))
+        count = 0
+        for issue, comments in parallel_map(_with_comments, changed, args.workers):
+            mirror.store_issue(db, issue, comments)
+            if issue.updated:
+                last_sync = max(last_sync, issue.updated.strftime('%Y/%m/%d %H:%M'))
+            count += 1
+            if count % 1000 == 0:
+                db.commit()
+        if last_sync:
+            mirror.set_last_sync(db, project, last_sync)
+        db.commit()
+        print '%s: %d issue(s) synced' % (project, count)
+
+
+def format_change(issue, change, old, new, formatter=None):
+    ''' one line telling about a change found by 'watch', see watch.diff '''
+
+    if change == 'new':
+        return 'new: ' + format_issue(issue, -1, formatter)
+    if change == 'status':
+        line = u'%s status: %s -> %s' % (issue.key, get_issue_status(old), get_issue_status(new))
+    elif change == 'assignee':
+        line = u'%s assignee: %s -> %s' % (issue.key, old or 'unassigned', new or 'unassigned')
+    else:
+        line = u'%s comment by %s: %s' % (issue.key, new.author, ' '.join(new.body.split()))
+    return line.encode('utf-8')
+
+
+def poll_watched(args, snapshot):
+    ''' search the issues of 'watch' updated since the last poll, returning the lines telling what changed
+
+    the first poll fetches all issues to take the snapshot and reports nothing. comments are only fetched for issues
+    that were seen before and changed, comments created after the issue was seen last are new.'''
+
+    # 'updated' is in local time, jira reads JQL dates in the time zone of the user (see PROBE_MARGIN)
+    since = snapshot.since(PROBE_MARGIN)
+    query = mirror.ORDER_BY.sub('', args.jql).strip()
+    if since:
+        # the issues fetched again that did not change since the last poll are skipped below
+        query = '(%s) AND updated >= "%s"' % (query, since)
+    changed = []
+    for issue in search_issues_jql(query, page_size=args.page_size):
+        previous = snapshot.update(issue)
+        if snapshot.polled and not (previous and previous[0] == issue.updated):
+            changed.append((issue, previous))
+    snapshot.polled = True
+
+    def _diff(entry):
+        issue, previous = entry
+        comments = get_comments(issue.key) if previous else ()
+        return issue, watch.diff(previous, issue, comments)
+
+    lines = []
+    for issue, changes in parallel_map(_diff, changed, args.workers):
+        lines.extend(format_change(issue, change, old, new, args.format) for (change, old, new) in changes)
+    return lines
+
+
+def command_watch(args):
+    '''entry point for 'watch' subcommand '''
+
+    snapshot = watch.Snapshot()
+    backoff = Backoff(args.interval, args.max_interval)
+    polls = 0
+    while True:
+        try:
+            lines = poll_watched(args, snapshot)
+            for line in lines:
+                print line
+            sys.stdout.flush()
+            wait = backoff.next(lines or not polls)
+            if not polls:
+                print >> sys.stderr, 'watching %d issue(s)' % len(snapshot.issues)
+        except Exception, ex:
+            # jira is down or throttling, the snapshot is kept and the next poll asks for the same changes
+            wait = backoff.failed()
+            logging.warning('polling jira failed, trying again in %ds: %s' % (wait, ex))
+        polls += 1
+        if args.polls and polls >= args.polls:
+            return
+        time.sleep(wait)
+
+
+def command_stats(args):
+    '''entry point for 'stats' subcommand '''
+
+    unknown = [field for field in args.by if field not in GROUP_FIELDS]
+    if unknown:
+        sys.exit('unknown field(s) %s, --by takes %s' % (', '.join(unknown), ', '.join(sorted(GROUP_FIELDS))))
+    by = [GROUP_FIELDS[field] for field in args.by]
+
+    def _groups_of(issue):
+        return itertools.product(*[values(issue) for values in by])
+
+    aggregate = stats.Aggregate(_groups_of, datetime.datetime.now())
+    # ORDER BY does not matter for counting, without it the search is paged
+    for issue in search_issues_jql(mirror.ORDER_BY.sub('', args.jql).strip(), page_size=args.page_size):
+        aggregate.add(issue)
+    rows = aggregate.rows()
+
+    def _days(histogram, percent):
+        seconds = histogram.percentile(percent)
+        return round(seconds / 86400.0, 1) if seconds is not None else None
+
+    if args.output == 'json':
+        groups = []
+        for key, count, ages, in_status in rows:
+            group = dict(zip(args.by, key))
+            group['issues'] = count
+            group['age_days'] = dict(('p%g' % p, _days(ages, p)) for p in args.percentiles)
+            group['in_status_days'] = dict(('p%g' % p, _days(in_status, p)) for p in args.percentiles)
+            groups.append(group)
+        print json.dumps({'issues': aggregate.total, 'by': args.by, 'groups': groups}, sort_keys=True)
+        return
+
+    header = args.by + ['issues'] + ['age p%g' % p for p in args.percentiles] + \
+        ['in status p%g' % p for p in args.percentiles]
+    table = [[unicode(value) for value in key] + [str(count)] +
+             ['%.1fd' % _days(h, p) if h.count else '-' for h in (ages, in_status) for p in args.percentiles]
+             for (key, count, ages, in_status) in rows]
+    widths = [max(len(row[idx]) for row in [header] + table) for idx in range(len(header))]
+    for row in [header] + table:
+        # names left aligned, numbers right aligned
+        print u'  '.join(value.ljust(width) if idx < len(args.by) else value.rjust(width) for (idx, (value,
+                         width)) in enumerate(zip(row, widths))).rstrip().encode('utf-8')
+    print '%d issue(s)' % aggregate.total
+
+
+def command_cache(args):
+    '''entry point for 'cache' subcommand '''
+
+    if args.action == 'clear':
+        METADATA.clear()
+        for kind in sorted(METADATA_METHODS):
+            metadata_file = settings.path('%s.json' % kind, PROFILE)
+            if os.path.isfile(metadata_file):
+                os.remove(metadata_file)
+        shutil.rmtree(os.path.expanduser('~/.jira-cli/wsdl'), ignore_errors=True)
+        cache = get_issue_cache()
+        if cache:
+            cache.clear()
+        print 'cleared cached issue types, statuses, priorities, issues and wsdl'
+
+    if args.action == 'refresh':
+        for kind in sorted(METADATA_METHODS):
+            print '%s: %d entries' % (kind, len(get_metadata(kind, refresh=True)['items']))
+
+
+def command_completion(args):
+    '''entry point for 'completion' subcommand '''
+
+    sys.stdout.write(completion.script(args.shell))
+
+
+class ThreadOutput(object):
+    ''' file-like stand-in for sys.stdout / sys.stderr, collecting what a thread writes while it runs a batch line '''
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, data):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            self.stream.write(data)
+        else:
+            buffer.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def parse_batch_line(line):
+    ''' get the command line arguments of a batch line: a JSON array, a JSON object {"args": [...], "id": ...}
+    or a command line as typed after jira-cli '''
+
+    line = line.strip()
+    if line.startswith('['):
+        return json.loads(line), None
+    if line.startswith('{'):
+        entry = json.loads(line)
+        return entry['args'], entry.get('id')
+    return shlex.split(line), None
+
+
+def run_batch_line(entry):
+    ''' run one batch line `entry` (line number, line), returning its result record '''
+
+    number, line = entry
+    result = {'line': number}
+    buffers = [sys.stdout.local, sys.stderr.local]
+    for local in buffers:
+        local.buffer = StringIO()
+    try:
+        argv, result['id'] = parse_batch_line(line)
+        args = setup_argparser().parse_args([(arg.encode('utf-8') if isinstance(arg, unicode) else str(arg))
+                                             for arg in argv])
+        if args.func not in BATCH_COMMANDS:
+            raise Exception('command not allowed in a batch, use one of: list, create, comment, progress')
+        if args.profile and args.profile != PROFILE:
+            raise Exception('--profile can not change within a batch, give it to jira-cli batch')
+        if is_interactive(args):
+            raise Exception('command reads stdin or starts an editor, not allowed in a batch: give the issue keys, '
+                            'comment -c or create -s and -d (or --from-file)')
+        args.func(args)
+        result['ok'] = True
+    except SystemExit, ex:
+        result['ok'] = not ex.code
+        if isinstance(ex.code, basestring):
+            result['error'] = ex.code
+    except Exception, ex:
+        result['ok'] = False
+        result['error'] = str(ex) or ex.__class__.__name__
+    finally:
+        output, errors = [local.buffer.getvalue() for local in buffers]
+        for local in buffers:
+            local.buffer = None
+    result['output'] = output
+    if not result['ok'] and 'error' not in result:
+        result['error'] = errors.strip().split('\n')[-1]
+    return result
+
+
+def command_batch(args):
+    '''entry point for 'batch' subcommand '''
+
+    lines = ((number, line) for (number, line) in enumerate(iter(args.file.readline, ''), start=1)
+             if line.strip() and not line.strip().startswith('#'))
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = ThreadOutput(stdout), ThreadOutput(stderr)
+    failed = 0
+    try:
+        for result in parallel_map(run_batch_line, lines, args.workers):
+            failed += not result['ok']
+            stdout.write(json.dumps(result) + '\n')
+            stdout.flush()
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    if failed:
+        sys.exit(1)
+
+
+BATCH_COMMANDS = [command_list, command_create, command_comment, command_progress]
+DAEMON_COMMANDS = [command_list, command_comment, command_progress]
+
+
+def is_interactive(args):
+    ''' whether the command of `args` reads stdin or starts an editor '''
+
+    if args.func is command_comment:
+        return not args.comment
+    if args.func is command_list:
+        return '-' in args.issue
+    if args.func is command_create:
+        return not args.from_file and not (args.summary and args.description)
+    return False
+
+
+def can_forward(args):
+    ''' whether the command of `args` can run in 'jira-cli daemon': it reads neither stdin nor an editor and reports
+    nothing about the process at exit '''
+
+    if args.func not in DAEMON_COMMANDS or args.stats or args.trace or args.trace_file or args.no_cache:
+        return False
+    return not is_interactive(args)
+
+
+def run_in_daemon(argv, stdout, stderr, color=False):
+    ''' run the command line `argv` of a 'jira-cli daemon' client, writing its output to `stdout` and `stderr`,
+    coloured if `color` is set (the client writes to a terminal); returns the exit code '''
+
+    buffers = [sys.stdout.local, sys.stderr.local]
+    sys.stdout.local.buffer, sys.stderr.local.buffer = stdout, stderr
+    OUTPUT.color = color
+    try:
+        args = setup_argparser().parse_args(argv)
+        if not can_forward(args):
+            raise Exception('the daemon does not run this command')
+        if args.profile != PROFILE:
+            raise Exception('this daemon runs commands of profile %s only' % (PROFILE or 'general'))
+        args.func(args)
+        return 0
+    except SystemExit, ex:
+        if isinstance(ex.code, basestring):
+            print >> stderr, ex.code
+            return 1
+        return ex.code or 0
+    except Exception, ex:
+        print >> stderr, str(ex) or ex.__class__.__name__
+        return 1
+    finally:
+        for local in buffers:
+            local.buffer = None
+        del OUTPUT.color
+        completion.SEEN.save(completion.index_path(PROFILE))
+
+
+def command_daemon(args):
+    '''entry point for 'daemon' subcommand '''
+
+    global RECENT
+
+    if args.stop:
+        if daemon.request({'stop': True}, path=daemon.socket_path(PROFILE)) is None:
+            sys.exit('no jira-cli daemon is running')
+        print 'jira-cli daemon stopped'
+        return
+
+    def _refresh():
+        METADATA.clear()
+        # compiled --format strings hold the names of statuses, priorities and types
+        FORMATTERS.clear()
+        COMPONENTS.clear()
+        WORKFLOW_ACTIONS.clear()
+        FILTERS.clear()
+
+    RECENT = RecentCache(ttl=float(config('daemon_cache_seconds')))
+    for kind in sorted(METADATA_METHODS):
+        get_metadata(kind)
+
+    def _ready():
+        print 'jira-cli daemon listening on %s' % daemon.socket_path(PROFILE)
+        sys.stdout.flush()
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = ThreadOutput(stdout), ThreadOutput(stderr)
+    try:
+        refresh = float(config('metadata_cache_days')) * 24 * 60 * 60
+        daemon.serve(run_in_daemon, daemon.socket_path(PROFILE), refresh=(refresh, _refresh), ready=_ready)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        RECENT = None
+
+
 # --- boiler plate and main entry point ---
 
+def profile_name(value):
+    ''' argparse type of --profile: a name usable as a directory name '''
+
+    if not re.match(r'^[\w.-]+$', value) or value.startswith('.'):
+        raise argparse.ArgumentTypeError('invalid profile name %r, use letters, digits, ".", "-" and "_"' % value)
+    return value
+
+
 def setup_argparser():
     '''setting up and returning command line arguments parser'''
 
@@ -549,44 +1641,90 @@ $key,
 $affectsVersions,
 $type.
 
+${token:20} pads a value to 20 characters, ${token:>20} right aligns it and
+$$ is a literal $.
+
 examples:
 '$priority,$reporter'
-'$key $priority, reported by $reporter' ''')
+'$key $priority, reported by $reporter'
+'${key:10} ${status:>12} $$$votes' ''')
+
+    # options for talking to jira:
+    parser.add_argument('--profile', type=profile_name,
+                        help='use the jira instance, token and caches of this profile, set up in a [profile PROFILE] '
+                        'section of ~/.jira-cli/config (default: the [general] section)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='number of concurrent requests to jira (default: %(default)s)')
+    parser.add_argument('--stats', action='store_true',
+                        help='print the number of requests made to jira and the time spent on them at exit')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='neither use nor fill the on-disk cache of issues and comments (see issue_cache_mb)')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help="run the command in this process even if a 'jira-cli daemon' is running")
+    parser.add_argument('--trace', action='store_true',
+                        help='print the calls, time, bytes and retries per soap method and phase at exit')
+    parser.add_argument('--trace-file', help='write every soap call and phase to TRACE_FILE in the chrome trace '
+                        'event format, for chrome://tracing or perfetto')
 
     # sub-commands:
     subparsers = parser.add_subparsers(title='subcommands')
 
     parser_list = subparsers.add_parser('list')
-    parser_list.set_defaults(func=command_list)
-    parser_list.add_argument('issue', help='issue id to list', nargs='*')
+    parser_list.set_defaults(func=command_list, session=lambda args: not args.local)
+    parser_list.add_argument('issue', help="issue id(s) to list, '-' reads them from stdin", nargs='*')
     parser_list.add_argument('--types', help="print all issue 'types'", action='store_true')
     parser_list.add_argument('--statuses', help="print all issue 'statuses'", action='store_true')
     parser_list.add_argument('--prios', help="print all issue 'priorities'", action='store_true')
     parser_list.add_argument('--filters', help='print available filters', action='store_true')
     parser_list.add_argument('--components', help='print components by project', dest='project')
     parser_list.add_argument('-f', '--filter', help='filter(s) to use for listing issues', nargs='+')
+    group = parser_list.add_mutually_exclusive_group()
+    group.add_argument('--union', dest='combine', action='store_const', const='union',
+                       help='list the issues of any of the --filter filters, by a single search')
+    group.add_argument('--intersect', dest='combine', action='store_const', const='intersect',
+                       help='list the issues of all of the --filter filters, by a single search')
     parser_list.add_argument('-s', '--search', help='fuzzy text search')
     parser_list.add_argument('-j', '--jqlsearch',
                              help='search by JQL query, example: "assignee = currentUser() AND resolution = unresolved AND status != "Waiting for Feedback" ORDER BY priority DESC, updated DESC" '
                              )
+    parser_list.add_argument('--local', action='store_true', help="list issues from the local mirror (see 'sync') "
+                             'instead of asking jira; -j then supports "field OP value" clauses joined by AND')
+    parser_list.add_argument('--limit', type=int, help='list at most LIMIT issues of a search (default: all)')
+    parser_list.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                             help='number of issues fetched per request by a search (default: %(default)s)')
+    parser_list.add_argument('--output', choices=['text', 'jsonl', 'csv', 'tsv'], default='text',
+                             help='print issues as text (see the formatting options), one JSON object per line or '
+                             'CSV / TSV rows after a header line (default: %(default)s)')
+    parser_list.add_argument('--fields', type=lambda value: [f.strip() for f in value.split(',') if f.strip()],
+                             default=OUTPUT_FIELDS, help='comma separated issue fields written by --output jsonl, csv '
+                             'and tsv, from %s (default: %s)' % (', '.join(ISSUE_FIELDS), ','.join(OUTPUT_FIELDS)))
 
     parser_create = subparsers.add_parser('create')
-    parser_create.set_defaults(func=command_create)
-    parser_create.add_argument('project', help='project to create the issue in')
+    parser_create.set_defaults(func=command_create, session=True)
+    parser_create.add_argument('project', help='project to create the issue(s) in', nargs='?')
     parser_create.add_argument('-s', '--summary', help='create a new issue with given summary', nargs='*')
     parser_create.add_argument('-d', '--description', help='type of new issue', nargs='*')
     parser_create.add_argument('-p', '--priority', help='priority of new issue', default='major')
     parser_create.add_argument('-t', '--type', help='type of new issue', default='task')
     parser_create.add_argument('-c', '--components', help='components of new issue', nargs='*')
+    parser_create.add_argument('--from-file', help='create the issues listed in a CSV (with a header line) or JSONL '
+                               'file with the fields project, summary, description, type, priority and components; '
+                               'project, type and priority default to the arguments given here')
+    parser_create.add_argument('--journal', help='file recording the issues created --from-file, rows recorded there '
+                               'are skipped (default: the file name with .journal appended)')
+    parser_create.add_argument('--rate', type=float, help='create at most RATE issues per second (default: no limit)')
 
     parser_comment = subparsers.add_parser('comment')
-    parser_comment.set_defaults(func=command_comment)
+    parser_comment.set_defaults(func=command_comment, session=True)
     parser_comment.add_argument('issue', help='issue to comment')
     parser_comment.add_argument('-c', '--comment', help='comment on issue', nargs='*')
 
     parser_progress = subparsers.add_parser('progress')
-    parser_progress.set_defaults(func=command_progress)
-    parser_progress.add_argument('issue', help='issue to progress')
+    parser_progress.set_defaults(func=command_progress, session=True)
+    parser_progress.add_argument('issue', help='issue to progress', nargs='?')
+    parser_progress.add_argument('-j', '--jql', help='progress all issues found by this JQL query instead of one issue')
+    parser_progress.add_argument('-n', '--dry-run', action='store_true',
+                                 help='with --jql, only show which issues would be progressed')
     parser_progress.add_argument('-a', '--actions', help='list available actions', action='store_true')
     group = parser_progress.add_mutually_exclusive_group()
     group.add_argument('--start', help='start progress', action='store_true')
@@ -595,18 +1733,116 @@ examples:
     group.add_argument('-c', '--close', help='close issue', action='store_true')
     group.add_argument('--transist', help='perform transition')
 
+    parser_sync = subparsers.add_parser('sync', help="update the local mirror of issues used by 'list --local'")
+    parser_sync.set_defaults(func=command_sync, session=True)
+    parser_sync.add_argument('projects', help='project(s) to mirror', nargs='+', metavar='project')
+    parser_sync.add_argument('--full', action='store_true', help='drop the mirrored issues and fetch all of them')
+    parser_sync.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                             help='number of issues fetched per request (default: %(default)s)')
+
+    parser_watch = subparsers.add_parser('watch', help='poll the issues of a JQL query and print what changed: new '
+                                         'issues, status and assignee changes and new comments')
+    parser_watch.set_defaults(func=command_watch, session=True)
+    parser_watch.add_argument('-j', '--jql', required=True, help='JQL query of the issues to watch')
+    parser_watch.add_argument('--interval', type=float, default=30,
+                              help='seconds between polls while issues change (default: %(default)s)')
+    parser_watch.add_argument('--max-interval', type=float,
+                              help='the wait doubles after every poll without changes up to MAX_INTERVAL seconds '
+                              '(default: 8 times the interval)')
+    parser_watch.add_argument('--polls', type=int, help='stop after POLLS polls (default: poll until interrupted)')
+    parser_watch.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                              help='number of issues fetched per request (default: %(default)s)')
+
+    parser_stats = subparsers.add_parser('stats', help='count the issues of a JQL query by status, assignee, ... '
+                                         'with percentiles of their age and time in status')
+    parser_stats.set_defaults(func=command_stats, session=True)
+    parser_stats.add_argument('-j', '--jql', required=True, help='JQL query of the issues to count')
+    parser_stats.add_argument('--by', type=lambda value: [f.strip() for f in value.split(',') if f.strip()],
+                              default=['status'], help='comma separated fields to group the issues by, from %s '
+                              '(default: status); an issue counts for each of its components' %
+                              ', '.join(sorted(GROUP_FIELDS)))
+    parser_stats.add_argument('--percentiles', type=lambda value: [float(p) for p in value.split(',')],
+                              default=[50.0, 90.0], help='comma separated percentiles of the age and time in status '
+                              'of the issues of a group, time in status is the time since the last update (default: '
+                              '50,90)')
+    parser_stats.add_argument('--output', choices=['table', 'json'], default='table',
+                              help='print a table or one JSON object (default: %(default)s)')
+    parser_stats.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                              help='number of issues fetched per request (default: %(default)s)')
+
+    parser_cache = subparsers.add_parser('cache')
+    parser_cache.set_defaults(func=command_cache, session=lambda args: args.action == 'refresh')
+    parser_cache.add_argument('action', help="'refresh' to fetch issue types, statuses and priorities again, "
+                              "'clear' to remove them and the cached wsdl", choices=['refresh', 'clear'])
+
+    parser_batch = subparsers.add_parser('batch', help='run list, create, comment and progress commands read line by '
+                                         'line, reporting the result of every line as JSON')
+    parser_batch.set_defaults(func=command_batch, session=True)
+    parser_batch.add_argument('file', help="file to read the commands from (default: '-' for stdin)", nargs='?',
+                              type=argparse.FileType('r'), default='-')
+
+    parser_daemon = subparsers.add_parser('daemon', help='keep the jira session, metadata and recently fetched issues '
+                                          'in memory and run list, comment and progress commands of other jira-cli '
+                                          'processes, which fall back to running in-process if no daemon is running')
+    parser_daemon.set_defaults(func=command_daemon, session=lambda args: not args.stop)
+    parser_daemon.add_argument('--stop', action='store_true', help='stop the running daemon')
+
+    parser_completion = subparsers.add_parser('completion', help='print the shell completion script for bash or zsh, '
+                                              'completing issue keys, projects, components, filters and transitions '
+                                              'seen by earlier commands')
+    parser_completion.set_defaults(func=command_completion, session=False)
+    parser_completion.add_argument('shell', choices=['bash', 'zsh'])
+
     return parser
 
 
+def needs_session(args):
+    ''' whether the command of `args` talks to jira, as declared by the 'session' default of its subparser
+
+    a declaration is a boolean or a function of `args`. commands that do not need a session start without importing
+    suds or logging in; should they call jira anyway, soap_call sets up the session on the first call.'''
+
+    return args.session(args) if callable(args.session) else args.session
+
+
 def main():
+    if sys.argv[1:2] == ['__complete']:
+        # asked by the completion scripts while typing: answered from the index only, see completion
+        return completion.main(sys.argv[2:])
     try:
         parser = setup_argparser()
         args = parser.parse_args()
         logging.debug(args)
     except Exception, ex:
         sys.exit(colorfunc(str(ex), 'red'))
-    check_auth()
-    args.func(args)
+    use_profile(args.profile)
+    if not args.no_daemon and can_forward(args):
+        code = daemon.request({'argv': sys.argv[1:], 'color': CONFIG['color']}, path=daemon.socket_path(PROFILE))
+        if code is not None:
+            sys.exit(code)
+    if args.no_cache:
+        CONFIG['issue_cache_mb'] = '0'
+    start = time.time()
+    if args.trace or args.trace_file:
+        trace.enable()
+    try:
+        if needs_session(args):
+            check_auth()
+        with trace.span('command %s' % args.func.__name__.replace('command_', '')):
+            args.func(args)
+    finally:
+        completion.SEEN.save(completion.index_path(PROFILE), background=True)
+        if args.trace:
+            trace.print_summary()
+        if args.trace_file:
+            trace.write_chrome_trace(args.trace_file)
+        if args.stats:
+            print >> sys.stderr, '%d requests to jira, %.2fs spent in requests, %.2fs total' % (STATS['requests'],
+                    STATS['seconds'], time.time() - start)
+            if transport:
+                print >> sys.stderr, '%d connections opened, %d bytes sent, %d bytes received' % (
+                        transport.STATS['connections'], transport.STATS['bytes_sent'],
+                        transport.STATS['bytes_received'])
 
 
 if __name__ == '__main__':
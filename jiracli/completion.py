@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+shell completion of jira-cli: a small sqlite index of the issue keys, projects, components, favourite filters and
+transitions jira-cli has seen, answered by 'jira-cli __complete' (or 'python -m jiracli.completion')
+
+completing must be fast, so this module imports neither suds nor the rest of jira-cli and never asks jira. commands
+add the names they came across to the index when they end, see Names.
+'''
+
+import os
+import sys
+import json
+import pipes
+import threading
+
+from jiracli import settings
+
+INDEX = 'completion.db'
+LIMIT = 200
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS names (kind TEXT, scope TEXT, folded TEXT, name TEXT, rank INTEGER,
+                                  PRIMARY KEY (kind, scope, folded));
+CREATE INDEX IF NOT EXISTS names_folded ON names (kind, folded);
+'''
+COMMANDS = ['list', 'create', 'comment', 'progress', 'sync', 'watch', 'stats', 'cache', 'batch', 'daemon',
+            'completion']
+# options taking a value, by command (None: before the command), with the kind of name the value is completed with
+# (None: not completed) and whether they take several values
+OPTIONS = {
+    None: {'-f': (None, False), '--format': (None, False), '--profile': (None, False), '--workers': (None, False),
+           '--trace-file': (None, False)},
+    'list': {'-f': ('filter', True), '--filter': ('filter', True), '--components': ('project', False),
+             '-s': (None, False), '--search': (None, False), '-j': (None, False), '--jqlsearch': (None, False),
+             '--limit': (None, False), '--page-size': (None, False), '--output': (None, False),
+             '--fields': (None, False)},
+    'create': {'-c': ('component', True), '--components': ('component', True), '-t': ('type', False),
+               '--type': ('type', False), '-p': ('priority', False), '--priority': ('priority', False),
+               '-s': (None, True), '--summary': (None, True), '-d': (None, True), '--description': (None, True),
+               '--from-file': (None, False), '--journal': (None, False), '--rate': (None, False)},
+    'progress': {'--transist': ('action', False), '-j': (None, False), '--jql': (None, False)},
+    'comment': {'-c': (None, True), '--comment': (None, True)},
+    'sync': {'--page-size': (None, False)},
+    'watch': {'-j': (None, False), '--jql': (None, False), '--interval': (None, False),
+              '--max-interval': (None, False), '--polls': (None, False), '--page-size': (None, False)},
+    'stats': {'-j': (None, False), '--jql': (None, False), '--by': (None, False), '--percentiles': (None, False),
+              '--output': (None, False), '--page-size': (None, False)},
+}
+# what the positional arguments of a command are completed with, and whether it takes several
+POSITIONALS = {'list': ('issue', True), 'comment': ('issue', False), 'progress': ('issue', False),
+               'create': ('project', False), 'sync': ('project', True)}
+# issue types and priorities come from the metadata files of jira-cli (see cli.get_metadata)
+METADATA = {'type': 'types', 'priority': 'priorities'}
+
+BASH = '''# bash completion for jira-cli, e.g. jira-cli completion bash > /etc/bash_completion.d/jira-cli
+_jira_cli() {
+    local IFS=$'\\n'
+    COMPREPLY=($(%(command)s "$((COMP_CWORD - 1))" "${COMP_WORDS[@]:1}" 2>/dev/null))
+    [[ ${#COMPREPLY[@]} -gt 0 ]] && COMPREPLY=($(printf '%%q\\n' "${COMPREPLY[@]}"))
+}
+complete -o bashdefault -o default -F _jira_cli jira-cli
+'''
+ZSH = '''#compdef jira-cli
+# zsh completion for jira-cli, e.g. jira-cli completion zsh > "${fpath[1]}/_jira-cli"
+_jira_cli() {
+    local out
+    out=$(%(command)s "$((CURRENT - 2))" "${(@)words[2,-1]}" 2>/dev/null)
+    [[ -n $out ]] && compadd -U -- "${(@f)out}" || _files
+}
+compdef _jira_cli jira-cli
+'''
+
+
+def index_path(profile=None):
+    return settings.path(INDEX, profile)
+
+
+def profile(words):
+    ''' the profile given by --profile in `words`, the command line after jira-cli '''
+
+    for word, value in zip(words, words[1:]):
+        if word in COMMANDS:
+            break
+        if word == '--profile':
+            return value
+    return None
+
+
+def script(shell):
+    ''' the completion script for `shell` ('bash' or 'zsh'); it runs this module with the interpreter of jira-cli,
+    skipping the console script wrapper and the import of jiracli.cli '''
+
+    command = '%s -m jiracli.completion' % pipes.quote(sys.executable)
+    return (BASH if shell == 'bash' else ZSH) % {'command': command}
+
+
+class Names(object):
+    ''' names seen while commands run, added to the index by save '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = set()
+
+    def add(self, kind, names, scope=''):
+        with self.lock:
+            self.names.update((kind, scope, unicode(name)) for name in names if name)
+
+    def add_issues(self, issues):
+        ''' add the keys, projects and components of `issues` (None is skipped) '''
+
+        for issue in issues:
+            if issue is not None and issue.key:
+                self.add('issue', [issue.key], issue.project or '')
+                self.add('project', [issue.project])
+                self.add('component', [c.name for c in issue.components or []], issue.project or '')
+
+    def save(self, path=None, background=False):
+        ''' add the names seen so far to the index at `path`, in `background` by a child process not waited for '''
+
+        with self.lock:
+            names, self.names = self.names, set()
+        if not names:
+            return
+        if background and hasattr(os, 'fork'):
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork():
+                return
+            try:
+                store(path or index_path(), names)
+            finally:
+                os._exit(0)
+        store(path or index_path(), names)
+
+
+SEEN = Names()
+
+
+def _rank(kind, name):
+    # issue keys are listed by number
+    number = name.rsplit('-', 1)[-1] if kind == 'issue' else ''
+    return int(number) if number.isdigit() else 0
+
+
+def store(path, names):
+    ''' add `names`, (kind, scope, name) tuples, to the index at `path` '''
+
+    import sqlite3
+    db = sqlite3.connect(path, timeout=10)
+    try:
+        db.executescript(SCHEMA)
+        db.executemany('INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?, ?)', [(kind, scope, name.lower(), name,
+                       _rank(kind, name)) for (kind, scope, name) in names])
+        db.commit()
+    finally:
+        db.close()
+
+
+def lookup(kind, prefix, scope=None, path=None):
+    ''' the names of `kind` in the index starting with `prefix` (ignoring case), of `scope` if given '''
+
+    path = path or index_path()
+    if not os.path.isfile(path):
+        return []
+    import sqlite3
+    db = sqlite3.connect(path)
+    folded = prefix.lower()
+    try:
+        return [row[0] for row in db.execute('SELECT DISTINCT name FROM names WHERE kind = ? AND folded >= ? AND '
+                'folded < ?%s ORDER BY scope, rank, folded LIMIT ?' % (' AND scope = ?' if scope is not None else ''),
+                [kind, folded, folded + u'\uffff'] + ([scope] if scope is not None else []) + [LIMIT])]
+    except sqlite3.Error:
+        return []
+    finally:
+        db.close()
+
+
+def context(words):
+    ''' (kind, scope) of the names completing the word after `words`, the command line after jira-cli; kind is None
+    if there is nothing to complete and scope None for names of any scope '''
+
+    command, option, positionals = None, None, []
+    for word in words:
+        if option is not None:
+            many = OPTIONS[command][option][1]
+            if not (many and word.startswith('-')):
+                option = option if many else None
+                continue
+            option = None
+        if word.startswith('-'):
+            option = word if word in OPTIONS.get(command, {}) else None
+        elif command is None:
+            command = word
+        else:
+            positionals.append(word)
+
+    if option is not None:
+        kind = OPTIONS[command][option][0]
+        if kind == 'component' and positionals:
+            # the components of the project the issue is created in
+            return kind, positionals[0].upper()
+        return kind, None
+    if command is None:
+        return 'command', None
+    kind, many = POSITIONALS.get(command, (None, False))
+    if positionals and not many:
+        return None, None
+    return kind, None
+
+
+def complete(words, current, path=None):
+    ''' the completions of the word `current` following `words`, the command line after jira-cli '''
+
+    kind, scope = context(words)
+    if current.startswith('-') or kind is None:
+        return []
+    if kind == 'command':
+        return [command for command in COMMANDS if command.startswith(current)]
+    name = profile(words)
+    if kind in METADATA:
+        metadata_file = settings.path('%s.json' % METADATA[kind], name)
+        if not os.path.isfile(metadata_file):
+            return []
+        with open(metadata_file, 'rb') as fh:
+            return [item['name'] for item in json.load(fh) if item['name'].lower().startswith(current.lower())]
+    return lookup(kind, current, scope, path or index_path(name))
+
+
+def main(argv):
+    ''' print the completions of a command line, one per line; `argv` is the index of the word to complete and the
+    words of the command line after jira-cli '''
+
+    try:
+        index = int(argv[0])
+    except (IndexError, ValueError):
+        return
+    words = [word.decode('utf-8', 'replace') for word in argv[1:]]
+    current = words[index] if 0 <= index < len(words) else u''
+    for name in complete(words[:max(index, 0)], current):
+        print name.encode('utf-8')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+'jira-cli daemon': a long running jira-cli keeping the soap client, the metadata and recently fetched issues in memory,
+running the commands of other jira-cli processes sent over a unix socket
+
+every request is one JSON line {"argv": [...]} (or {"stop": true}), answered by JSON lines {"out": text},
+{"err": text} and finally {"exit": code}.
+'''
+
+import os
+import sys
+import json
+import time
+import errno
+import socket
+import threading
+import SocketServer
+
+from jiracli import settings
+
+SOCKET = 'daemon.sock'
+
+
+def socket_path(profile=None):
+    ''' the socket the daemon of `profile` (None: the default profile) listens on '''
+
+    return settings.path(SOCKET, profile)
+
+
+def _connect(path):
+    ''' connect to the daemon listening on `path`, None if there is none '''
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except socket.error, ex:
+        client.close()
+        if ex.errno in (errno.ENOENT, errno.ECONNREFUSED):
+            return None
+        raise
+    return client
+
+
+def request(message, stdout=None, stderr=None, path=None):
+    ''' send `message` to the daemon and copy its output to `stdout` and `stderr` as it arrives
+
+    returns the exit code of the command, or None if no daemon is running (or it went away before answering), so the
+    command can run in-process instead.'''
+
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    client = _connect(path or socket_path())
+    if client is None:
+        return None
+    answered = False
+    try:
+        client.sendall(json.dumps(message) + '\n')
+        for line in client.makefile('rb'):
+            reply = json.loads(line)
+            answered = True
+            if 'out' in reply:
+                stdout.write(reply['out'].encode('utf-8'))
+            elif 'err' in reply:
+                stderr.write(reply['err'].encode('utf-8'))
+            else:
+                stdout.flush()
+                return reply['exit']
+    except socket.error:
+        if not answered:
+            return None
+    finally:
+        client.close()
+    stderr.write('jira-cli daemon went away\n')
+    return 1
+
+
+class _Output(object):
+    ''' file-like object sending what is written to it as JSON line {`name`: data} '''
+
+    def __init__(self, wfile, name):
+        self.wfile = wfile
+        self.name = name
+
+    def write(self, data):
+        if data:
+            if isinstance(data, str):
+                data = data.decode('utf-8', 'replace')
+            self.wfile.write(json.dumps({self.name: data}) + '\n')
+
+    def flush(self):
+        self.wfile.flush()
+
+
+class Handler(SocketServer.StreamRequestHandler):
+
+    def reply(self, **message):
+        self.wfile.write(json.dumps(message) + '\n')
+        self.wfile.flush()
+
+    def handle(self):
+        message = json.loads(self.rfile.readline())
+        if message.get('stop'):
+            self.reply(exit=0)
+            threading.Thread(target=self.server.shutdown).start()
+            return
+        self.reply(exit=self.server.run(message['argv'], _Output(self.wfile, 'out'), _Output(self.wfile, 'err'),
+                                        message.get('color', False)))
+
+
+class Server(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+
+    daemon_threads = True
+
+
+def serve(run, path=None, refresh=None, ready=None):
+    ''' serve requests on the unix socket `path` until stopped, running each with run(argv, stdout, stderr, color),
+    color telling whether the client writes to a terminal
+
+    `refresh` is a (seconds, function) pair, the function is called before a request if it was called longer than
+    seconds ago. `ready()` is called once the socket accepts connections.'''
+
+    path = path or socket_path()
+    if os.path.exists(path):
+        client = _connect(path)
+        if client is not None:
+            client.close()
+            raise Exception('a jira-cli daemon is running already on %s' % path)
+        os.remove(path)
+
+    state = {'refreshed': time.time()}
+    lock = threading.Lock()
+
+    def _run(argv, stdout, stderr, color):
+        if refresh:
+            with lock:
+                if time.time() - state['refreshed'] > refresh[0]:
+                    refresh[1]()
+                    state['refreshed'] = time.time()
+        return run(argv, stdout, stderr, color)
+
+    umask = os.umask(0177)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(umask)
+    server.run = _run
+    if ready:
+        ready()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+local sqlite mirror of issues and comments, kept up to date by 'jira-cli sync' and queried by 'list --local'
+'''
+
+import re
+import json
+import datetime
+
+ISSUE_FIELDS = ['key', 'id', 'project', 'type', 'status', 'priority', 'resolution', 'summary', 'description',
+                'environment', 'assignee', 'reporter', 'created', 'updated', 'duedate', 'votes']
+COMMENT_FIELDS = ['id', 'author', 'body', 'created', 'updated']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS issues (%s, components TEXT, PRIMARY KEY (key));
+CREATE INDEX IF NOT EXISTS issues_status ON issues (status);
+CREATE INDEX IF NOT EXISTS issues_assignee ON issues (assignee);
+CREATE INDEX IF NOT EXISTS issues_updated ON issues (updated);
+CREATE INDEX IF NOT EXISTS issues_project ON issues (project);
+CREATE TABLE IF NOT EXISTS comments (issue TEXT, %s, PRIMARY KEY (issue, id));
+CREATE TABLE IF NOT EXISTS sync (project TEXT PRIMARY KEY, last_sync TEXT);
+''' % (', '.join(ISSUE_FIELDS), ', '.join(COMMENT_FIELDS))
+
+# fields a JQL filter on the mirror may use, mapped to their column
+FILTER_FIELDS = {
+    'key': 'key',
+    'issuekey': 'key',
+    'project': 'project',
+    'status': 'status',
+    'priority': 'priority',
+    'type': 'type',
+    'issuetype': 'type',
+    'assignee': 'assignee',
+    'reporter': 'reporter',
+    'summary': 'summary',
+    'description': 'description',
+    'text': "summary || ' ' || ifnull(description, '')",
+    'created': 'created',
+    'updated': 'updated',
+}
+CLAUSE = re.compile(r'^\s*(\w+)\s*(!=|>=|<=|=|>|<|~|\bin\b|\bis\b)\s*(.+?)\s*$', re.I)
+ORDER_BY = re.compile(r'\border\s+by\s+(.+)$', re.I)
+
+
+class Record(dict):
+    ''' dict with attribute access, standing in for the suds objects the formatters expect '''
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def connect(path):
+    import sqlite3
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def store_issue(db, issue, comments):
+    ''' insert or replace `issue` and its `comments` '''
+
+    values = [_value(getattr(issue, field, None)) for field in ISSUE_FIELDS]
+    components = json.dumps([{'id': c.id, 'name': c.name} for c in (getattr(issue, 'components', None) or [])])
+    db.execute('INSERT OR REPLACE INTO issues VALUES (%s)' % ', '.join('?' * (len(values) + 1)), values + [components])
+    db.execute('DELETE FROM comments WHERE issue = ?', (issue.key, ))
+    db.executemany('INSERT INTO comments VALUES (%s)' % ', '.join('?' * (len(COMMENT_FIELDS) + 1)),
+                   [[issue.key] + [_value(getattr(c, field, None)) for field in COMMENT_FIELDS] for c in comments])
+
+
+def is_current(db, issue):
+    ''' whether the mirror holds `issue` as updated at the same time '''
+
+    row = db.execute('SELECT updated FROM issues WHERE key = ?', (issue.key, )).fetchone()
+    return row is not None and row[0] == _value(issue.updated)
+
+
+def clear_project(db, project):
+    db.execute('DELETE FROM comments WHERE issue IN (SELECT key FROM issues WHERE project = ?)', (project, ))
+    db.execute('DELETE FROM issues WHERE project = ?', (project, ))
+    db.execute('DELETE FROM sync WHERE project = ?', (project, ))
+
+
+def get_last_sync(db, project):
+    row = db.execute('SELECT last_sync FROM sync WHERE project = ?', (project, )).fetchone()
+    return row and row[0]
+
+
+def set_last_sync(db, project, last_sync):
+    db.execute('INSERT OR REPLACE INTO sync VALUES (?, ?)', (project, last_sync))
+
+
+def _issue(row):
+    issue = Record(zip(ISSUE_FIELDS, row[:-1]))
+    issue['components'] = [Record(c) for c in json.loads(row[-1] or '[]')]
+    return issue
+
+
+def get_issues(db, keys):
+    ''' yield the mirrored issues of `keys` in order, None for keys not in the mirror '''
+
+    for key in keys:
+        row = db.execute('SELECT * FROM issues WHERE key = ?', (key.upper(), )).fetchone()
+        yield row and _issue(row)
+
+
+def search(db, text):
+    ''' yield the mirrored issues whose summary or description contain all words of `text` '''
+
+    words = text.split()
+    where = ' AND '.join(["(summary || ' ' || ifnull(description, '')) LIKE ?"] * len(words)) or '1'
+    for row in db.execute('SELECT * FROM issues WHERE %s ORDER BY project, CAST(substr(key, length(project) + 2) '
+                          'AS INTEGER)' % where, ['%%%s%%' % w for w in words]):
+        yield _issue(row)
+
+
+def query(db, jql, resolve=None):
+    ''' yield the mirrored issues matching the simple JQL query `jql`
+
+    only clauses "field OP value" joined by AND are understood, OP being one of = != > >= < <= ~ (contains), in and
+    is (EMPTY / null), plus an optional ORDER BY. `resolve(field, value)` may translate a value, e.g. a status name
+    into its id. raises ValueError for anything else.'''
+
+    order = 'project, CAST(substr(key, length(project) + 2) AS INTEGER)'
+    match = ORDER_BY.search(jql)
+    if match:
+        jql = jql[:match.start()]
+        terms = []
+        for term in match.group(1).split(','):
+            parts = term.split()
+            if not parts or parts[0].lower() not in FILTER_FIELDS or len(parts) > 2:
+                raise ValueError('can not order the mirror by "%s"' % term.strip())
+            terms.append(FILTER_FIELDS[parts[0].lower()] + (' DESC' if parts[1:] and parts[1].lower() == 'desc'
+                         else ''))
+        order = ', '.join(terms)
+
+    where = []
+    params = []
+    for clause in [c for c in re.compile(r'\s+and\s+', re.I).split(jql.strip()) if c.strip()]:
+        # only AND is supported, so parentheses around clauses do not matter
+        clause = clause.strip().lstrip('(')
+        while clause.endswith(')') and clause.count(')') > clause.count('('):
+            clause = clause[:-1]
+        match = CLAUSE.match(clause)
+        if not match or match.group(1).lower() not in FILTER_FIELDS:
+            raise ValueError('the mirror does not understand "%s"' % clause.strip())
+        field, op, value = match.group(1).lower(), match.group(2).lower(), match.group(3)
+        column = FILTER_FIELDS[field]
+
+        def _resolve(value):
+            value = value.strip().strip('"\'')
+            if field in ('key', 'issuekey', 'project'):
+                value = value.upper()
+            elif field in ('created', 'updated'):
+                value = value.replace('/', '-')
+            return resolve(field, value) if resolve else value
+
+        if op == 'is':
+            where.append('%s IS %sNULL' % (column, 'NOT ' if value.lower().startswith('not') else ''))
+        elif op == 'in':
+            values = [_resolve(v) for v in value.strip('()').split(',')]
+            where.append('%s IN (%s)' % (column, ', '.join('?' * len(values))))
+            params.extend(values)
+        elif op == '~':
+            where.append('%s LIKE ?' % column)
+            params.append('%%%s%%' % value.strip().strip('"\''))
+        else:
+            where.append('%s %s ?' % (column, op))
+            params.append(_resolve(value))
+
+    for row in db.execute('SELECT * FROM issues WHERE %s ORDER BY %s' % (' AND '.join(where) or '1', order), params):
+        yield _issue(row)
+
+
+def get_comments(db, key):
+    return [Record(zip(COMMENT_FIELDS, row)) for row in db.execute('SELECT %s FROM comments WHERE issue = ? ORDER BY '
+            'created' % ', '.join(COMMENT_FIELDS), (key, ))]
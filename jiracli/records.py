@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+compact records of issues and comments, made of the suds objects as soon as soap_call receives them
+
+suds objects keep a dict, metadata and the custom fields per instance and their strings carry attributes of their own.
+the records only keep the fields jira-cli uses, in __slots__, as plain strings. like suds objects they are read as
+issue.key or issue['key'].
+'''
+
+from jiracli.mirror import ISSUE_FIELDS, COMMENT_FIELDS
+
+# fields holding ids, shared by many issues: kept once per process
+_INTERNED = frozenset(['project', 'type', 'status', 'priority', 'resolution'])
+
+
+class _Record(object):
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join('%s=%r' % (n, getattr(self, n)) for n in self.__slots__
+                           if getattr(self, n) is not None))
+
+
+class Named(_Record):
+    ''' a component or version of an issue '''
+
+    __slots__ = ('id', 'name')
+
+
+class Issue(_Record):
+
+    __slots__ = tuple(ISSUE_FIELDS) + ('components', 'affectsVersions', 'fixVersions')
+
+
+class Comment(_Record):
+
+    __slots__ = tuple(COMMENT_FIELDS)
+
+
+def _plain(name, value):
+    if isinstance(value, unicode):
+        # suds strings are unicode subclasses with attributes of their own
+        if name in _INTERNED:
+            try:
+                return intern(str(value))
+            except UnicodeError:
+                pass
+        return unicode(value)
+    return value
+
+
+def _convert(cls, remote):
+    record = cls.__new__(cls)
+    for name in cls.__slots__:
+        setattr(record, name, _plain(name, getattr(remote, name, None)))
+    return record
+
+
+def issue(remote):
+    ''' the Issue record of the suds RemoteIssue `remote` (None stays None) '''
+
+    if remote is None:
+        return None
+    record = _convert(Issue, remote)
+    for name in ('components', 'affectsVersions', 'fixVersions'):
+        setattr(record, name, [_convert(Named, item) for item in getattr(remote, name, None) or []])
+    return record
+
+
+def issues(remotes):
+    return [issue(remote) for remote in remotes or []]
+
+
+def comments(remotes):
+    return [_convert(Comment, remote) for remote in remotes or []]
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+the config file of jira-cli and the profiles in it
+
+~/.jira-cli/config is read once per process and written back only when a value changes. settings of the default
+profile are kept in its [general] section, those of a profile NAME (another jira instance) in [profile NAME]; the
+token and caches of a profile are kept apart in ~/.jira-cli/profiles/NAME.
+'''
+
+import os
+import tempfile
+import ConfigParser
+
+HOME = '~/.jira-cli'
+
+
+def section(profile=None):
+    ''' the config file section of `profile` (None: the default profile) '''
+
+    return 'profile %s' % profile if profile else 'general'
+
+
+def path(name, profile=None):
+    ''' the path of the file `name` of `profile` (None: the default profile) in ~/.jira-cli, creating its directory '''
+
+    home = os.path.expanduser(HOME)
+    if profile:
+        home = os.path.join(home, 'profiles', profile)
+    if not os.path.isdir(home):
+        try:
+            os.makedirs(home)
+        except OSError:
+            # made by another thread or process in the meantime
+            if not os.path.isdir(home):
+                raise
+    return os.path.join(home, name)
+
+
+class ConfigFile(object):
+    ''' the config file at `path`, parsed when created; set() and remove() write it back if they changed it '''
+
+    def __init__(self, path):
+        self.path = path
+        self.parser = ConfigParser.ConfigParser()
+        self.exists = os.path.isfile(path)
+        if self.exists:
+            self.parser.read(path)
+
+    def get(self, section, key):
+        ''' the value of `key` in `section`, None if it is not set '''
+
+        if self.parser.has_option(section, key):
+            return self.parser.get(section, key)
+        return None
+
+    def set(self, section, key, value):
+        if self.get(section, key) == value:
+            return
+        if not self.parser.has_section(section):
+            self.parser.add_section(section)
+        self.parser.set(section, key, value)
+        self.save()
+
+    def remove(self, section, key):
+        if self.parser.has_option(section, key):
+            self.parser.remove_option(section, key)
+            self.save()
+
+    def save(self):
+        ''' write the file to a temporary file next to it and rename that over it, so it is never seen half written '''
+
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.config-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                self.parser.write(fh)
+            os.rename(temporary, self.path)
+        except:  # NOQA
+            os.remove(temporary)
+            raise
+        self.exists = True
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+aggregation of issues for 'jira-cli stats': counts and age percentiles per group, in memory bounded by the number of
+groups instead of the number of issues
+'''
+
+import math
+
+# histogram buckets grow by 5%, the precision of the percentiles
+BUCKET_BASE = 1.05
+LOG_BASE = math.log(BUCKET_BASE)
+
+
+class Histogram(object):
+    ''' counts of durations (seconds) in buckets growing by 5%, enough to tell percentiles within 5% '''
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+
+    def add(self, seconds):
+        index = int(math.log(seconds) / LOG_BASE) if seconds >= 1 else -1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+
+    def percentile(self, percent):
+        ''' the duration `percent` percent of the durations are shorter than, None if there are none '''
+
+        if not self.count:
+            return None
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                break
+        # the middle of the bucket, on the log scale
+        return BUCKET_BASE ** (index + 0.5) if index >= 0 else 0.0
+
+
+class Aggregate(object):
+    ''' number of issues, their ages and the times they are in their status, per group
+
+    `groups_of(issue)` returns the group keys (tuples) an issue is counted in, e.g. one per component. the time in
+    status is the time since the last update, the soap api keeps no history of status changes.'''
+
+    def __init__(self, groups_of, now):
+        self.groups_of = groups_of
+        self.now = now
+        self.groups = {}
+        self.total = 0
+
+    def _seconds(self, since):
+        if since is None:
+            return None
+        delta = self.now - since
+        return delta.days * 86400 + delta.seconds
+
+    def add(self, issue):
+        self.total += 1
+        age = self._seconds(issue.created)
+        in_status = self._seconds(issue.updated)
+        for key in self.groups_of(issue):
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = [0, Histogram(), Histogram()]
+            group[0] += 1
+            if age is not None:
+                group[1].add(age)
+            if in_status is not None:
+                group[2].add(in_status)
+
+    def rows(self):
+        ''' (key, issues, age histogram, time in status histogram) per group, the largest groups first '''
+
+        return sorted([(key, ) + tuple(group) for (key, group) in self.groups.items()], key=lambda row: (-row[1],
+                      row[0]))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+timing of soap calls and the phases of a command, reported by --trace and --trace-file
+'''
+
+import os
+import sys
+import json
+import time
+import threading
+import functools
+
+ENABLED = False
+EVENTS = []
+LOCK = threading.Lock()
+START = time.time()
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def record(name, category, start, duration, **args):
+    ''' record that `name` took `duration` seconds from `start` on the current thread '''
+
+    thread = threading.current_thread()
+    with LOCK:
+        EVENTS.append((name, category, start, duration, thread.ident, thread.name, args))
+
+
+class span(object):
+    ''' context manager recording the time spent in its block as `name`, if tracing is enabled
+
+    the `args` dict of the span may be updated inside the block, e.g. with the bytes of a soap call.'''
+
+    def __init__(self, name, category='phase', **args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        if ENABLED:
+            if exc_info[0] is not None:
+                self.args['error'] = exc_info[0].__name__
+            record(self.name, self.category, self.start, time.time() - self.start, **self.args)
+
+
+def traced(name, category='phase'):
+    ''' decorator recording every call of the function as `name` '''
+
+    def _decorator(func):
+
+        @functools.wraps(func)
+        def _traced(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with span(name, category):
+                return func(*args, **kwargs)
+
+        return _traced
+
+    return _decorator
+
+
+def summary():
+    ''' per name: (name, category, calls, total seconds, max seconds, bytes sent, bytes received, retries) '''
+
+    rows = {}
+    with LOCK:
+        events = list(EVENTS)
+    for name, category, _, duration, _, _, args in events:
+        row = rows.setdefault(name, [name, category, 0, 0.0, 0.0, 0, 0, 0])
+        row[2] += 1
+        row[3] += duration
+        row[4] = max(row[4], duration)
+        row[5] += args.get('sent', 0)
+        row[6] += args.get('received', 0)
+        row[7] += args.get('retries', 0)
+    return sorted([tuple(values) for values in rows.values()], key=lambda row: -row[3])
+
+
+def print_summary(stream=None):
+    stream = stream or sys.stderr
+    print >> stream, '%-32s %7s %10s %9s %9s %11s %11s %7s' % ('name', 'calls', 'total ms', 'mean ms', 'max ms',
+                                                             'sent', 'received', 'retries')
+    for name, category, calls, total, longest, sent, received, retries in summary():
+        print >> stream, '%-32s %7d %10.1f %9.2f %9.2f %11d %11d %7d' % (name, calls, total * 1000,
+                                                                      total * 1000 / calls, longest * 1000, sent,
+                                                                      received, retries)
+
+
+def write_chrome_trace(path):
+    ''' write the events to `path` in the chrome trace event format (chrome://tracing, perfetto) '''
+
+    pid = os.getpid()
+    trace_events = []
+    threads = {}
+    with LOCK:
+        events = list(EVENTS)
+    for name, category, start, duration, tid, thread_name, args in events:
+        threads[tid] = thread_name
+        trace_events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                             'ts': int((start - START) * 1e6), 'dur': int(duration * 1e6), 'args': args})
+    for tid, thread_name in threads.items():
+        trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+    with open(path, 'w') as fh:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, fh)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+suds transport keeping pooled, gzip-compressed http connections, safe to use from several threads
+'''
+
+import time
+import zlib
+import errno
+import select
+import socket
+import httplib
+import urlparse
+import threading
+from StringIO import StringIO
+from email.utils import parsedate_tz, mktime_tz
+from suds.transport import Reply, TransportError
+from suds.transport.http import HttpAuthenticated
+
+# suds keeps per-reply state in the bindings of the (shared) wsdl, so marshalling and unmarshalling must not run
+# concurrently. SUDS_LOCK serialises them, the transport drops it while a request is on the wire.
+SUDS_LOCK = threading.Lock()
+_STATE = threading.local()
+
+# connections opened and bytes on the wire (compressed) since the start of the process
+STATS = {'connections': 0, 'requests': 0, 'bytes_sent': 0, 'bytes_received': 0}
+# http statuses of requests worth another try: the server is overloaded, restarting or throttling
+RETRY_STATUSES = (429, 502, 503, 504)
+# errors of requests that timed out or lost their connection
+NETWORK_ERRORS = (socket.error, httplib.HTTPException)
+
+
+def thread_bytes():
+    ''' (bytes sent, bytes received) by requests of the current thread so far '''
+
+    return getattr(_STATE, 'sent', 0), getattr(_STATE, 'received', 0)
+
+
+def call(func, *args, **options):
+    ''' run the suds service call func(*args), holding SUDS_LOCK except while waiting for the server
+
+    a `timeout` option (seconds) replaces the timeout of the suds client for the requests of this call. with `resend`
+    false (a call changing something) a request is not sent again once it was written, see Transport.request.'''
+
+    _STATE.failure = None
+    _STATE.timeout = options.get('timeout')
+    _STATE.resend = options.get('resend', True)
+    try:
+        with SUDS_LOCK:
+            _STATE.locked = True
+            try:
+                return func(*args)
+            finally:
+                _STATE.locked = False
+    finally:
+        _STATE.timeout = None
+        _STATE.resend = True
+
+
+def last_failure():
+    ''' (http status, reply headers) of the last request of the current thread if it failed with an http error,
+    else (None, {}); suds turns most of them into exceptions without the status '''
+
+    return getattr(_STATE, 'failure', None) or (None, {})
+
+
+def lost_connection(ex):
+    ''' whether the network error `ex` is a timeout or a connection dropped by the server, rather than a server that
+    can not be reached at all '''
+
+    return isinstance(ex, (socket.timeout, httplib.HTTPException)) or \
+        getattr(ex, 'errno', None) in (errno.ECONNRESET, errno.EPIPE, errno.ECONNABORTED)
+
+
+def retry_after(headers):
+    ''' seconds to wait as asked by the Retry-After header (seconds or an http date) in `headers`, None if absent '''
+
+    value = dict((k.lower(), v) for (k, v) in headers.items()).get('retry-after', '').strip()
+    if value.isdigit():
+        return float(value)
+    date = parsedate_tz(value) if value else None
+    return max(0.0, mktime_tz(date) - time.time()) if date else None
+
+
+def _closed(connection):
+    # an idle keep-alive connection has nothing to read unless the server closed it
+    try:
+        return connection.sock is not None and bool(select.select([connection.sock], [], [], 0)[0])
+    except (socket.error, select.error, ValueError):
+        return True
+
+
+class ConnectionPool(object):
+    ''' idle keep-alive connections per (scheme, host, port), shared by all threads '''
+
+    def __init__(self):
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def get(self, scheme, netloc, timeout):
+        ''' get an idle connection to `netloc`, or a new one; returns (connection, whether it was reused) '''
+
+        with self.lock:
+            idle = self.idle.get((scheme, netloc))
+            while idle:
+                connection = idle.pop()
+                if not _closed(connection):
+                    return connection, True
+                connection.close()
+            STATS['connections'] += 1
+        connection_class = httplib.HTTPSConnection if scheme == 'https' else httplib.HTTPConnection
+        return connection_class(netloc, timeout=timeout), False
+
+    def put(self, scheme, netloc, connection):
+        with self.lock:
+            self.idle.setdefault((scheme, netloc), []).append(connection)
+
+    def clear(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+
+POOL = ConnectionPool()
+
+
+class Transport(HttpAuthenticated):
+    ''' http transport reusing pooled connections and asking for gzip compressed responses
+
+    it releases SUDS_LOCK while waiting for requests made through call(). requests through a proxy are left to the
+    urllib2 based suds transport.'''
+
+    def open(self, request):
+        if self.options.proxy:
+            return HttpAuthenticated.open(self, request)
+        self.addcredentials(request)
+        return StringIO(self.request('GET', request.url, None, dict(request.headers)).message)
+
+    def send(self, request):
+        if self.options.proxy:
+            return self._unlocked(HttpAuthenticated.send, self, request)
+        self.addcredentials(request)
+        headers = dict(request.headers)
+        headers['Content-Type'] = headers.get('Content-Type', 'text/xml; charset=utf-8')
+        return self._unlocked(self.request, 'POST', request.url, request.message, headers)
+
+    def _unlocked(self, func, *args):
+        if not getattr(_STATE, 'locked', False):
+            return func(*args)
+        _STATE.locked = False
+        SUDS_LOCK.release()
+        try:
+            return func(*args)
+        finally:
+            SUDS_LOCK.acquire()
+            _STATE.locked = True
+
+    def request(self, method, url, body, headers):
+        ''' perform the http request, returns a suds Reply or raises TransportError for http errors '''
+
+        parts = urlparse.urlsplit(url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        headers['Accept-Encoding'] = 'gzip'
+        headers['Connection'] = 'keep-alive'
+        timeout = getattr(_STATE, 'timeout', None) or self.options.timeout
+
+        while True:
+            connection, reused = POOL.get(parts.scheme, parts.netloc, timeout)
+            connection.timeout = timeout
+            written = False
+            try:
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                connection.request(method, path, body, headers)
+                written = True
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except socket.timeout:
+                # the server is slow, not gone: trying again is up to the caller
+                connection.close()
+                raise
+            except NETWORK_ERRORS:
+                connection.close()
+                # the server may have closed an idle connection, only a fresh one is worth another try. once the request
+                # was written the server may have carried it out, changes are not sent twice
+                if not reused or (written and not getattr(_STATE, 'resend', True)):
+                    raise
+
+        with POOL.lock:
+            STATS['requests'] += 1
+            STATS['bytes_sent'] += len(body or '')
+            STATS['bytes_received'] += len(data)
+        _STATE.sent = getattr(_STATE, 'sent', 0) + len(body or '')
+        _STATE.received = getattr(_STATE, 'received', 0) + len(data)
+        if response.will_close:
+            connection.close()
+        else:
+            POOL.put(parts.scheme, parts.netloc, connection)
+
+        if response.getheader('content-encoding', '').lower() == 'gzip':
+            data = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        reply_headers = dict(response.getheaders())
+        if response.status >= 300:
+            _STATE.failure = (response.status, reply_headers)
+            error = TransportError(response.reason, response.status, StringIO(data))
+            error.headers = reply_headers
+            raise error
+        return Reply(response.status, reply_headers, data)
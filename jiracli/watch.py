@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+state of 'jira-cli watch': the issues of a JQL query as seen by the last poll, to tell what changed since
+'''
+
+
+class Snapshot(object):
+    ''' the 'updated' timestamp, status and assignee of every watched issue, kept as a small tuple by key '''
+
+    def __init__(self):
+        self.issues = {}
+        self.last_updated = None
+        # whether the first poll took the snapshot, it may have found no issues at all
+        self.polled = False
+
+    def since(self, margin=None):
+        ''' the JQL date ("yyyy/MM/dd HH:mm") changed issues are updated at or after, moved back by the timedelta
+        `margin`; None until an issue was seen '''
+
+        if not self.last_updated:
+            return None
+        return (self.last_updated - margin if margin else self.last_updated).strftime('%Y/%m/%d %H:%M')
+
+    def update(self, issue):
+        ''' record `issue`, returning the (updated, status, assignee) it had before or None if it is new '''
+
+        previous = self.issues.get(issue.key)
+        self.issues[issue.key] = (issue.updated, issue.status, issue.assignee)
+        if issue.updated and (self.last_updated is None or issue.updated > self.last_updated):
+            self.last_updated = issue.updated
+        return previous
+
+
+def diff(previous, issue, comments=()):
+    ''' what changed of `issue` since it was (updated, status, assignee) `previous`: a list of (change, old, new)
+    with change 'new', 'status', 'assignee' or 'comment' (old is None, new the comment) '''
+
+    if previous is None:
+        return [('new', None, issue)]
+    changes = []
+    if previous[1] != issue.status:
+        changes.append(('status', previous[1], issue.status))
+    if (previous[2] or None) != (issue.assignee or None):
+        changes.append(('assignee', previous[2], issue.assignee))
+    for comment in comments:
+        if previous[0] is None or comment.created > previous[0]:
+            changes.append(('comment', None, comment))
+    return changes
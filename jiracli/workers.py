@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+bounded, order preserving thread pool used to run soap calls concurrently
+'''
+
+import sys
+import time
+import threading
+import Queue
+from collections import deque, OrderedDict
+
+DEFAULT_WORKERS = 8
+
+
+class _Task(object):
+
+    __slots__ = ('item', 'done', 'result', 'exc_info')
+
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+def _work(func, tasks):
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        try:
+            task.result = func(task.item)
+        except BaseException:
+            task.exc_info = sys.exc_info()
+        task.done.set()
+
+
+def parallel_map(func, items, workers=DEFAULT_WORKERS, window=None):
+    ''' yield func(item) for every item of `items` in input order, running up to `workers` calls concurrently
+
+    `items` is consumed lazily: at most `window` (default: 4 * workers) items are pending at any time, so the
+    first result is yielded as soon as it is ready and long inputs need constant memory. an exception raised by
+    `func` is re-raised when its result is due.'''
+
+    workers = max(1, workers or 1)
+    window = window or 4 * workers
+    tasks = Queue.Queue()
+    pending = deque()
+    threads = []
+    items = iter(items)
+
+    def _fill():
+        while len(pending) < window:
+            try:
+                task = _Task(next(items))
+            except StopIteration:
+                return
+            pending.append(task)
+            tasks.put(task)
+            if len(threads) < min(workers, len(pending)):
+                thread = threading.Thread(target=_work, args=(func, tasks))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+    finished = False
+    try:
+        _fill()
+        while pending:
+            task = pending.popleft()
+            # wait with a timeout, a plain wait() can not be interrupted by ctrl-c
+            while not task.done.is_set():
+                task.done.wait(0.1)
+            _fill()
+            if task.exc_info:
+                raise task.exc_info[0], task.exc_info[1], task.exc_info[2]
+            yield task.result
+        finished = True
+    finally:
+        # drop work nobody is going to consume anymore, then stop the workers
+        while True:
+            try:
+                tasks.get_nowait()
+            except Queue.Empty:
+                break
+        for _ in threads:
+            tasks.put(None)
+        # idle workers exit right away; waiting for them keeps them from running into the interpreter shutting down
+        # when the results were the last thing the program needed
+        if finished:
+            for thread in threads:
+                thread.join()
+
+
+def background(func, *args):
+    ''' start func(*args) in a background thread, returns a function that waits for and returns its result '''
+
+    task = _Task(args)
+    tasks = Queue.Queue()
+    tasks.put(task)
+    tasks.put(None)
+    thread = threading.Thread(target=_work, args=(lambda a: func(*a), tasks))
+    thread.daemon = True
+    thread.start()
+
+    def _result():
+        while not task.done.is_set():
+            task.done.wait(0.1)
+        thread.join()
+        if task.exc_info:
+            raise task.exc_info[0], task.exc_info[1], task.exc_info[2]
+        return task.result
+
+    return _result
+
+
+def paginate(fetch_page, cursor=None, limit=None):
+    ''' yield the items of all pages returned by `fetch_page`, at most `limit` of them
+
+    `fetch_page(cursor)` returns a list of items and the cursor of the next page, or None after the last page. the
+    next page is fetched in the background while the items of the current one are consumed, so no more than two
+    pages are held in memory.'''
+
+    count = 0
+    items, cursor = fetch_page(cursor)
+    while True:
+        next_page = None
+        if cursor is not None and (limit is None or count + len(items) < limit):
+            next_page = background(fetch_page, cursor)
+        for item in items:
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield item
+        if next_page is None:
+            return
+        items, cursor = next_page()
+
+
+class RateLimiter(object):
+    ''' lets at most `rate` callers per second pass wait(), shared by all threads; no limit if `rate` is not set '''
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Memo(object):
+    ''' thread-safe memo: get() computes the value of a key once, concurrent callers of the same key wait for it '''
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def get(self, key, func, *args):
+        with self.lock:
+            if key in self.values:
+                return self.values[key]
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self.values:
+                value = func(*args)
+                with self.lock:
+                    self.values[key] = value
+            return self.values[key]
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+            self.key_locks.clear()
+
+
+class InFlight(object):
+    ''' runs func(*args) once for concurrent callers of the same key: they wait for the call under way and share its
+    result or exception. nothing is kept once the call returned, unlike Memo. '''
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def run(self, key, func, *args):
+        with self.lock:
+            task = self.calls.get(key)
+            running = task is None
+            if running:
+                task = self.calls[key] = _Task(args)
+        if running:
+            try:
+                task.result = func(*args)
+            except BaseException:
+                task.exc_info = sys.exc_info()
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                task.done.set()
+        else:
+            while not task.done.is_set():
+                task.done.wait(0.1)
+        if task.exc_info:
+            raise task.exc_info[0], task.exc_info[1], task.exc_info[2]
+        return task.result
+
+
+class Throttle(object):
+    ''' context manager letting at most `limit` threads at a time into its block, shared by all threads; after
+    pause(seconds) none gets in before the pause is over, e.g. while the server asked to retry later '''
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.resume_at = 0
+        self.condition = threading.Condition()
+
+    def pause(self, seconds):
+        with self.condition:
+            self.resume_at = max(self.resume_at, time.time() + seconds)
+
+    def __enter__(self):
+        with self.condition:
+            while True:
+                wait = self.resume_at - time.time()
+                if wait <= 0 and self.active < self.limit:
+                    break
+                # waiting in short steps keeps ctrl-c working
+                self.condition.wait(min(wait, 0.1) if wait > 0 else 0.1)
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+
+class RecentCache(object):
+    ''' thread-safe cache of at most `size` values, each dropped `ttl` seconds after it was put '''
+
+    def __init__(self, size=1000, ttl=60):
+        self.size = size
+        self.ttl = ttl
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.values.pop(key, None)
+            if entry is None or entry[0] < time.time():
+                return default
+            # re-inserting keeps the entries ordered from least to most recently used
+            self.values[key] = entry
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.values.pop(key, None)
+            self.values[key] = (time.time() + self.ttl, value)
+            while len(self.values) > self.size:
+                self.values.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.values.pop(key, None)
+
+
+class Backoff(object):
+    ''' seconds to wait between polls: `interval` after a poll that found changes, doubling after every poll that
+    found none or failed, up to `maximum` (default: 8 times `interval`) '''
+
+    def __init__(self, interval, maximum=None):
+        self.interval = interval
+        self.maximum = max(maximum or interval * 8, interval)
+        self.current = interval
+
+    def next(self, changed):
+        self.current = self.interval if changed else min(self.current * 2, self.maximum)
+        return self.current
+
+    def failed(self):
+        self.current = min(self.current * 2, self.maximum)
+        return self.current
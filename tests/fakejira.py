@@ -0,0 +1,720 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+in-process stand-in for the jira soap service (jirasoapservice-v2), used by the tests and the benchmarks.
+
+it serves a rpc/encoded wsdl for the subset of operations used by jira-cli and answers them from an in-memory
+issue store. every request is counted, so tests can assert how many round trips a command made.
+'''
+
+import re
+import gzip
+import time
+import heapq
+import operator
+import threading
+import BaseHTTPServer
+import SocketServer
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from StringIO import StringIO
+
+SOAPENV = 'http://schemas.xmlsoap.org/soap/envelope/'
+WSDL_PATH = '/rpc/soap/jirasoapservice-v2'
+
+# complex types of the beans namespace, fields in order. a trailing '[]' marks an encoded array.
+TYPES = [
+    ('RemoteServerInfo', [('baseUrl', 'xsd:string'), ('buildNumber', 'xsd:string'), ('version', 'xsd:string')]),
+    ('RemoteComponent', [('id', 'xsd:string'), ('name', 'xsd:string')]),
+    ('RemoteVersion', [('id', 'xsd:string'), ('name', 'xsd:string')]),
+    ('RemoteCustomFieldValue', [('customfieldId', 'xsd:string'), ('key', 'xsd:string'), ('values', 'xsd:string[]')]),
+    ('RemoteIssueType', [('id', 'xsd:string'), ('name', 'xsd:string'), ('description', 'xsd:string'),
+     ('icon', 'xsd:string')]),
+    ('RemoteStatus', [('id', 'xsd:string'), ('name', 'xsd:string'), ('description', 'xsd:string'),
+     ('icon', 'xsd:string')]),
+    ('RemotePriority', [('id', 'xsd:string'), ('name', 'xsd:string'), ('description', 'xsd:string'),
+     ('icon', 'xsd:string')]),
+    ('RemoteFilter', [('id', 'xsd:string'), ('name', 'xsd:string'), ('author', 'xsd:string'),
+     ('description', 'xsd:string')]),
+    ('RemoteNamedObject', [('id', 'xsd:string'), ('name', 'xsd:string')]),
+    ('RemoteFieldValue', [('id', 'xsd:string'), ('values', 'xsd:string[]')]),
+    ('RemoteComment', [('id', 'xsd:string'), ('author', 'xsd:string'), ('body', 'xsd:string'),
+     ('created', 'xsd:dateTime'), ('updated', 'xsd:dateTime')]),
+    ('RemoteIssue', [
+        ('id', 'xsd:string'),
+        ('key', 'xsd:string'),
+        ('project', 'xsd:string'),
+        ('type', 'xsd:string'),
+        ('status', 'xsd:string'),
+        ('priority', 'xsd:string'),
+        ('resolution', 'xsd:string'),
+        ('summary', 'xsd:string'),
+        ('description', 'xsd:string'),
+        ('environment', 'xsd:string'),
+        ('assignee', 'xsd:string'),
+        ('reporter', 'xsd:string'),
+        ('created', 'xsd:dateTime'),
+        ('updated', 'xsd:dateTime'),
+        ('duedate', 'xsd:dateTime'),
+        ('votes', 'xsd:long'),
+        ('components', 'RemoteComponent[]'),
+        ('affectsVersions', 'RemoteVersion[]'),
+        ('fixVersions', 'RemoteVersion[]'),
+        ('customFieldValues', 'RemoteCustomFieldValue[]'),
+    ]),
+]
+
+# operations: name, parameter types (token first where jira expects it), return type
+OPERATIONS = [
+    ('login', ['xsd:string', 'xsd:string'], 'xsd:string'),
+    ('logout', ['xsd:string'], 'xsd:boolean'),
+    ('getServerInfo', ['xsd:string'], 'RemoteServerInfo'),
+    ('getIssueTypes', ['xsd:string'], 'RemoteIssueType[]'),
+    ('getStatuses', ['xsd:string'], 'RemoteStatus[]'),
+    ('getPriorities', ['xsd:string'], 'RemotePriority[]'),
+    ('getIssue', ['xsd:string', 'xsd:string'], 'RemoteIssue'),
+    ('getComments', ['xsd:string', 'xsd:string'], 'RemoteComment[]'),
+    ('addComment', ['xsd:string', 'xsd:string', 'RemoteComment'], None),
+    ('createIssue', ['xsd:string', 'RemoteIssue'], 'RemoteIssue'),
+    ('getComponents', ['xsd:string', 'xsd:string'], 'RemoteComponent[]'),
+    ('getFavouriteFilters', ['xsd:string'], 'RemoteFilter[]'),
+    ('getIssuesFromFilter', ['xsd:string', 'xsd:string'], 'RemoteIssue[]'),
+    ('getIssuesFromFilterWithLimit', ['xsd:string', 'xsd:string', 'xsd:int', 'xsd:int'], 'RemoteIssue[]'),
+    ('getIssuesFromJqlSearch', ['xsd:string', 'xsd:string', 'xsd:int'], 'RemoteIssue[]'),
+    ('getIssuesFromTextSearchWithLimit', ['xsd:string', 'xsd:string', 'xsd:int', 'xsd:int'], 'RemoteIssue[]'),
+    ('getAvailableActions', ['xsd:string', 'xsd:string'], 'RemoteNamedObject[]'),
+    ('progressWorkflowAction', ['xsd:string', 'xsd:string', 'xsd:string', 'RemoteFieldValue[]'], 'RemoteIssue'),
+]
+
+STATUSES = [('1', 'Open'), ('3', 'In Progress'), ('4', 'Reopened'), ('5', 'Resolved'), ('6', 'Closed')]
+PRIORITIES = [('1', 'Blocker'), ('2', 'Critical'), ('3', 'Major'), ('4', 'Minor'), ('5', 'Trivial')]
+ISSUE_TYPES = [('1', 'Bug'), ('2', 'New Feature'), ('3', 'Task'), ('4', 'Improvement')]
+
+# workflow: status id -> [(action id, action name, target status id)]
+WORKFLOW = {
+    '1': [('4', 'Start Progress', '3'), ('5', 'Resolve Issue', '5'), ('2', 'Close Issue', '6')],
+    '3': [('301', 'Stop Progress', '1'), ('5', 'Resolve Issue', '5'), ('2', 'Close Issue', '6')],
+    '4': [('4', 'Start Progress', '3'), ('5', 'Resolve Issue', '5'), ('2', 'Close Issue', '6')],
+    '5': [('701', 'Close Issue', '6'), ('3', 'Reopen Issue', '4')],
+    '6': [('3', 'Reopen Issue', '4')],
+}
+
+
+class Fault(Exception):
+    ''' raised by operations to answer with a soap fault '''
+
+    def __init__(self, faultstring, status=500, headers=None):
+        Exception.__init__(self, faultstring)
+        self.faultstring = faultstring
+        self.status = status
+        self.headers = headers or {}
+
+
+def _array_name(typ):
+    base = typ[:-2]
+    return 'ArrayOf_%s' % (base.replace(':', '_') if ':' in base else 'tns1_' + base)
+
+
+def _qname(typ):
+    if typ.endswith('[]'):
+        return 'impl:' + _array_name(typ)
+    return typ if ':' in typ else 'tns1:' + typ
+
+
+def _arrays():
+    found = []
+    for _, fields in TYPES:
+        found.extend(typ for _, typ in fields if typ.endswith('[]'))
+    for _, params, ret in OPERATIONS:
+        found.extend(typ for typ in params + [ret] if typ and typ.endswith('[]'))
+    return sorted(set(found))
+
+
+def build_wsdl(location):
+    ''' render the wsdl document for the service listening at `location` '''
+
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<wsdl:definitions targetNamespace="http://soap.rpc.jira.atlassian.com"'
+           ' xmlns:impl="http://soap.rpc.jira.atlassian.com" xmlns:intf="http://soap.rpc.jira.atlassian.com"'
+           ' xmlns:soapenc="http://schemas.xmlsoap.org/soap/encoding/"'
+           ' xmlns:tns1="http://beans.soap.rpc.jira.atlassian.com" xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"'
+           ' xmlns:wsdlsoap="http://schemas.xmlsoap.org/wsdl/soap/" xmlns:xsd="http://www.w3.org/2001/XMLSchema">',
+           '<wsdl:types>',
+           '<schema targetNamespace="http://beans.soap.rpc.jira.atlassian.com"'
+           ' xmlns="http://www.w3.org/2001/XMLSchema">',
+           '<import namespace="http://soap.rpc.jira.atlassian.com"/>',
+           '<import namespace="http://schemas.xmlsoap.org/soap/encoding/"/>']
+    for name, fields in TYPES:
+        out.append('<complexType name="%s"><sequence>' % name)
+        for field, typ in fields:
+            out.append('<element name="%s" nillable="true" type="%s"/>' % (field, _qname(typ)))
+        out.append('</sequence></complexType>')
+    out.append('</schema>')
+    out.append('<schema targetNamespace="http://soap.rpc.jira.atlassian.com" xmlns="http://www.w3.org/2001/XMLSchema">')
+    out.append('<import namespace="http://beans.soap.rpc.jira.atlassian.com"/>')
+    out.append('<import namespace="http://schemas.xmlsoap.org/soap/encoding/"/>')
+    for typ in _arrays():
+        out.append('<complexType name="%s"><complexContent><restriction base="soapenc:Array">'
+                   '<attribute ref="soapenc:arrayType" wsdl:arrayType="%s[]"/></restriction></complexContent>'
+                   '</complexType>' % (_array_name(typ), _qname(typ[:-2])))
+    out.append('</schema>')
+    out.append('</wsdl:types>')
+    for name, params, ret in OPERATIONS:
+        out.append('<wsdl:message name="%sRequest">' % name)
+        for idx, typ in enumerate(params):
+            out.append('<wsdl:part name="in%d" type="%s"/>' % (idx, _qname(typ)))
+        out.append('</wsdl:message>')
+        out.append('<wsdl:message name="%sResponse">' % name)
+        if ret:
+            out.append('<wsdl:part name="%sReturn" type="%s"/>' % (name, _qname(ret)))
+        out.append('</wsdl:message>')
+    out.append('<wsdl:portType name="JiraSoapService">')
+    for name, params, ret in OPERATIONS:
+        out.append('<wsdl:operation name="%s"><wsdl:input message="impl:%sRequest" name="%sRequest"/>'
+                   '<wsdl:output message="impl:%sResponse" name="%sResponse"/></wsdl:operation>'
+                   % (name, name, name, name, name))
+    out.append('</wsdl:portType>')
+    out.append('<wsdl:binding name="jirasoapservice-v2SoapBinding" type="impl:JiraSoapService">')
+    out.append('<wsdlsoap:binding style="rpc" transport="http://schemas.xmlsoap.org/soap/http"/>')
+    body = ('<wsdlsoap:body encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"'
+            ' namespace="http://soap.rpc.jira.atlassian.com" use="encoded"/>')
+    for name, params, ret in OPERATIONS:
+        out.append('<wsdl:operation name="%s"><wsdlsoap:operation soapAction=""/>'
+                   '<wsdl:input name="%sRequest">%s</wsdl:input><wsdl:output name="%sResponse">%s</wsdl:output>'
+                   '</wsdl:operation>' % (name, name, body, name, body))
+    out.append('</wsdl:binding>')
+    out.append('<wsdl:service name="JiraSoapServiceService"><wsdl:port binding="impl:jirasoapservice-v2SoapBinding"'
+               ' name="jirasoapservice-v2"><wsdlsoap:address location="%s"/></wsdl:port></wsdl:service>'
+               % location)
+    out.append('</wsdl:definitions>')
+    return '\n'.join(out)
+
+
+def _encode(name, typ, value):
+    ''' render `value` as a soap section 5 encoded element '''
+
+    if value is None:
+        return '<%s xsi:nil="true"/>' % name
+    if typ.endswith('[]'):
+        items = ''.join(_encode('item', typ[:-2], item) for item in value)
+        return '<%s xsi:type="%s" soapenc:arrayType="%s[%d]">%s</%s>' % (name, _qname(typ), _qname(typ[:-2]),
+                                                                        len(value), items, name)
+    if ':' in typ:
+        if typ == 'xsd:boolean':
+            value = value and 'true' or 'false'
+        elif not isinstance(value, basestring):
+            value = str(value)
+        return '<%s xsi:type="%s">%s</%s>' % (name, typ, escape(value.encode('utf-8')
+                                                                if isinstance(value, unicode) else value), name)
+    fields = dict(TYPES)[typ]
+    inner = ''.join(_encode(field, ftyp, value.get(field)) for field, ftyp in fields)
+    return '<%s xsi:type="tns1:%s">%s</%s>' % (name, typ, inner, name)
+
+
+def envelope(body):
+    return ('<?xml version="1.0" encoding="utf-8"?>'
+            '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"'
+            ' xmlns:soapenc="http://schemas.xmlsoap.org/soap/encoding/"'
+            ' xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+            ' xmlns:ns1="http://soap.rpc.jira.atlassian.com" xmlns:tns1="http://beans.soap.rpc.jira.atlassian.com"'
+            ' xmlns:impl="http://soap.rpc.jira.atlassian.com">'
+            '<soapenv:Body>%s</soapenv:Body></soapenv:Envelope>' % body)
+
+
+def _decode(node):
+    ''' turn a request parameter element into plain python data '''
+
+    children = list(node)
+    if not children:
+        if node.get('{http://www.w3.org/2001/XMLSchema-instance}nil') == 'true':
+            return None
+        return node.text or ''
+    if node.get('{http://schemas.xmlsoap.org/soap/encoding/}arrayType') is not None:
+        return [_decode(child) for child in children]
+    return dict((child.tag.split('}')[-1], _decode(child)) for child in children)
+
+
+def timestamp(seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(seconds))
+
+
+def _jql_date(value):
+    ''' turn a JQL date ("yyyy/MM/dd HH:mm", "yyyy/MM/dd" or epoch millis) into a timestamp() string '''
+
+    if value.isdigit():
+        return timestamp(int(value) / 1000)
+    value = value.replace('/', '-').replace(' ', 'T')
+    return value + (':00Z' if len(value) == 16 else 'T00:00:00Z' if len(value) == 10 else 'Z')
+
+
+def make_issue(project, number, summary=None, status='1', priority='3', issue_type='3', assignee='jdoe',
+               updated=None, **fields):
+    updated = updated or 1330000000 + number * 60
+    issue = {
+        'id': str(10000 + number),
+        'key': '%s-%d' % (project, number),
+        'project': project,
+        'type': issue_type,
+        'status': status,
+        'priority': priority,
+        'summary': summary or 'issue number %d of %s' % (number, project),
+        'description': 'description of %s-%d' % (project, number),
+        'environment': None,
+        'assignee': assignee,
+        'reporter': 'reporter',
+        'created': timestamp(updated - 3600),
+        'updated': timestamp(updated),
+        'duedate': None,
+        'votes': 0,
+        'components': [],
+        'affectsVersions': [],
+        'fixVersions': [],
+        'customFieldValues': [],
+    }
+    issue.update(fields)
+    return issue
+
+
+class FakeJira(object):
+    ''' in-memory jira instance answering the soap operations
+
+    `latency` is added to every request (seconds), `connect_latency` to every new connection, standing in for the
+    tcp and tls handshakes with a remote server. `payload` pads descriptions to inflate responses.
+    '''
+
+    def __init__(self, latency=0.0, payload=0, user='user', password='password', connect_latency=0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.payload = payload
+        self.user = user
+        self.password = password
+        self.version = '4.4.5'
+        self.lock = threading.Lock()
+        self.issues = {}
+        self.numbers = {}
+        self.comments = {}
+        self.components = {}
+        self.filters = []
+        self.tokens = set()
+        self.calls = {}
+        self.wsdl_fetches = 0
+        self.failures = []
+        self.dropped = []
+        self.next_id = 1
+
+    # --- data setup ---
+
+    def add_issue(self, project, **fields):
+        with self.lock:
+            number = self.numbers.get(project, 0) + 1
+            self.numbers[project] = number
+            issue = make_issue(project, number, **fields)
+            if self.payload:
+                issue['description'] += ' ' + 'x' * self.payload
+            self.issues[issue['key']] = issue
+            return issue
+
+    def clear_issues(self):
+        with self.lock:
+            self.issues.clear()
+            self.comments.clear()
+            self.numbers.clear()
+
+    def add_issues(self, project, count, **fields):
+        return [self.add_issue(project, **fields) for _ in range(count)]
+
+    def add_comment(self, key, body, author='jdoe'):
+        with self.lock:
+            comment = {
+                'id': str(self.next_id),
+                'author': author,
+                'body': body,
+                'created': timestamp(1330000000 + self.next_id),
+                'updated': timestamp(1330000000 + self.next_id),
+            }
+            self.next_id += 1
+            self.comments.setdefault(key, []).append(comment)
+            return comment
+
+    def add_filter(self, name, jql, author='jdoe'):
+        filt = {'id': str(10000 + len(self.filters)), 'name': name, 'author': author, 'description': '', 'jql': jql}
+        self.filters.append(filt)
+        return filt
+
+    def fail_next(self, method, faultstring='service unavailable', status=503, headers=None, count=1):
+        ''' make the next `count` calls of `method` fail '''
+
+        for _ in range(count):
+            self.failures.append((method, Fault(faultstring, status, headers)))
+
+    def drop_next(self, method):
+        ''' carry out the next call of `method`, then close the connection without answering '''
+
+        self.dropped.append(method)
+
+    def expire_tokens(self):
+        self.tokens.clear()
+
+    def reset_counts(self):
+        self.calls.clear()
+        self.wsdl_fetches = 0
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    # --- dispatching ---
+
+    def dispatch(self, method, params):
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            for idx, (name, fault) in enumerate(self.failures):
+                if name == method:
+                    del self.failures[idx]
+                    raise fault
+        if method not in ('login', ):
+            if params[0] not in self.tokens:
+                raise Fault('com.atlassian.jira.rpc.exception.RemoteAuthenticationException: '
+                            'User not authenticated yet, or session timed out.')
+            params = params[1:]
+        return getattr(self, 'op_' + method)(*params)
+
+    def _issue(self, key):
+        key = key.upper()
+        if key not in self.issues:
+            raise Fault('com.atlassian.jira.rpc.exception.RemotePermissionException: '
+                        'This issue does not exist or you don\'t have permission to view it.')
+        return self.issues[key]
+
+    def op_login(self, user, password):
+        if (user, password) != (self.user, self.password):
+            raise Fault('com.atlassian.jira.rpc.exception.RemoteAuthenticationException: '
+                        'Invalid username or password.')
+        token = 'token%d' % len(self.tokens)
+        self.tokens.add(token)
+        return token
+
+    def op_logout(self):
+        return True
+
+    def op_getServerInfo(self):
+        return {'baseUrl': '', 'buildNumber': '660', 'version': self.version}
+
+    def _named(self, items):
+        return [{'id': i, 'name': n, 'description': 'the %s' % n, 'icon': None} for (i, n) in items]
+
+    def op_getIssueTypes(self):
+        return self._named(ISSUE_TYPES)
+
+    def op_getStatuses(self):
+        return self._named(STATUSES)
+
+    def op_getPriorities(self):
+        return self._named(PRIORITIES)
+
+    def op_getIssue(self, key):
+        return self._issue(key)
+
+    def op_getComments(self, key):
+        self._issue(key)
+        return self.comments.get(key.upper(), [])
+
+    def op_addComment(self, key, comment):
+        issue = self._issue(key)
+        added = self.add_comment(key.upper(), comment['body'])
+        added['created'] = added['updated'] = issue['updated'] = timestamp(time.time())
+
+    def op_createIssue(self, remote):
+        project = remote['project'].upper()
+        components = remote.get('components') or []
+        fields = dict((k, v) for (k, v) in remote.items() if k in ('summary', 'description', 'priority'))
+        issue = self.add_issue(project, issue_type=remote.get('type') or '3',
+                               components=[{'id': c['id'], 'name': c['name']} for c in components], **fields)
+        return issue
+
+    def op_getComponents(self, project):
+        return self.components.get(project.upper(), [])
+
+    def op_getFavouriteFilters(self):
+        return self.filters
+
+    def _filter(self, filter_id):
+        for filt in self.filters:
+            if filt['id'] == filter_id:
+                return filt
+        raise Fault('no filter with id %s' % filter_id)
+
+    def op_getIssuesFromFilter(self, filter_id):
+        return self.search(self._filter(filter_id)['jql'])
+
+    def op_getIssuesFromFilterWithLimit(self, filter_id, offset, limit):
+        return self.search(self._filter(filter_id)['jql'])[int(offset):int(offset) + int(limit)]
+
+    def op_getIssuesFromJqlSearch(self, jql, limit):
+        return self.search(jql, int(limit))
+
+    def op_getIssuesFromTextSearchWithLimit(self, text, offset, limit):
+        words = text.lower().split()
+        found = [i for i in self._sorted(self.issues.values()) if all(w in (i['summary'] + ' ' +
+                 (i['description'] or '')).lower() for w in words)]
+        return found[int(offset):int(offset) + int(limit)]
+
+    def op_getAvailableActions(self, key):
+        return [{'id': a, 'name': n} for (a, n, _) in WORKFLOW.get(self._issue(key)['status'], [])]
+
+    def op_progressWorkflowAction(self, key, action_id, params=None):
+        issue = self._issue(key)
+        for (a, _, target) in WORKFLOW.get(issue['status'], []):
+            if a == action_id:
+                issue['status'] = target
+                issue['updated'] = timestamp(time.time())
+                return issue
+        raise Fault('com.atlassian.jira.rpc.exception.RemoteException: action %s is not valid' % action_id)
+
+    # --- a (very) small jql evaluator ---
+
+    CLAUSE = re.compile(r'^\s*(\w+)\s*(!=|>=|<=|=|>|<|~|\bin\b)\s*(.+?)\s*$', re.I)
+
+    def _sorted(self, issues):
+        return sorted(issues, key=lambda i: (i['project'], int(i['key'].split('-')[1])))
+
+    def search(self, jql, limit=None):
+        ''' the issues matching `jql`, at most `limit` of them '''
+
+        order = None
+        match = re.search(r'\border\s+by\s+(\w+)(\s+desc)?', jql, re.I)
+        if match:
+            jql = jql[:match.start()]
+            order = (match.group(1).lower(), bool(match.group(2)))
+        matches = self._matcher(jql)
+        found = [i for i in self.issues.values() if matches(i)]
+        rank = self._value_of('key')
+        if order:
+            field, desc = order
+            value = self._value_of(field)
+            if desc:
+                # sorts are stable: issues with the same value stay ordered by key
+                found.sort(key=rank)
+                found.sort(key=value, reverse=True)
+                return found[:limit]
+            rank = lambda i, rank=rank: (value(i), rank(i))
+        if limit is not None:
+            return heapq.nsmallest(limit, found, key=rank)
+        return sorted(found, key=rank)
+
+    def _value_of(self, field):
+        ''' a function returning the value of `field` of an issue, comparable to the values _convert returns '''
+
+        if field in ('key', 'issuekey'):
+            return lambda issue: (issue['project'], int(issue['key'].split('-')[1]))
+        if field == 'id':
+            return lambda issue: int(issue['id'])
+        return lambda issue: issue.get(field)
+
+    def _convert(self, field):
+        ''' a function converting a value of `field` as written in jql '''
+
+        if field in ('key', 'issuekey'):
+            return lambda v: tuple((v.split('-')[0].upper(), int(v.split('-')[1])))
+        if field == 'id':
+            return int
+        if field in ('updated', 'created'):
+            return _jql_date
+        names = {'status': STATUSES, 'priority': PRIORITIES, 'type': ISSUE_TYPES}
+        if field in names:
+            lookup = dict((n.lower(), i) for (i, n) in names[field])
+            return lambda v: lookup.get(v.lower(), v)
+        return lambda v: v
+
+    def _matcher(self, jql):
+        ''' a function telling whether an issue matches all clauses of `jql` joined by AND '''
+
+        clauses = [self._compile(c) for c in re.compile(r'\s+and\s+', re.I).split(jql.strip()) if c.strip()]
+        return lambda issue: all(matches(issue) for matches in clauses)
+
+    def _compile(self, clause):
+        ''' parse `clause` into a function telling whether an issue matches it '''
+
+        # only AND and a parenthesized OR of single clauses are supported, so parentheses do not matter
+        clause = clause.strip().lstrip('(')
+        while clause.endswith(')') and clause.count(')') > clause.count('('):
+            clause = clause[:-1]
+        alternatives = re.compile(r'\s+or\s+', re.I).split(clause)
+        if len(alternatives) > 1:
+            alternatives = [self._compile(c) for c in alternatives]
+            return lambda issue: any(matches(issue) for matches in alternatives)
+        match = self.CLAUSE.match(clause)
+        if not match:
+            raise Fault('com.atlassian.jira.rpc.exception.RemoteValidationException: cannot parse "%s"' % clause)
+        field, op, raw = match.group(1).lower(), match.group(2).lower(), match.group(3)
+        if field == 'filter':
+            raw = raw.strip('"\'')
+            filt = next((f for f in self.filters if raw in (f['id'], f['name'])), None)
+            if filt is None:
+                raise Fault('com.atlassian.jira.rpc.exception.RemoteValidationException: no filter %s' % raw)
+            return self._matcher(filt['jql'])
+        value = self._value_of(field)
+        convert = self._convert(field)
+        if op == 'in':
+            wanted = [convert(v.strip().strip('"\'')) for v in raw.strip('()').split(',')]
+            return lambda issue: value(issue) in wanted
+        raw = raw.strip('"\'')
+        if raw == 'currentUser()':
+            raw = self.user
+        if op == '~':
+            return lambda issue: raw.lower() in (value(issue) or '').lower()
+        other = convert(raw)
+        compare = {'=': operator.eq, '!=': operator.ne, '>': operator.gt, '<': operator.lt, '>=': operator.ge,
+                   '<=': operator.le}[op]
+        return lambda issue: compare(value(issue), other)
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # write each reply in one go, small separate writes stall on keep-alive connections (nagle vs. delayed ack)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, content_type='text/xml; charset=utf-8', headers=None):
+        stats = self.server.stats
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if 'gzip' in self.headers.getheader('accept-encoding', ''):
+            buf = StringIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6) as fh:
+                fh.write(body)
+            body = buf.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.jira.lock:
+            stats['bytes_sent'] += len(body)
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.jira.lock:
+            self.server.stats['connections'] += 1
+        time.sleep(self.server.jira.connect_latency)
+
+    def do_GET(self):
+        jira = self.server.jira
+        if self.path.startswith(WSDL_PATH) and self.path.endswith('?wsdl'):
+            time.sleep(jira.latency)
+            with jira.lock:
+                jira.wsdl_fetches += 1
+            self._reply(200, self.server.wsdl)
+        else:
+            self._reply(404, 'not found', 'text/plain')
+
+    def do_POST(self):
+        jira = self.server.jira
+        body = self.rfile.read(int(self.headers.getheader('content-length', 0)))
+        with jira.lock:
+            self.server.stats['bytes_received'] += len(body)
+        time.sleep(jira.latency)
+        request = list(ElementTree.fromstring(body).find('{%s}Body' % SOAPENV))[0]
+        method = request.tag.split('}')[-1]
+        params = [_decode(p) for p in request]
+        try:
+            result = jira.dispatch(method, params)
+            with jira.lock:
+                if method in jira.dropped:
+                    jira.dropped.remove(method)
+                    self.close_connection = 1
+                    return
+        except Fault, fault:
+            self._reply(fault.status, envelope('<soapenv:Fault><faultcode>soapenv:Server.userException</faultcode>'
+                        '<faultstring>%s</faultstring></soapenv:Fault>' % escape(fault.faultstring)),
+                        headers=fault.headers)
+            return
+        ret = dict((name, r) for (name, _, r) in OPERATIONS)[method]
+        inner = _encode('%sReturn' % method, ret, result) if ret else ''
+        self._reply(200, envelope('<ns1:%sResponse soapenv:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">'
+                    '%s</ns1:%sResponse>' % (method, inner, method)))
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def process_request_thread(self, request, client_address,
+                               _process=SocketServer.ThreadingMixIn.process_request_thread):
+        # handlers of kept-alive connections may still run while the interpreter exits and module globals are gone,
+        # hence no global names here
+        try:
+            _process(self, request, client_address)
+        except:  # NOQA
+            pass
+
+
+def serve(jira=None):
+    ''' start a fake jira in a background thread, returns (server, base url) '''
+
+    server = Server(('127.0.0.1', 0), Handler)
+    server.jira = jira or FakeJira()
+    server.stats = {'connections': 0, 'bytes_sent': 0, 'bytes_received': 0}
+    base = 'http://127.0.0.1:%d' % server.server_address[1]
+    server.wsdl = build_wsdl(base + WSDL_PATH)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, base
+
+
+def setup_home(base, **settings):
+    ''' point $HOME at a fresh directory holding a jira-cli config for `base` and reset the cli module state '''
+
+    import os
+    import tempfile
+    from jiracli import cli
+    from jiracli import completion
+
+    home = tempfile.mkdtemp(prefix='jira-cli-test-')
+    os.environ['HOME'] = home
+    os.makedirs(os.path.join(home, '.jira-cli'))
+    settings.setdefault('jirabase', base)
+    settings.setdefault('user', 'user')
+    settings.setdefault('password', 'password')
+    # the on-disk issue cache would change how many calls a command makes, tests of it turn it on
+    settings.setdefault('issue_cache_mb', 0)
+    with open(os.path.join(home, '.jira-cli', 'config'), 'w') as fh:
+        fh.write('[general]\n')
+        for key, value in sorted(settings.items()):
+            fh.write('%s = %s\n' % (key, value))
+    cli.CONFIG.clear()
+    cli.CONFIG['color'] = False
+    cli.CONFIG_FILE = None
+    cli.PROFILE = None
+    cli.JIRAOBJ = None
+    cli.TOKEN = None
+    cli.METADATA.clear()
+    cli.ISSUE_CACHE = None
+    cli.FILTERS.clear()
+    completion.SEEN.names.clear()
+    return home
+
+
+def run(argv):
+    ''' run the jira-cli command line `argv` in-process and return what it printed '''
+
+    import sys
+    from StringIO import StringIO
+    from jiracli import cli
+
+    args = cli.setup_argparser().parse_args(argv)
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        args.func(args)
+        return sys.stdout.getvalue()
+    finally:
+        run.last_output = sys.stdout.getvalue()
+        sys.stdout = stdout
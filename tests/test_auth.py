@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+
+
+def teardown_module():
+    SERVER.shutdown()
+
+
+def setup():
+    SERVER.jira.reset_counts()
+    SERVER.home = fakejira.setup_home(SERVER.base)
+
+
+def teardown():
+    shutil.rmtree(SERVER.home)
+
+
+def test_wsdl_fetched_once_when_cold():
+    cli.check_auth()
+    assert SERVER.jira.wsdl_fetches == 1
+    assert cli.TOKEN
+
+
+def test_warm_start_reuses_cached_wsdl():
+    cli.check_auth()
+    SERVER.jira.reset_counts()
+    cli.CONFIG.clear()
+    cli.check_auth()
+    assert SERVER.jira.wsdl_fetches == 0
+    assert cli.get_issue_status('1') == 'Open'
+
+
+def test_wsdl_cache_is_keyed_by_jirabase():
+    cli.check_auth()
+    cache_dirs = os.listdir(os.path.expanduser('~/.jira-cli/wsdl'))
+    assert len(cache_dirs) == 1
+
+
+def test_cached_token_costs_no_requests():
+    cli.check_auth()
+    SERVER.jira.reset_counts()
+    cli.check_auth()
+    assert SERVER.jira.total_calls == 0
+
+
+def test_expired_token_is_renewed_once_and_call_retried():
+    cli.check_auth()
+    old_token = cli.TOKEN
+    SERVER.jira.expire_tokens()
+    SERVER.jira.reset_counts()
+    assert cli.get_issue_status('3') == 'In Progress'
+    assert cli.TOKEN != old_token
+    assert open(os.path.expanduser('~/.jira-cli/token')).read() == cli.TOKEN
+    assert SERVER.jira.calls == {'getStatuses': 2, 'login': 1}
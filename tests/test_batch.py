@@ -0,0 +1,75 @@
+import json
+import shutil
+import tempfile
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    SERVER.jira.add_issues('TP', 5)
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def run_batch(lines, *options):
+    batch = tempfile.NamedTemporaryFile()
+    batch.write('\n'.join(lines) + '\n')
+    batch.flush()
+    try:
+        fakejira.run(list(options) + ['batch', batch.name])
+    except SystemExit:
+        pass
+    return [json.loads(line) for line in fakejira.run.last_output.split('\n') if line]
+
+
+def test_batch_runs_every_line_and_reports_in_order():
+    SERVER.jira.reset_counts()
+    results = run_batch([
+        '# comments and blank lines are skipped',
+        '',
+        'comment TP-1 -c "first comment"',
+        '["comment", "TP-2", "-c", "second", "comment"]',
+        '{"id": "start-3", "args": ["progress", "TP-3", "--start"]}',
+        '-o list TP-4 TP-5',
+        'comment TP-99 -c nope',
+        'list --no-such-option',
+        'batch',
+    ], '--workers', '4')
+    assert [r['line'] for r in results] == [3, 4, 5, 6, 7, 8, 9]
+    assert [r['ok'] for r in results] == [True, True, True, True, True, False, False]
+    assert results[0]['output'] == 'comment "first comment" added to TP-1\n'
+    assert results[2]['id'] == 'start-3'
+    assert [l.split()[0] for l in results[3]['output'].split('\n') if l] == ['TP-4', 'TP-5']
+    assert 'failed to add comment to TP-99' in results[4]['output']
+    assert 'unrecognized arguments' in results[5]['error']
+    assert 'not allowed' in results[6]['error']
+    assert SERVER.jira.comments['TP-2'][0]['body'] == 'second comment'
+    assert SERVER.jira.issues['TP-3']['status'] == '3'
+    assert 'login' not in SERVER.jira.calls
+
+
+def test_lines_reading_stdin_or_an_editor_are_rejected():
+    SERVER.jira.reset_counts()
+    results = run_batch([
+        '-o list -',
+        'comment TP-1',
+        'create TP -s no description',
+        'create TP -s summary -d description',
+        'comment TP-2 -c still run',
+    ])
+    assert [r['line'] for r in results] == [1, 2, 3, 4, 5]
+    assert [r['ok'] for r in results] == [False, False, False, True, True]
+    assert all('stdin or starts an editor' in r['error'] for r in results[:3])
+    assert SERVER.jira.calls['createIssue'] == 1
+    assert SERVER.jira.comments['TP-2'][-1]['body'] == 'still run'
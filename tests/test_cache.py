@@ -0,0 +1,115 @@
+import os
+import shutil
+import time
+import datetime
+
+import fakejira
+from jiracli import cli
+from jiracli.cache import IssueCache
+from jiracli.mirror import Record
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 5):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base, issue_cache_mb=1)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    SERVER.jira.reset_counts()
+
+
+def test_unchanged_issue_is_only_probed():
+    first = fakejira.run(['-v', 'list', 'TP-1'])
+    assert SERVER.jira.calls == {'getIssue': 1, 'getComments': 1}
+    SERVER.jira.reset_counts()
+    assert fakejira.run(['-v', 'list', 'TP-1']) == first
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1}
+
+
+def test_comments_are_fetched_again_once_the_issue_changed():
+    fakejira.run(['-v', 'list', 'TP-2'])
+    SERVER.jira.add_comment('TP-2', 'added behind our back')
+    SERVER.jira.issues['TP-2']['updated'] = fakejira.timestamp(1400000000)
+    SERVER.jira.reset_counts()
+    assert 'added behind our back' in fakejira.run(['-v', 'list', 'TP-2'])
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1, 'getComments': 1}
+
+
+def test_comment_invalidates_the_cached_issue():
+    fakejira.run(['-v', 'list', 'TP-3'])
+    fakejira.run(['comment', 'TP-3', '-c', 'fresh', 'comment'])
+    SERVER.jira.reset_counts()
+    assert 'fresh comment' in fakejira.run(['-v', 'list', 'TP-3'])
+    assert SERVER.jira.calls == {'getIssue': 1, 'getComments': 1}
+
+
+def test_no_cache():
+    cli.CONFIG['issue_cache_mb'] = '0'
+    cli.ISSUE_CACHE = None
+    try:
+        fakejira.run(['-v', 'list', 'TP-4'])
+        fakejira.run(['-v', 'list', 'TP-4'])
+        assert SERVER.jira.calls == {'getIssue': 2, 'getComments': 2}
+    finally:
+        del cli.CONFIG['issue_cache_mb']
+        cli.ISSUE_CACHE = None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = IssueCache(os.path.join(SERVER.home, 'evict.db'), 10000)
+    issues = [cli.get_issue('TP-%d' % n) for n in range(1, 6)]
+    for issue in issues:
+        cache.put(issue, [{'body': 'x' * 1000}])
+    cache.get('TP-1')
+    for n in range(6, 12):
+        cache.put(Record(key='TP-%d' % n, updated=None), [{'body': 'x' * 1000}])
+    assert cache.get('TP-1') is not None
+    assert cache.get('TP-2') is None
+    assert cache.db.execute('SELECT sum(size) FROM entries').fetchone()[0] <= 10000
+
+
+def test_total_size_is_kept_up_to_date():
+    cache = IssueCache(os.path.join(SERVER.home, 'total.db'), 10 ** 6)
+    issue = cli.get_issue('TP-1')
+    cache.put(issue, [{'body': 'x' * 100}])
+    cache.put(issue)
+    cache.put(Record(key='TP-9', updated=None), [{'body': 'y' * 100}])
+    cache.discard('TP-9')
+
+    def _sizes():
+        return cache.db.execute('SELECT (SELECT size FROM total), (SELECT sum(size) FROM entries)').fetchone()
+
+    total, size = _sizes()
+    assert total == size > 100
+    # a second process opening the cache keeps counting on the same total
+    IssueCache(cache.db.execute('PRAGMA database_list').fetchone()[2], 10 ** 6).put(Record(key='TP-8', updated=None))
+    total, size = _sizes()
+    assert total == size
+    cache.clear()
+    assert _sizes() == (0, None)
+
+
+def test_updates_inside_the_time_zone_offset_are_found():
+    # suds gives 'updated' in local time, if this machine is 2 hours ahead of jira a change made an hour after the
+    # cached one looks older than it
+    cached = cli.get_issue('TP-5')
+    original = cached.updated
+    cached.updated = original + datetime.timedelta(hours=2)
+    cli.get_issue_cache().put(cached)
+    SERVER.jira.issues['TP-5']['summary'] = 'changed an hour later'
+    SERVER.jira.issues['TP-5']['updated'] = fakejira.timestamp(time.mktime(original.timetuple()) + 3600)
+    assert cli.get_issue('TP-5').summary == 'changed an hour later'
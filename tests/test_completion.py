@@ -0,0 +1,77 @@
+import os
+import sys
+import shutil
+import subprocess
+
+import fakejira
+from jiracli import cli
+from jiracli import completion
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    SERVER.jira.add_issues('TP', 12, components=[{'id': '1', 'name': 'backend'}])
+    SERVER.jira.components['TP'] = [{'id': '1', 'name': 'backend'}, {'id': '2', 'name': 'Front End'}]
+    SERVER.jira.add_filter('Mine', 'key <= TP-5')
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+    fakejira.run(['-o', 'list', '-j', 'project = TP'])
+    fakejira.run(['list', '--components', 'TP'])
+    fakejira.run(['list', '--filters'])
+    fakejira.run(['progress', '-a', 'TP-1'])
+    completion.SEEN.save()
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def _complete(line):
+    words = line.split(' ')
+    return completion.complete(words[:-1], words[-1])
+
+
+def test_commands_add_what_they_saw_to_the_index():
+    assert _complete('list TP-1') == ['TP-1', 'TP-10', 'TP-11', 'TP-12']
+    assert _complete('comment tp-9') == ['TP-9']
+    assert _complete('sync t') == ['TP']
+    assert _complete('list -f m') == ['Mine']
+    assert _complete('create TP -c fr') == ['Front End']
+    assert _complete('progress TP-1 --transist st') == ['Start Progress']
+    assert _complete('create TP -t b') == ['Bug']
+
+
+def test_only_the_arguments_that_name_something_are_completed():
+    assert _complete('li') == ['list']
+    assert _complete('-f $key list -f Mine ') == ['Mine']
+    assert _complete('list -j ') == []
+    assert _complete('progress TP-1 ') == []
+    assert _complete('list --') == []
+
+
+def test_options_match_the_argument_parser():
+    parser = cli.setup_argparser()
+    subparsers = [a for a in parser._actions if a.choices and 'list' in a.choices][0].choices
+    assert sorted(subparsers) == sorted(completion.COMMANDS)
+    for command, options in sorted(completion.OPTIONS.items()):
+        actions = (subparsers[command] if command else parser)._actions
+        taking_values = set(s for a in actions if a.option_strings and a.nargs != 0 for s in a.option_strings)
+        assert taking_values == set(options), command
+
+
+def test_complete_entry_point_does_not_import_suds():
+    code = ('import sys; from jiracli import cli; sys.argv = ["jira-cli", "__complete", "1", "list", "TP-1"]; '
+            'cli.main(); print "suds" in sys.modules')
+    process = subprocess.Popen([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=ROOT),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    assert process.returncode == 0, err
+    assert out.split() == ['TP-1', 'TP-10', 'TP-11', 'TP-12', 'False']
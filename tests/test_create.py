@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    SERVER.jira.components['TP'] = [{'id': '1', 'name': 'backend'}, {'id': '2', 'name': 'frontend'}]
+
+
+def teardown_module():
+    SERVER.shutdown()
+
+
+def setup():
+    SERVER.jira.clear_issues()
+    SERVER.home = fakejira.setup_home(SERVER.base)
+    cli.COMPONENTS.clear()
+    cli.check_auth()
+    SERVER.jira.reset_counts()
+
+
+def teardown():
+    shutil.rmtree(SERVER.home)
+
+
+def summaries(output):
+    return [SERVER.jira.issues[key]['summary'] for key in output.split()]
+
+
+def write_file(suffix, content):
+    path = os.path.join(tempfile.mkdtemp(dir=SERVER.home), 'issues' + suffix)
+    with open(path, 'w') as fh:
+        fh.write(content)
+    return path
+
+
+def test_create_from_csv_resolves_metadata_once():
+    path = write_file('.csv', 'summary,type,priority,components\n' + ''.join(
+                      'issue %d,bug,minor,"backend,frontend"\n' % n for n in range(10)))
+    output = fakejira.run(['--workers', '4', 'create', 'TP', '--from-file', path])
+    assert summaries(output) == ['issue %d' % n for n in range(10)]
+    assert SERVER.jira.calls['getComponents'] == 1
+    assert SERVER.jira.calls['createIssue'] == 10
+    issue = SERVER.jira.issues[output.split()[0]]
+    assert (issue['summary'], issue['type'], issue['priority']) == ('issue 0', '1', '4')
+    assert [c['name'] for c in issue['components']] == ['backend', 'frontend']
+
+
+def test_partial_failure_is_resumed_from_journal():
+    path = write_file('.jsonl', '{"summary": "first"}\n{"project": "TP"}\n{"summary": "third"}\n')
+    try:
+        fakejira.run(['create', 'TP', '--from-file', path])
+        assert False, 'failed row not reported'
+    except SystemExit:
+        pass
+    assert SERVER.jira.calls['createIssue'] == 2
+
+    with open(path, 'w') as fh:
+        fh.write('{"summary": "first"}\n{"summary": "second"}\n{"summary": "third"}\n')
+    output = fakejira.run(['create', 'TP', '--from-file', path])
+    assert summaries(output) == ['first', 'second', 'third']
+    assert SERVER.jira.calls['createIssue'] == 3
+    assert sorted(i['summary'] for i in SERVER.jira.issues.values()) == ['first', 'second', 'third']
@@ -0,0 +1,87 @@
+import os
+import sys
+import shutil
+import subprocess
+from StringIO import StringIO
+
+import fakejira
+from jiracli import daemon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = None
+DAEMON = None
+
+
+def setup_module():
+    global SERVER, DAEMON
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 5):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    DAEMON = subprocess.Popen([sys.executable, '-c', 'import sys; from jiracli import cli; '
+                              'sys.argv = ["jira-cli", "daemon"]; cli.main()'], env=env, stdout=subprocess.PIPE)
+    assert DAEMON.stdout.readline().startswith('jira-cli daemon listening on')
+
+
+def teardown_module():
+    if DAEMON.poll() is None:
+        DAEMON.kill()
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    SERVER.jira.reset_counts()
+
+
+def _request(*argv, **options):
+    stdout, stderr = StringIO(), StringIO()
+    code = daemon.request(dict(options, argv=list(argv)), stdout, stderr)
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def test_recent_issues_are_served_from_memory():
+    code, output, _ = _request('-o', 'list', 'TP-1', 'TP-2')
+    assert code == 0
+    assert [line.split()[0] for line in output.split('\n') if line] == ['TP-1', 'TP-2']
+    assert SERVER.jira.calls == {'getIssue': 2}
+    SERVER.jira.reset_counts()
+    code, output, _ = _request('-o', 'list', 'TP-2')
+    assert output.startswith('TP-2 ')
+    assert SERVER.jira.total_calls == 0
+
+
+def test_comment_invalidates_cached_comments():
+    _request('-c', 'list', 'TP-3')
+    code, output, _ = _request('comment', 'TP-3', '-c', 'through', 'the', 'daemon')
+    assert (code, output) == (0, 'comment "through the daemon" added to TP-3\n')
+    code, output, _ = _request('-c', 'list', 'TP-3')
+    assert 'through the daemon' in output
+    assert SERVER.jira.calls['getComments'] == 2
+
+
+def test_output_is_coloured_for_clients_on_a_terminal():
+    _, plain, _ = _request('-o', 'list', 'TP-4')
+    assert plain.startswith('TP-4 [Open] ') and '\x1b[' not in plain
+    _, coloured, _ = _request('-o', 'list', 'TP-4', color=True)
+    assert coloured.startswith('\x1b[') and '[Open]' not in coloured
+    _, plain, _ = _request('-o', 'list', 'TP-4', color=False)
+    assert plain.startswith('TP-4 [Open] ')
+
+
+def test_errors_and_exit_codes_are_passed_on():
+    code, _, errors = _request('list', 'TP-99')
+    assert code == 1
+    assert 'failed to get issue TP-99' in errors
+    code, _, errors = _request('cache', 'clear')
+    assert code == 1
+    assert 'does not run this command' in errors
+
+
+def test_stop_and_fallback_without_daemon():
+    assert daemon.request({'stop': True}, StringIO(), StringIO()) == 0
+    DAEMON.wait()
+    assert not os.path.exists(daemon.socket_path())
+    assert _request('list', 'TP-1')[0] is None
@@ -0,0 +1,168 @@
+import re
+import csv
+import json
+import shutil
+from StringIO import StringIO
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 20):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.jira.add_filter('Mine', 'key <= TP-5')
+    SERVER.jira.add_filter('Recent', 'key >= TP-4 AND key <= TP-8')
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    SERVER.jira.latency = 0.0
+    SERVER.jira.reset_counts()
+
+
+def test_comments_are_prefetched_concurrently_in_order():
+    SERVER.jira.latency = 0.05
+    output = fakejira.run(['--workers', '10', '-c', 'list', '-j', 'project = TP'])
+    bodies = [line.split('"')[1] for line in output.split('\n') if line]
+    assert bodies == ['comment on TP-%d' % n for n in range(1, 21)]
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1, 'getComments': 20}
+
+
+def test_plain_listing_fetches_no_comments():
+    fakejira.run(['list', '-j', 'project = TP'])
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1}
+
+
+def test_verbose_issue_listing_keeps_input_order():
+    output = fakejira.run(['--workers', '4', '-v', 'list', 'TP-3', 'TP-1', 'TP-2'])
+    issues = [line.split(':')[1].strip() for line in output.split('\n') if line.startswith('issue ')]
+    assert issues == ['TP-3', 'TP-1', 'TP-2']
+    assert SERVER.jira.calls['getComments'] == 3
+
+
+def test_issue_keys_are_fetched_concurrently_once_each():
+    SERVER.jira.latency = 0.05
+    output = fakejira.run(['--workers', '10', '-o', 'list', 'TP-5', 'tp-1', 'TP-5', 'TP-9', 'TP-2', 'TP-1'])
+    assert [line.split()[0] for line in output.split('\n') if line] == ['TP-5', 'TP-1', 'TP-9', 'TP-2']
+    assert SERVER.jira.calls == {'getIssue': 4}
+
+
+def test_issue_keys_from_stdin():
+    import sys
+    from StringIO import StringIO
+    stdin, sys.stdin = sys.stdin, StringIO('TP-4\n\nTP-3\nTP-4\n')
+    try:
+        output = fakejira.run(['-o', 'list', 'TP-7', '-'])
+    finally:
+        sys.stdin = stdin
+    assert [line.split()[0] for line in output.split('\n') if line] == ['TP-7', 'TP-4', 'TP-3']
+
+
+def _keys(output):
+    return [line.split()[0] for line in output.split('\n') if line]
+
+
+def test_jql_search_pages_through_all_results():
+    output = fakejira.run(['-o', 'list', '-j', 'project = TP', '--page-size', '7'])
+    assert _keys(output) == ['TP-%d' % n for n in range(1, 21)]
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 3}
+
+
+def test_jql_search_stops_at_limit():
+    output = fakejira.run(['-o', 'list', '-j', 'project = TP', '--page-size', '7', '--limit', '10'])
+    assert _keys(output) == ['TP-%d' % n for n in range(1, 11)]
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 2}
+
+
+def test_ordered_jql_search_is_fetched_at_once():
+    output = fakejira.run(['-o', 'list', '-j', 'project = TP ORDER BY key DESC', '--page-size', '7'])
+    assert _keys(output) == ['TP-%d' % n for n in range(20, 0, -1)]
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1}
+
+
+def test_text_search_pages_by_offset():
+    output = fakejira.run(['-o', 'list', '-s', 'issue number', '--page-size', '5'])
+    assert _keys(output) == ['TP-%d' % n for n in range(1, 21)]
+    assert SERVER.jira.calls == {'getIssuesFromTextSearchWithLimit': 5}
+
+
+def test_format_tokens_padding_and_escapes():
+    issue = cli.get_issue('TP-12')
+    assert cli.format_issue(issue, 0, '$key|${key}word|$$key|${status:8}|${priority:>7}|$votes$$') == \
+        'TP-12|TP-12word|$key|Open    |  Major|0$'
+    # $keyword is a token of its own, not $key followed by 'word'
+    try:
+        cli.format_issue(issue, 0, '$keyword')
+        assert False, 'unknown field accepted'
+    except AttributeError:
+        pass
+
+
+def test_jsonl_output_streams_one_record_per_issue():
+    output = fakejira.run(['list', '-j', 'project = TP', '--limit', '3', '--output', 'jsonl', '--fields',
+                           'key,status,summary,components,link'])
+    records = [json.loads(line) for line in output.split('\n') if line]
+    assert [r['key'] for r in records] == ['TP-1', 'TP-2', 'TP-3']
+    assert records[0] == {'key': 'TP-1', 'status': 'Open', 'summary': records[0]['summary'], 'components': [],
+                          'link': SERVER.base + '/browse/TP-1'}
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1}
+
+
+def test_csv_and_tsv_output_have_a_header():
+    output = fakejira.run(['list', 'TP-2', 'TP-1', '--output', 'csv', '--fields', 'key,priority,updated'])
+    rows = list(csv.reader(StringIO(output)))
+    assert rows[0] == ['key', 'priority', 'updated']
+    assert [(r[0], r[1]) for r in rows[1:]] == [('TP-2', 'Major'), ('TP-1', 'Major')]
+    assert re.match(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$', rows[1][2])
+    output = fakejira.run(['list', 'TP-1', '--output', 'tsv', '--fields', 'key,type'])
+    assert output == 'key\ttype\nTP-1\tTask\n'
+
+
+def test_unknown_output_field_is_rejected():
+    try:
+        fakejira.run(['list', 'TP-1', '--output', 'jsonl', '--fields', 'key,nosuchfield'])
+        assert False, 'unknown field accepted'
+    except SystemExit, ex:
+        assert 'nosuchfield' in str(ex)
+
+
+def test_filters_run_concurrently_and_list_each_issue_once():
+    SERVER.jira.latency = 0.05
+    output = fakejira.run(['-c', 'list', '-f', 'mine', '10001'])
+    assert output.count('comment on TP-4') == 1
+    assert SERVER.jira.calls == {'getFavouriteFilters': 1, 'getIssuesFromFilter': 2, 'getComments': 8}
+    output = fakejira.run(['-o', 'list', '-f', 'Recent', 'Mine'])
+    assert _keys(output) == ['TP-%d' % n for n in [4, 5, 6, 7, 8, 1, 2, 3]]
+    # the filter catalog is fetched once
+    assert SERVER.jira.calls['getFavouriteFilters'] == 1
+
+
+def test_filters_combined_by_one_search():
+    output = fakejira.run(['-o', 'list', '-f', 'Recent', 'Mine', '--union'])
+    assert _keys(output) == ['TP-%d' % n for n in range(1, 9)]
+    output = fakejira.run(['-o', 'list', '-f', 'Recent', 'Mine', '--intersect'])
+    assert _keys(output) == ['TP-4', 'TP-5']
+    assert 'getIssuesFromFilter' not in SERVER.jira.calls
+    assert SERVER.jira.calls['getIssuesFromJqlSearch'] == 2
+
+
+def test_unknown_filter_is_rejected():
+    try:
+        fakejira.run(['list', '-f', 'Mine', 'nosuchfilter'])
+        assert False, 'unknown filter accepted'
+    except SystemExit, ex:
+        assert 'nosuchfilter' in str(ex)
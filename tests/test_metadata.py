@@ -0,0 +1,69 @@
+import os
+import time
+import shutil
+import argparse
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+
+
+def teardown_module():
+    SERVER.shutdown()
+
+
+def setup():
+    SERVER.home = fakejira.setup_home(SERVER.base)
+    cli.check_auth()
+    SERVER.jira.reset_counts()
+
+
+def teardown():
+    shutil.rmtree(SERVER.home)
+
+
+def test_lookups_share_one_fetch_per_kind():
+    assert cli.get_issue_status('1') == 'Open'
+    assert cli.get_issue_status('6') == 'Closed'
+    assert cli.get_issue_priority('MAJOR') == '3'
+    assert cli.get_issue_type('bug') == '1'
+    assert cli.get_issue_type('no such type') is None
+    assert cli.get_metadata_name('priorities', '2') == 'Critical'
+    assert SERVER.jira.calls == {'getStatuses': 1, 'getPriorities': 1, 'getIssueTypes': 1}
+
+
+def test_cache_file_is_reused_until_it_expires():
+    cli.get_issue_priority('major')
+    cli.METADATA.clear()
+    cli.get_issue_priority('major')
+    assert SERVER.jira.calls == {'getPriorities': 1}
+
+    priorities_file = os.path.expanduser('~/.jira-cli/priorities.json')
+    two_days_ago = time.time() - 2 * 24 * 60 * 60
+    os.utime(priorities_file, (two_days_ago, two_days_ago))
+    cli.METADATA.clear()
+    cli.get_issue_priority('major')
+    assert SERVER.jira.calls == {'getPriorities': 2}
+
+
+def test_format_issue_resolves_names():
+    issue = cli.get_issue(SERVER.jira.add_issue('TP', priority='2', issue_type='1')['key'])
+    assert cli.format_issue(issue, 0, '$key $status $priority $type') == '%s Open Critical Bug' % issue.key
+    assert SERVER.jira.calls['getStatuses'] == 1
+
+
+def test_cache_command_refresh_and_clear():
+    cli.get_issue_status('1')
+    cli.command_cache(argparse.Namespace(action='refresh'))
+    assert SERVER.jira.calls['getStatuses'] == 2
+    cli.command_cache(argparse.Namespace(action='clear'))
+    assert not cli.METADATA
+    assert not os.path.exists(os.path.expanduser('~/.jira-cli/statuses.json'))
+    assert not os.path.exists(os.path.expanduser('~/.jira-cli/wsdl'))
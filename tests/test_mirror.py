@@ -0,0 +1,86 @@
+import time
+import shutil
+import datetime
+
+import fakejira
+from jiracli import cli
+from jiracli import mirror
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+
+
+def teardown_module():
+    SERVER.shutdown()
+
+
+def setup():
+    jira = SERVER.jira
+    jira.clear_issues()
+    jira.add_issues('TP', 4)
+    jira.add_issues('TP', 2, assignee='user', summary='mirror me')
+    jira.add_issue('TP', status='6', assignee='user')
+    jira.add_issue('OTHER')
+    jira.add_comment('TP-1', 'a mirrored comment')
+    SERVER.home = fakejira.setup_home(SERVER.base)
+    cli.check_auth()
+    SERVER.jira.reset_counts()
+
+
+def teardown():
+    shutil.rmtree(SERVER.home)
+
+
+def _keys(output):
+    return [line.split()[0] for line in output.split('\n') if line]
+
+
+def test_local_listing_needs_no_requests():
+    assert fakejira.run(['sync', 'TP']) == 'TP: 7 issue(s) synced\n'
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1, 'getComments': 7}
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+    SERVER.jira.reset_counts()
+
+    assert _keys(fakejira.run(['-o', 'list', '--local', 'TP-2', 'tp-5'])) == ['TP-2', 'TP-5']
+    assert _keys(fakejira.run(['-o', 'list', '--local', '-s', 'mirror me'])) == ['TP-5', 'TP-6']
+    assert _keys(fakejira.run(['-o', 'list', '--local', '-j', 'assignee = currentUser() AND status != Closed'])) == \
+        ['TP-5', 'TP-6']
+    assert _keys(fakejira.run(['-o', 'list', '--local', '-j', 'status in (Open, closed) ORDER BY key DESC',
+                 '--limit', '2'])) == ['TP-7', 'TP-6']
+    assert 'a mirrored comment' in fakejira.run(['-c', 'list', '--local', 'TP-1'])
+    assert fakejira.run(['--format', '$key $status', 'list', '--local', 'TP-7']) == 'TP-7 Closed\n'
+    assert SERVER.jira.total_calls == 0
+
+
+def test_sync_is_incremental():
+    fakejira.run(['sync', 'TP'])
+    SERVER.jira.issues['TP-3']['updated'] = fakejira.timestamp(time.time())
+    SERVER.jira.issues['TP-3']['summary'] = 'changed on the server'
+    SERVER.jira.reset_counts()
+    assert fakejira.run(['sync', 'TP']) == 'TP: 1 issue(s) synced\n'
+    # the issues found again that did not change are skipped
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1, 'getComments': 1}
+    output = fakejira.run(['--format', '$key $summary', 'list', '--local', '-j', 'summary ~ changed'])
+    assert output == 'TP-3 changed on the server\n'
+
+
+def test_updates_inside_the_time_zone_offset_are_synced():
+    fakejira.run(['sync', 'TP'])
+    # suds gives 'updated' in local time: with this machine 2 hours ahead of jira, the last sync is recorded 2 hours
+    # after the newest update as jira sees it
+    db = cli.open_mirror()
+    last_sync = datetime.datetime.strptime(mirror.get_last_sync(db, 'TP'), '%Y/%m/%d %H:%M')
+    mirror.set_last_sync(db, 'TP', (last_sync + datetime.timedelta(hours=2)).strftime('%Y/%m/%d %H:%M'))
+    db.commit()
+    newest = time.mktime(last_sync.timetuple())
+    SERVER.jira.issues['TP-1']['updated'] = fakejira.timestamp(newest + 1800)
+    SERVER.jira.issues['TP-1']['summary'] = 'changed half an hour later'
+    assert fakejira.run(['sync', 'TP']) == 'TP: 1 issue(s) synced\n'
+    output = fakejira.run(['--format', '$key $summary', 'list', '--local', 'TP-1'])
+    assert output == 'TP-1 changed half an hour later\n'
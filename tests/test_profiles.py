@@ -0,0 +1,100 @@
+import os
+import shutil
+
+import fakejira
+from jiracli import cli
+from jiracli import completion
+from jiracli import settings
+
+SERVER = None
+OTHER = None
+
+
+def setup_module():
+    global SERVER, OTHER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    SERVER.jira.add_issues('TP', 2)
+    OTHER, other_base = fakejira.serve(fakejira.FakeJira(user='ops', password='secret'))
+    OTHER.jira.add_issues('OPS', 3)
+    SERVER.home = fakejira.setup_home(base, retries=2)
+    with open(_config_path(), 'a') as fh:
+        fh.write('[profile ops]\njirabase = %s\nuser = ops\npassword = secret\n' % other_base)
+
+
+def teardown_module():
+    SERVER.shutdown()
+    OTHER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def teardown_function(function):
+    cli.use_profile(None)
+    cli.JIRAOBJ = None
+    cli.TOKEN = None
+    cli.METADATA.clear()
+
+
+def _config_path():
+    return os.path.join(os.path.expanduser(settings.HOME), 'config')
+
+
+def test_config_is_read_once_and_not_written_when_unchanged():
+    cli.config('retries')
+    # whole seconds, the file system may not keep the fraction exactly
+    mtime = int(os.path.getmtime(_config_path())) - 10
+    os.utime(_config_path(), (mtime, mtime))
+    for _ in range(100):
+        assert cli.config('jirabase') == SERVER.base
+        assert cli.config('retries') == '2'
+        assert cli.config('wsdl_cache_days') == '7'
+    assert os.path.getmtime(_config_path()) == mtime
+    config_file = cli.get_config_file()
+    config_file.set('general', 'retries', '2')
+    assert os.path.getmtime(_config_path()) == mtime
+    config_file.set('general', 'retries', '3')
+    assert os.path.getmtime(_config_path()) != mtime
+    assert settings.ConfigFile(_config_path()).get('general', 'retries') == '3'
+    config_file.set('general', 'retries', '2')
+
+
+def test_profiles_talk_to_their_own_instance():
+    cli.use_profile('ops')
+    assert cli.config('user') == 'ops'
+    # settings other than the instance ones come from [general]
+    assert cli.config('retries') == '2'
+    cli.check_auth()
+    assert [i.key for i in cli.search_issues_jql('project = OPS')] == ['OPS-1', 'OPS-2', 'OPS-3']
+    assert os.path.isfile(os.path.join(os.path.expanduser(settings.HOME), 'profiles', 'ops', 'token'))
+    assert not os.path.exists(os.path.join(os.path.expanduser(settings.HOME), 'token'))
+
+    cli.use_profile(None)
+    cli.JIRAOBJ = cli.TOKEN = None
+    assert cli.config('user') == 'user'
+    cli.check_auth()
+    assert [i.key for i in cli.search_issues_jql('project = TP')] == ['TP-1', 'TP-2']
+    assert os.path.isfile(os.path.join(os.path.expanduser(settings.HOME), 'token'))
+
+
+def test_metadata_and_completion_are_kept_per_profile():
+    cli.use_profile('ops')
+    cli.check_auth()
+    cli.get_metadata('types')
+    assert os.path.isfile(settings.path('types.json', 'ops'))
+    assert not os.path.exists(os.path.join(os.path.expanduser(settings.HOME), 'types.json'))
+    completion.SEEN.add('project', ['OPS'])
+    completion.SEEN.save(completion.index_path('ops'))
+    assert completion.complete(['--profile', 'ops', 'sync'], 'o') == ['OPS']
+    assert completion.complete(['sync'], 'o') == []
+    assert completion.complete(['--profile', 'ops', 'create', 'OPS', '-t'], 'b') == ['Bug']
+
+
+def test_profile_names_are_checked():
+    for name in ['../x', '.hidden', 'a b']:
+        try:
+            cli.setup_argparser().parse_args(['--profile', name, 'list', 'TP-1'])
+        except SystemExit:
+            pass
+        else:
+            assert False, name
+    assert cli.setup_argparser().parse_args(['--profile', 'ops.eu-1', 'list', 'TP-1']).profile == 'ops.eu-1'
@@ -0,0 +1,52 @@
+import shutil
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+
+
+def teardown_module():
+    SERVER.shutdown()
+
+
+def setup():
+    SERVER.jira.clear_issues()
+    SERVER.jira.add_issues('TP', 6)
+    SERVER.jira.add_issues('TP', 4, status='6')
+    SERVER.home = fakejira.setup_home(SERVER.base)
+    cli.WORKFLOW_ACTIONS.clear()
+    cli.check_auth()
+    cli.get_metadata('statuses')
+    SERVER.jira.reset_counts()
+
+
+def teardown():
+    shutil.rmtree(SERVER.home)
+
+
+def test_bulk_transition_fetches_actions_once_per_status():
+    output = fakejira.run(['--workers', '4', 'progress', '--jql', 'project = TP', '--transist', 'start progress'])
+    assert [line.split()[0] for line in output.split('\n') if line] == ['TP-%d' % n for n in range(1, 7)]
+    assert [SERVER.jira.issues['TP-%d' % n]['status'] for n in range(1, 11)] == ['3'] * 6 + ['6'] * 4
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1, 'getAvailableActions': 2, 'progressWorkflowAction': 6}
+
+
+def test_dry_run_changes_nothing():
+    output = fakejira.run(['progress', '--jql', 'project = TP', '--close', '--dry-run'])
+    assert output.split('\n')[0] == 'would progress TP-1: "Close Issue" from status "Open"'
+    assert len(output.split('\n')) == 7
+    assert 'progressWorkflowAction' not in SERVER.jira.calls
+    assert set(i['status'] for i in SERVER.jira.issues.values()) == set(['1', '6'])
+
+
+def test_single_issue_progress():
+    output = fakejira.run(['progress', 'TP-1', '--transist', 'Resolve Issue'])
+    assert 'available actions from this state are:' in output
+    assert SERVER.jira.issues['TP-1']['status'] == '5'
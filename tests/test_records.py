@@ -0,0 +1,58 @@
+import pickle
+import shutil
+
+import fakejira
+from jiracli import cli
+from jiracli import records
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    components = [{'id': '1', 'name': 'backend'}, {'id': '2', 'name': 'frontend'}]
+    for issue in SERVER.jira.add_issues('TP', 3, components=components):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def test_soap_answers_become_records():
+    issue = cli.get_issue('TP-1')
+    assert type(issue) is records.Issue
+    assert not hasattr(issue, '__dict__')
+    assert issue.key == issue['key'] == u'TP-1'
+    assert type(issue.summary) is unicode and type(issue.status) is str
+    assert [c.name for c in issue.components] == ['backend', 'frontend']
+    comments = cli.soap_call('getComments', 'TP-1')
+    assert [type(c) for c in comments] == [records.Comment]
+    assert comments[0]['body'] == 'comment on TP-1'
+
+
+def test_search_results_share_their_ids():
+    issues = list(cli.search_issues_jql('project = TP'))
+    assert [i.key for i in issues] == ['TP-1', 'TP-2', 'TP-3']
+    assert issues[0].project is issues[1].project is issues[2].project
+
+
+def test_records_pickle():
+    issue = cli.get_issue('TP-2')
+    assert pickle.loads(pickle.dumps(issue, 2)) == issue
+
+
+def test_missing_fields_are_none():
+    issue = records.Issue(key='TP-9')
+    assert issue.summary is None and issue.get('summary', '') is None
+    try:
+        issue['nope']
+    except KeyError:
+        pass
+    else:
+        assert False
@@ -0,0 +1,106 @@
+import time
+import socket
+import shutil
+import threading
+
+import fakejira
+from jiracli import cli
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 5):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+    cli.RETRY_DELAY = 0.01
+
+
+def teardown_module():
+    cli.RETRY_DELAY = 0.5
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    SERVER.jira.latency = 0.0
+    SERVER.jira.failures[:] = []
+    SERVER.jira.reset_counts()
+    for key in ('retries', 'request_timeout'):
+        cli.CONFIG.pop(key, None)
+
+
+def _raises(func, *args):
+    try:
+        func(*args)
+    except Exception, ex:
+        return ex
+    assert False, 'nothing raised'
+
+
+def test_unavailable_server_is_asked_again():
+    SERVER.jira.fail_next('getIssue', status=503, count=2)
+    SERVER.jira.fail_next('getComments', status=502)
+    assert 'comment on TP-1' in fakejira.run(['-v', 'list', 'TP-1'])
+    assert SERVER.jira.calls == {'getIssue': 3, 'getComments': 2}
+
+
+def test_retry_after_is_honored():
+    SERVER.jira.fail_next('getComments', status=429, headers={'Retry-After': '1'})
+    start = time.time()
+    fakejira.run(['-c', 'list', 'TP-1', 'TP-2'])
+    assert time.time() - start >= 1
+    assert SERVER.jira.calls['getComments'] == 3
+
+
+def test_gives_up_after_the_configured_retries():
+    cli.CONFIG['retries'] = '2'
+    SERVER.jira.fail_next('getIssue', status=503, count=3)
+    _raises(cli.soap_call, 'getIssue', 'TP-1')
+    assert SERVER.jira.calls == {'getIssue': 3}
+
+
+def test_errors_of_the_request_are_not_retried():
+    SERVER.jira.fail_next('getIssue', status=400)
+    _raises(cli.soap_call, 'getIssue', 'TP-1')
+    assert 'RemotePermissionException' in str(_raises(cli.soap_call, 'getIssue', 'TP-99'))
+    assert SERVER.jira.calls == {'getIssue': 2}
+
+
+def test_changes_are_only_sent_again_if_refused():
+    SERVER.jira.fail_next('addComment', status=503)
+    assert 'added' in cli.add_comment('TP-3', 'refused once')
+    assert SERVER.jira.calls == {'addComment': 2}
+    SERVER.jira.reset_counts()
+    SERVER.jira.fail_next('addComment', status=502)
+    _raises(cli.add_comment, 'TP-3', 'maybe made')
+    assert SERVER.jira.calls == {'addComment': 1}
+
+
+def test_timeouts_are_retried_for_reads_only():
+    cli.CONFIG['request_timeout'] = '0.1'
+    cli.CONFIG['retries'] = '1'
+    SERVER.jira.latency = 0.3
+    assert isinstance(_raises(cli.soap_call, 'getIssue', 'TP-1'), socket.timeout)
+    assert isinstance(_raises(cli.add_comment, 'TP-4', 'slow'), socket.timeout)
+    time.sleep(0.3)
+    assert SERVER.jira.calls == {'getIssue': 2, 'addComment': 1}
+
+
+def test_concurrent_identical_calls_are_coalesced():
+    SERVER.jira.latency = 0.1
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cli.soap_call('getComments', 'TP-5')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SERVER.jira.calls == {'getComments': 1}
+    assert len(results) == 4 and all(r is results[0] for r in results)
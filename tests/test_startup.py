@@ -0,0 +1,42 @@
+import os
+import sys
+import shutil
+import subprocess
+
+import fakejira
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME = None
+
+
+def setup_module():
+    global HOME
+    # nothing listens on port 1, a command trying to log in fails
+    HOME = fakejira.setup_home('http://127.0.0.1:1')
+
+
+def teardown_module():
+    shutil.rmtree(HOME)
+
+
+def _run(code):
+    env = dict(os.environ, PYTHONPATH=ROOT, HOME=HOME)
+    process = subprocess.Popen([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    assert process.returncode == 0, err
+    return out
+
+
+def test_import_loads_neither_suds_nor_termcolor():
+    out = _run('import sys; import jiracli.cli; print sorted(m for m in sys.modules if m.split(".")[0] in '
+               '("suds", "termcolor", "sqlite3", "urllib2"))')
+    assert out.strip() == '[]'
+
+
+def test_local_commands_do_not_log_in():
+    out = _run('import sys; from jiracli import cli; sys.argv = ["jira-cli", "cache", "clear"]; cli.main(); '
+               'print "suds" in sys.modules')
+    assert out.split('\n')[-2] == 'False'
+    out = _run('import sys; from jiracli import cli; sys.argv = ["jira-cli", "-o", "list", "--local", "TP-1"]; '
+               'cli.main(); print "suds" in sys.modules')
+    assert out.strip() == 'False'
@@ -0,0 +1,80 @@
+import json
+import time
+import shutil
+
+import fakejira
+from jiracli import cli
+from jiracli.stats import Histogram
+
+SERVER = None
+DAY = 86400
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    now = time.time()
+    for number in range(10):
+        SERVER.jira.add_issue('TP', status='3' if number < 4 else '1', assignee='alice' if number % 2 else None,
+                              updated=now - number * DAY,
+                              components=[{'id': '1', 'name': 'core'}] + ([{'id': '2', 'name': 'ui'}]
+                                                                          if number < 3 else []))
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    SERVER.jira.reset_counts()
+
+
+def test_counts_by_several_fields_from_paged_search():
+    output = fakejira.run(['stats', '-j', 'project = TP ORDER BY key', '--by', 'status,assignee', '--page-size', '3'])
+    lines = [line.split() for line in output.strip().split('\n')]
+    assert lines[0] == ['status', 'assignee', 'issues', 'age', 'p50', 'age', 'p90', 'in', 'status', 'p50', 'in',
+                        'status', 'p90']
+    assert [line[:-4] for line in lines[1:-1]] == [['Open', 'alice', '3'], ['Open', 'unassigned', '3'],
+                                                    ['In', 'Progress', 'alice', '2'],
+                                                    ['In', 'Progress', 'unassigned', '2']]
+    assert lines[-1] == ['10', 'issue(s)']
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 4}
+
+
+def test_json_output_with_percentiles():
+    output = fakejira.run(['stats', '-j', 'project = TP', '--by', 'component', '--output', 'json',
+                           '--percentiles', '50,100'])
+    result = json.loads(output)
+    assert (result['issues'], result['by']) == (10, ['component'])
+    core, ui = result['groups']
+    assert (core['component'], core['issues'], ui['component'], ui['issues']) == ('core', 10, 'ui', 3)
+    # updated 0 to 9 days ago and created an hour earlier, within the 5% precision of the percentiles
+    assert 4 * 0.95 <= core['in_status_days']['p50'] <= 4 * 1.05
+    assert 9 * 0.95 <= core['age_days']['p100'] <= 9 * 1.05
+    assert 2 * 0.95 <= ui['in_status_days']['p100'] <= 2 * 1.05
+
+
+def test_unknown_field_is_rejected():
+    try:
+        fakejira.run(['stats', '-j', 'project = TP', '--by', 'status,nosuchfield'])
+        assert False, 'unknown field accepted'
+    except SystemExit, ex:
+        assert 'nosuchfield' in str(ex)
+    assert SERVER.jira.total_calls == 0
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    for seconds in range(1, 1001):
+        histogram.add(seconds)
+    histogram.add(0)
+    assert 450 <= histogram.percentile(50) <= 550
+    assert 940 <= histogram.percentile(99) <= 1050
+    assert len(histogram.buckets) < 150
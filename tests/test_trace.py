@@ -0,0 +1,69 @@
+import os
+import json
+import shutil
+
+import fakejira
+from jiracli import cli
+from jiracli import trace
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 5):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    cli.get_metadata('statuses')
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    trace.enable()
+
+
+def teardown():
+    trace.ENABLED = False
+    del trace.EVENTS[:]
+
+
+def _summary():
+    return dict((row[0], row) for row in trace.summary())
+
+
+def test_soap_calls_and_phases_are_recorded():
+    fakejira.run(['--workers', '3', '-c', 'list', '-j', 'project = TP'])
+    summary = _summary()
+    name, category, calls, total, longest, sent, received, retries = summary['getComments']
+    assert (category, calls, retries) == ('soap', 5, 0)
+    assert sent > 0 and received > 0
+    assert summary['getIssuesFromJqlSearch'][2] == 1
+    assert summary['search page'][2] == 1
+    assert summary['format_issue'][2] == 5
+
+
+def test_relogin_is_counted_as_retry():
+    SERVER.jira.expire_tokens()
+    fakejira.run(['list', 'TP-1'])
+    summary = _summary()
+    assert summary['getIssue'][2:3] + summary['getIssue'][7:] == (1, 1)
+    assert summary['login'][2] == 1
+
+
+def test_chrome_trace_file():
+    fakejira.run(['--workers', '2', '-c', 'list', 'TP-1', 'TP-2'])
+    path = os.path.join(SERVER.home, 'trace.json')
+    trace.write_chrome_trace(path)
+    events = json.load(open(path))['traceEvents']
+    calls = [e for e in events if e['ph'] == 'X' and e['name'] == 'getComments']
+    assert len(calls) == 2
+    assert all(e['dur'] >= 0 and e['args']['received'] > 0 for e in calls)
+    thread_names = [e for e in events if e['ph'] == 'M']
+    assert set(e['tid'] for e in thread_names) >= set(e['tid'] for e in calls)
@@ -0,0 +1,75 @@
+import shutil
+
+import fakejira
+from jiracli import cli
+from jiracli import transport
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve(fakejira.FakeJira(payload=2000))
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 20):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    for kind in cli.METADATA_METHODS:
+        cli.get_metadata(kind)
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    transport.POOL.clear()
+    SERVER.jira.reset_counts()
+    SERVER.stats.update(connections=0, bytes_sent=0, bytes_received=0)
+
+
+def test_connections_are_reused_across_calls():
+    fakejira.run(['--workers', '1', '-c', 'list', '-j', 'project = TP'])
+    assert SERVER.jira.total_calls == 21
+    assert SERVER.stats['connections'] == 1
+
+
+def test_concurrent_calls_open_at_most_one_connection_per_worker():
+    fakejira.run(['--workers', '4', '-c', 'list', '-j', 'project = TP'])
+    assert SERVER.jira.total_calls == 21
+    assert SERVER.stats['connections'] <= 4
+
+
+def test_replies_are_gzip_compressed():
+    before = dict(transport.STATS)
+    output = fakejira.run(['-v', 'list', 'TP-1'])
+    assert 'TP-1' in output
+    received = transport.STATS['bytes_received'] - before['bytes_received']
+    assert received == SERVER.stats['bytes_sent']
+    # the padded description compresses well
+    assert received < 2000
+
+
+def test_connection_closed_by_server_is_replaced():
+    fakejira.run(['list', 'TP-1'])
+    for connections in transport.POOL.idle.values():
+        for connection in connections:
+            connection.sock.close()
+    assert 'TP-2' in fakejira.run(['list', 'TP-2'])
+
+
+def test_lost_replies_are_only_asked_for_again_by_reads():
+    fakejira.run(['list', 'TP-1'])
+    SERVER.jira.drop_next('getIssue')
+    assert 'TP-2' in fakejira.run(['list', 'TP-2'])
+    assert SERVER.jira.calls['getIssue'] == 3
+
+    SERVER.jira.drop_next('addComment')
+    try:
+        fakejira.run(['comment', 'TP-3', '-c', 'only', 'once'])
+    except Exception:
+        pass
+    assert SERVER.jira.calls['addComment'] == 1
+    assert [c['body'] for c in SERVER.jira.comments['TP-3']].count('only once') == 1
@@ -0,0 +1,97 @@
+import time
+import shutil
+import datetime
+
+import fakejira
+from jiracli import cli
+from jiracli import watch
+from jiracli.workers import Backoff
+
+SERVER = None
+
+
+def setup_module():
+    global SERVER
+    SERVER, base = fakejira.serve()
+    SERVER.base = base
+    for issue in SERVER.jira.add_issues('TP', 5):
+        SERVER.jira.add_comment(issue['key'], 'comment on %s' % issue['key'])
+    SERVER.home = fakejira.setup_home(base)
+    cli.check_auth()
+    cli.get_metadata('statuses')
+
+
+def teardown_module():
+    SERVER.shutdown()
+    shutil.rmtree(SERVER.home)
+
+
+def setup():
+    SERVER.jira.reset_counts()
+
+
+def _args(*argv):
+    return cli.setup_argparser().parse_args(['watch', '-j', 'project = TP ORDER BY updated DESC'] + list(argv))
+
+
+def test_only_changes_since_the_last_poll_are_reported():
+    args = _args()
+    snapshot = watch.Snapshot()
+    assert cli.poll_watched(args, snapshot) == []
+    assert len(snapshot.issues) == 5
+    assert cli.poll_watched(args, snapshot) == []
+
+    SERVER.jira.op_progressWorkflowAction('TP-2', '4')
+    SERVER.jira.issues['TP-3']['assignee'] = 'alice'
+    SERVER.jira.issues['TP-3']['updated'] = fakejira.timestamp(1400000000)
+    SERVER.jira.op_addComment('TP-4', {'body': 'looks\ngood'})
+    SERVER.jira.add_issue('TP', summary='brand new')
+    SERVER.jira.reset_counts()
+    lines = cli.poll_watched(args, snapshot)
+    assert sorted(lines) == sorted(['TP-2 status: Open -> In Progress', 'TP-3 assignee: jdoe -> alice',
+                                    'TP-4 comment by jdoe: looks good',
+                                    'new: TP-6 [Open]  brand new %s/browse/TP-6' % SERVER.base])
+    # one search for the updated issues, comments only of the changed issues seen before
+    assert SERVER.jira.calls == {'getIssuesFromJqlSearch': 1, 'getComments': 3}
+    assert cli.poll_watched(args, snapshot) == []
+
+
+def test_first_issues_of_an_empty_query_are_reported():
+    args = cli.setup_argparser().parse_args(['watch', '-j', 'project = NEW'])
+    snapshot = watch.Snapshot()
+    assert cli.poll_watched(args, snapshot) == []
+    SERVER.jira.add_issue('NEW', summary='first')
+    assert cli.poll_watched(args, snapshot) == ['new: NEW-1 [Open]  first %s/browse/NEW-1' % SERVER.base]
+    SERVER.jira.add_issue('NEW', summary='second')
+    assert cli.poll_watched(args, snapshot) == ['new: NEW-2 [Open]  second %s/browse/NEW-2' % SERVER.base]
+
+
+def test_changes_inside_the_time_zone_offset_are_reported():
+    args = _args()
+    snapshot = watch.Snapshot()
+    cli.poll_watched(args, snapshot)
+    # suds gives 'updated' in local time, if this machine is 2 hours ahead of jira the snapshot is too
+    newest = time.mktime(snapshot.last_updated.timetuple())
+    snapshot.last_updated += datetime.timedelta(hours=2)
+    SERVER.jira.op_progressWorkflowAction('TP-1', '4')
+    SERVER.jira.issues['TP-1']['updated'] = fakejira.timestamp(newest + 1800)
+    assert cli.poll_watched(args, snapshot) == ['TP-1 status: Open -> In Progress']
+
+
+def test_failed_polls_are_retried():
+    # a failed request is not sent again, the next poll asks for the same changes
+    cli.CONFIG['retries'] = '0'
+    SERVER.jira.fail_next('getIssuesFromJqlSearch')
+    try:
+        output = fakejira.run(['watch', '-j', 'project = TP', '--interval', '0', '--polls', '3'])
+    finally:
+        del cli.CONFIG['retries']
+    assert output == ''
+    assert SERVER.jira.calls['getIssuesFromJqlSearch'] == 3
+
+
+def test_backoff():
+    backoff = Backoff(10, 60)
+    assert [backoff.next(False), backoff.next(False), backoff.next(False), backoff.next(True)] == [20, 40, 60, 10]
+    assert [backoff.failed(), backoff.failed(), backoff.next(False)] == [20, 40, 60]
+    assert Backoff(10).maximum == 80
@@ -0,0 +1,94 @@
+import time
+import itertools
+import threading
+
+from jiracli.workers import parallel_map, paginate, InFlight, RateLimiter, Throttle
+
+
+def test_results_keep_input_order():
+    def slow_square(n):
+        time.sleep(0.01 * (5 - n % 5))
+        return n * n
+
+    assert list(parallel_map(slow_square, range(20), workers=5)) == [n * n for n in range(20)]
+
+
+def test_input_is_consumed_lazily():
+    results = parallel_map(lambda n: n, itertools.count(), workers=2, window=4)
+    assert [next(results) for _ in range(10)] == range(10)
+    results.close()
+
+
+def test_exceptions_are_raised_in_order():
+    def fail_on_three(n):
+        if n == 3:
+            raise ValueError(n)
+        return n
+
+    seen = []
+    try:
+        for result in parallel_map(fail_on_three, range(10), workers=3):
+            seen.append(result)
+    except ValueError:
+        pass
+    assert seen == [0, 1, 2]
+
+
+def test_paginate_holds_at_most_two_pages():
+    requested = []
+
+    def fetch_page(cursor):
+        cursor = cursor or 0
+        requested.append(cursor)
+        return range(cursor, cursor + 10), (cursor + 10 if cursor < 90 else None)
+
+    pages = paginate(fetch_page)
+    assert [next(pages) for _ in range(5)] == range(5)
+    # the second page is fetched in the background while the first one is consumed
+    time.sleep(0.05)
+    assert requested == [0, 10]
+    assert list(pages) == range(5, 100)
+    assert list(paginate(fetch_page, limit=25)) == range(25)
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(50)
+    start = time.time()
+    list(parallel_map(lambda n: limiter.wait(), range(10), workers=5))
+    assert time.time() - start >= 0.17
+
+
+def test_in_flight_calls_are_shared():
+    calls = []
+    in_flight = InFlight()
+
+    def slow(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return key.upper()
+
+    assert list(parallel_map(lambda n: in_flight.run('a', slow, 'a'), range(8), workers=8)) == ['A'] * 8
+    assert calls == ['a']
+    # nothing is kept once the call returned
+    assert in_flight.run('a', slow, 'a') == 'A'
+    assert calls == ['a', 'a']
+
+
+def test_throttle_caps_concurrency_and_pauses():
+    throttle = Throttle(2)
+    active = []
+    lock = threading.Lock()
+
+    def work(n):
+        with throttle:
+            with lock:
+                active.append(throttle.active)
+            time.sleep(0.01)
+
+    list(parallel_map(work, range(10), workers=5))
+    assert max(active) <= 2
+    throttle.pause(0.1)
+    start = time.time()
+    with throttle:
+        pass
+    assert time.time() - start >= 0.09